@@ -1,6 +1,15 @@
-import openai
+from app.components.config import settings
+from core.utils.http_client_provider import configure_http_client_provider
 import os
 
-OPENAI_CLIENT = openai.OpenAI(
+# One keep-alive connection pool for the OpenAI client and the tools' HTTP calls
+HTTP_CLIENT_PROVIDER = configure_http_client_provider(
+    max_connections = settings.HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections = settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    read_timeout = settings.HTTP_READ_TIMEOUT,
+    http2 = settings.HTTP2,
+)
+
+OPENAI_CLIENT = HTTP_CLIENT_PROVIDER.openai_client(
     api_key = os.getenv("OPENAI_API_KEY"),
-)
\ No newline at end of file
+)
@@ -1,16 +1,43 @@
 from modules.openai import OpenAIExecutor
+from core.handlers import ExecutorSessionManager
+from modules.database import ConversationStore
+from core.cache import ResponseCache
 from app.clients.clients import OPENAI_CLIENT
 from app.components.resources.prompt import ALFRED
 from app.components.config import settings
-from modules.tools.get_weather import get_weather_tool
+import modules.tools  # noqa: F401  registers the built-in tools
 
 def get_jarvis_agent():
+    # Replays of a conversation are served from the cache across runs, the clock is not part of the key
+    response_cache = ResponseCache(
+        ttl = settings.RESPONSE_CACHE_TTL,
+        sqlite_path = settings.RESPONSE_CACHE_PATH,
+        cache_nonzero_temperature = True,
+    ) if settings.RESPONSE_CACHE_PATH else None
+
     return OpenAIExecutor(
     client = OPENAI_CLIENT,
-    tools = [get_weather_tool],
+    tools = ["get_weather_tool", "retrieve_knowledge"],
     temperature = 0.3,
     model = settings.OPENAI_MODEL,
     system_message = ALFRED,
+    stable_prefix = True,
+    response_cache = response_cache,
 )
     
-JARVIS_AGENT = get_jarvis_agent()
\ No newline at end of file
+JARVIS_AGENT = get_jarvis_agent()
+
+# Every message is appended to the store as it is produced, sessions resume their latest messages
+CONVERSATION_STORE = ConversationStore(path = settings.CONVERSATION_DB_PATH)
+
+# One executor per Streamlit session, cloned from the template agent (shared client, tools and caches)
+JARVIS_SESSIONS = ExecutorSessionManager(
+    factory = JARVIS_AGENT.clone,
+    max_sessions = settings.MAX_SESSIONS,
+    idle_timeout = settings.SESSION_IDLE_TIMEOUT,
+    max_context_messages = settings.SESSION_MAX_CONTEXT_MESSAGES,
+    max_context_tokens = settings.SESSION_MAX_CONTEXT_TOKENS,
+    on_create = lambda session_id, agent: CONVERSATION_STORE.attach(
+        agent, session_id, resume = settings.CONVERSATION_RESUME_MESSAGES
+    ),
+)
@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings
+from typing import Optional
 
 class Settings(BaseSettings):
     """
@@ -11,6 +12,26 @@ class Settings(BaseSettings):
     WEATHERAPI_API_KEY: str
     WEATHERAPI_BASE_URL: str = "https://api.weatherapi.com/v1"
 
+    # Shared HTTP connection pool settings
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_READ_TIMEOUT: float = 60.0
+    HTTP2: bool = False
+
+    # Per-session executors
+    MAX_SESSIONS: int = 100
+    SESSION_IDLE_TIMEOUT: float = 1800.0
+    SESSION_MAX_CONTEXT_MESSAGES: Optional[int] = 200
+    SESSION_MAX_CONTEXT_TOKENS: Optional[int] = 32000
+
+    # Conversation persistence
+    CONVERSATION_DB_PATH: str = "conversations.sqlite"
+    CONVERSATION_RESUME_MESSAGES: int = 50
+
+    # Opt-in persistent response cache, e.g. for demo replays (responses at the app temperature are reused too)
+    RESPONSE_CACHE_PATH: Optional[str] = None
+    RESPONSE_CACHE_TTL: float = 24 * 3600
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
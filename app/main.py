@@ -1,7 +1,6 @@
-from app.components.agent import JARVIS_AGENT
+from app.components.agent import JARVIS_SESSIONS, CONVERSATION_STORE
 from app.components.services.auth import authenticate
 from app.components.exceptions import AuthenticationError
-import json
 import streamlit as st
 
 def main():
@@ -20,7 +19,13 @@ def main():
             if authenticate(username=username, password=password):
                 st.success("Authentication successful!")
                 st.session_state.authenticated = True
-                st.session_state.chat_history = []
+                # Conversations are stored per user, so a new login resumes the previous one
+                st.session_state.session_id = username
+                st.session_state.chat_history = [
+                    ("You" if message["role"] == "user" else "Jarvis", message["content"])
+                    for message in JARVIS_SESSIONS.get(username).get_context()
+                    if message["role"] in ("user", "assistant") and message.get("content") and not message.get("tool_calls")
+                ]
             else:
                 st.error("Invalid credentials.")
         return
@@ -28,6 +33,7 @@ def main():
     # Initialize chat history
     if "chat_history" not in st.session_state:
         st.session_state.chat_history = []
+    session_id = st.session_state.session_id
 
     # Display chat history with alternating bubbles
     for sender, message in st.session_state.chat_history:
@@ -43,31 +49,50 @@ def main():
             st.markdown(user_input)
 
         try:
-            generator = JARVIS_AGENT.execute(
-                messages=[
-                {"role": "user", 
-                 "content": user_input}
-            ])
+            # The session executor is held for the whole turn, its history is capped afterwards
+            with JARVIS_SESSIONS.session(session_id) as agent:
+                generator = agent.stream_execute(
+                    messages=[
+                    {"role": "user", 
+                     "content": user_input}
+                ])
 
-            # Append assistant's responses one-by-one in the same order
-            for response in generator:
-                if response.content:
-                    st.session_state.chat_history.append(("Jarvis", response.content))
-                    with st.chat_message("assistant"):
-                        st.markdown(response.content)
+                # Render the assistant's responses token by token, one bubble per model call
+                placeholder = None
+                streamed_text = ""
+                for chunk in generator:
+                    if chunk.delta_content:
+                        if placeholder is None:
+                            placeholder = st.chat_message("assistant").empty()
+                        streamed_text += chunk.delta_content
+                        placeholder.markdown(streamed_text)
+                    elif chunk.finish_reason is not None:
+                        if chunk.content:
+                            st.session_state.chat_history.append(("Jarvis", str(chunk.content)))
+                        placeholder = None
+                        streamed_text = ""
 
         except AuthenticationError as e:
             st.error(f"Authentication failed: {e}")
             st.session_state.authenticated = False
             return
 
+    # Token usage and latency of the session
+    usage = JARVIS_SESSIONS.get(session_id).usage_stats
+    with st.sidebar:
+        st.subheader("Usage")
+        st.metric("Turns", usage["turns"])
+        st.metric("Tokens", usage["totals"]["total_tokens"], help=f"{usage['totals']['cached_tokens']} cached prompt tokens")
+        st.metric("Turn latency p90", f"{usage['latency']['turn']['p90']:.2f}s")
+
     # Save conversation
     if st.button("Save & Exit"):
-        history = JARVIS_AGENT.get_history()
-        with open("conversation_history.json", "w") as f:
-            json.dump(history, f, ensure_ascii=False, indent=4)
+        # Messages are already persisted as they are produced, only wait for the pending writes
+        CONVERSATION_STORE.flush(timeout=5)
+        JARVIS_SESSIONS.remove(session_id)
         st.success("Conversation saved. Thank you!")
         st.session_state.authenticated = False
+        del st.session_state.session_id
         st.rerun()
 
 if __name__ == "__main__":
@@ -0,0 +1,121 @@
+"""
+A minimal MCP server over stdio, the stand-in for the MCP benchmarks and a fixture to check
+the session pool against: newline-delimited JSON-RPC on stdin and stdout, standard library only.
+
+    python benchmarks/fake_mcp_server.py
+
+Tools:
+    `echo`: Return the text.
+    `sleep`: Sleep, then return the number of seconds. Calls are served concurrently.
+    `register_tool`: Add an echo tool under a new name and send `notifications/tools/list_changed`.
+    `exit`: Answer, then exit the process (to test reconnects).
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+import json
+import os
+import sys
+import threading
+import time
+
+PROTOCOL_VERSION = "2025-06-18"
+
+SCRIPT_PATH = os.path.abspath(__file__)
+
+
+def _schema(**properties: str) -> Dict[str, Any]:
+    return {
+        "type": "object",
+        "properties": {name: {"type": kind} for name, kind in properties.items()},
+        "required": list(properties),
+    }
+
+
+class FakeMCPServer:
+    """
+    A stdio MCP server with a handful of scripted tools, each `tools/call` served in a worker thread.
+
+    ## Methods:
+        `serve()`: A method to answer the requests on stdin until it is closed.
+    """
+    def __init__(self, workers: int = 32):
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._write_lock = threading.Lock()
+        self._tools: Dict[str, tuple[Dict[str, Any], Callable[[Dict[str, Any]], str]]] = {}
+        self._exiting = False
+
+        self._add_tool("echo", "Return the text.", _schema(text="string"), lambda arguments: arguments["text"])
+        self._add_tool("sleep", "Sleep, then return the number of seconds.", _schema(seconds="number"), self._sleep)
+        self._add_tool("register_tool", "Add an echo tool under a new name.", _schema(name="string"), self._register_tool)
+        self._add_tool("exit", "Exit the server process.", _schema(), self._exit)
+
+    def _add_tool(self, name: str, description: str, schema: Dict[str, Any], handler: Callable[[Dict[str, Any]], str]) -> None:
+        self._tools[name] = ({"name": name, "description": description, "inputSchema": schema}, handler)
+
+    def _write(self, message: Dict[str, Any]) -> None:
+        with self._write_lock:
+            sys.stdout.write(json.dumps(message) + "\n")
+            sys.stdout.flush()
+
+    def _sleep(self, arguments: Dict[str, Any]) -> str:
+        time.sleep(float(arguments["seconds"]))
+        return str(arguments["seconds"])
+
+    def _register_tool(self, arguments: Dict[str, Any]) -> str:
+        self._add_tool(arguments["name"], "Return the text.", _schema(text="string"), lambda arguments: arguments["text"])
+        self._write({"jsonrpc": "2.0", "method": "notifications/tools/list_changed"})
+        return arguments["name"]
+
+    def _exit(self, arguments: Dict[str, Any]) -> str:
+        self._exiting = True
+        return "exiting"
+
+    def _call_tool(self, request_id: Any, params: Dict[str, Any]) -> None:
+        tool = self._tools.get(params.get("name"))
+        if tool is None:
+            self._write({"jsonrpc": "2.0", "id": request_id, "error": {"code": -32602, "message": f"Unknown tool '{params.get('name')}'"}})
+            return
+        try:
+            result = {"content": [{"type": "text", "text": tool[1](params.get("arguments") or {})}], "isError": False}
+        except Exception as e:
+            result = {"content": [{"type": "text", "text": f"{type(e).__name__}: {e}"}], "isError": True}
+        self._write({"jsonrpc": "2.0", "id": request_id, "result": result})
+        if self._exiting:
+            os._exit(0)
+
+    def _handle(self, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        method, params = message.get("method"), message.get("params") or {}
+        if method == "initialize":
+            return {
+                "protocolVersion": params.get("protocolVersion", PROTOCOL_VERSION),
+                "capabilities": {"tools": {"listChanged": True}},
+                "serverInfo": {"name": "fake-mcp-server", "version": "1.0"},
+            }
+        if method == "tools/list":
+            return {"tools": [definition for definition, _ in list(self._tools.values())]}
+        if method == "ping":
+            return {}
+        raise LookupError(method)
+
+    def serve(self) -> None:
+        """
+        Answer the requests on stdin until it is closed.
+        """
+        for line in sys.stdin:
+            if not line.strip():
+                continue
+            message = json.loads(line)
+            if "id" not in message:
+                # Notifications (e.g. `notifications/initialized`) need no answer
+                continue
+            if message.get("method") == "tools/call":
+                self._pool.submit(self._call_tool, message["id"], message.get("params") or {})
+                continue
+            try:
+                self._write({"jsonrpc": "2.0", "id": message["id"], "result": self._handle(message)})
+            except LookupError:
+                self._write({"jsonrpc": "2.0", "id": message["id"], "error": {"code": -32601, "message": f"Method not found: {message.get('method')}"}})
+
+
+if __name__ == "__main__":
+    FakeMCPServer().serve()
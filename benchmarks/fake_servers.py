@@ -0,0 +1,322 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlparse, parse_qs
+import itertools
+import json
+import threading
+import time
+
+
+def default_tool_calls(request: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Ask for the weather of the last user message, the default script of `FakeOpenAIServer`.
+
+    Args:
+        request (Dict[str, Any]): The chat completion request body.
+
+    Returns:
+        List[Dict[str, Any]]: The tool calls as `{"name": ..., "arguments": {...}}`.
+    """
+    location = next(
+        (message["content"] for message in reversed(request["messages"]) if message.get("role") == "user"),
+        "Hanoi",
+    )
+    return [{"name": "get_weather_tool", "arguments": {"mode": "current", "location": location, "days": 0}}]
+
+
+class _LocalServer:
+    """
+    A threaded HTTP server bound to a free local port, run in a daemon thread.
+
+    ## Methods:
+        `start()`: A method to start serving.
+
+        `stop()`: A method to stop serving and release the port.
+
+    ## Properties:
+        `url`: The base URL of the server.
+    """
+    handler_class: type = BaseHTTPRequestHandler
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self._httpd = ThreadingHTTPServer((host, port), self.handler_class)
+        self._httpd.daemon_threads = True
+        self._httpd.app = self
+        self._thread: Optional[threading.Thread] = None
+        self.requests = 0
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> '_LocalServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name=type(self).__name__, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> '_LocalServer':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+
+class _JSONHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, Nagle would delay every response by an ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _FakeOpenAIHandler(_JSONHandler):
+    def do_POST(self) -> None:
+        app: FakeOpenAIServer = self.server.app
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        app.requests += 1
+        if app.latency:
+            time.sleep(app.latency)
+
+        if body.get("stream"):
+            self._stream(app, body)
+        else:
+            self._send_json(200, app.build_completion(body))
+
+    def _stream(self, app: 'FakeOpenAIServer', body: Dict[str, Any]) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        for chunk, delay in app.build_chunks(body):
+            if delay:
+                time.sleep(delay)
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+class FakeOpenAIServer(_LocalServer):
+    """
+    A local stand-in for the OpenAI chat completions endpoint, with a configurable
+    time to first token, token rate and scripted tool calls. While the conversation
+    after the last user message has fewer tool results than `tool_rounds`, the server
+    answers with the tool calls of `tool_calls_factory`, otherwise with a text answer.
+
+    ## Methods:
+        `build_completion()`: A method to build a non-streaming completion for a request.
+
+        `build_chunks()`: A method to build the streamed chunks of a request with their delays.
+    """
+    handler_class = _FakeOpenAIHandler
+
+    def __init__(self,
+                 latency: float = 0.0,
+                 tokens_per_second: Optional[float] = None,
+                 completion_tokens: int = 32,
+                 tool_rounds: int = 0,
+                 tool_calls_factory: Callable[[Dict[str, Any]], List[Dict[str, Any]]] = default_tool_calls,
+                 prompt_tokens: int = 512,
+                 cached_tokens: int = 0,
+                 **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.tool_rounds = tool_rounds
+        self.tool_calls_factory = tool_calls_factory
+        self.prompt_tokens = prompt_tokens
+        self.cached_tokens = cached_tokens
+        self._call_ids = itertools.count(1)
+
+    @property
+    def base_url(self) -> str:
+        return f"{self.url}/v1"
+
+    def _wants_tool_calls(self, body: Dict[str, Any]) -> bool:
+        if not body.get("tools") or not self.tool_rounds:
+            return False
+
+        tool_results = 0
+        for message in reversed(body["messages"]):
+            if message.get("role") == "user":
+                break
+            if message.get("role") == "tool":
+                tool_results += 1
+        return tool_results < self.tool_rounds
+
+    def _usage(self) -> Dict[str, Any]:
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.prompt_tokens + self.completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": self.cached_tokens, "audio_tokens": 0},
+            "completion_tokens_details": {
+                "reasoning_tokens": 0,
+                "audio_tokens": 0,
+                "accepted_prediction_tokens": 0,
+                "rejected_prediction_tokens": 0,
+            },
+        }
+
+    def _tool_calls(self, body: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [
+            {
+                "id": f"call_{next(self._call_ids)}",
+                "type": "function",
+                "function": {"name": call["name"], "arguments": json.dumps(call["arguments"])},
+            }
+            for call in self.tool_calls_factory(body)
+        ]
+
+    def _tokens(self) -> List[str]:
+        return [f"tok{index} " for index in range(self.completion_tokens)]
+
+    def build_completion(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build a non-streaming chat completion.
+
+        Args:
+            body (Dict[str, Any]): The request body.
+
+        Returns:
+            Dict[str, Any]: The chat completion payload.
+        """
+        if self._wants_tool_calls(body):
+            message = {"role": "assistant", "content": None, "tool_calls": self._tool_calls(body)}
+            finish_reason = "tool_calls"
+        else:
+            if self.tokens_per_second:
+                time.sleep(self.completion_tokens / self.tokens_per_second)
+            message = {"role": "assistant", "content": "".join(self._tokens()), "refusal": None}
+            finish_reason = "stop"
+
+        return {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4o-mini"),
+            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+            "usage": self._usage(),
+        }
+
+    def build_chunks(self, body: Dict[str, Any]) -> List[tuple[Dict[str, Any], float]]:
+        """
+        Build the streamed chunks of a chat completion.
+
+        Args:
+            body (Dict[str, Any]): The request body.
+
+        Returns:
+            List[tuple[Dict[str, Any], float]]: The chunks and the delay before sending each of them.
+        """
+        def chunk(delta: Optional[Dict[str, Any]], finish_reason: Optional[str] = None) -> Dict[str, Any]:
+            return {
+                "id": "chatcmpl-bench",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "gpt-4o-mini"),
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+
+        token_delay = 1 / self.tokens_per_second if self.tokens_per_second else 0.0
+
+        if self._wants_tool_calls(body):
+            chunks = [(chunk({"role": "assistant", "content": None, "tool_calls": [
+                {"index": index, **tool_call} for index, tool_call in enumerate(self._tool_calls(body))
+            ]}), 0.0), (chunk({}, "tool_calls"), 0.0)]
+        else:
+            chunks = [(chunk({"role": "assistant", "content": ""}), 0.0)]
+            chunks += [(chunk({"content": token}), token_delay) for token in self._tokens()]
+            chunks.append((chunk({}, "stop"), 0.0))
+
+        usage_chunk = chunk(None)
+        usage_chunk["choices"] = []
+        usage_chunk["usage"] = self._usage()
+        chunks.append((usage_chunk, 0.0))
+        return chunks
+
+
+WEATHER_PAYLOAD = {
+    "location": {"name": "Hanoi", "country": "Vietnam"},
+    "current": {
+        "last_updated": "2025-01-01 12:00",
+        "temp_c": 24.0,
+        "humidity": 70,
+        "condition": {"text": "Partly cloudy"},
+        "air_quality": {"us-epa-index": 2},
+    },
+    "forecast": {
+        "forecastday": [
+            {
+                "date": f"2025-01-0{day}",
+                "day": {
+                    "maxtemp_c": 27.0,
+                    "mintemp_c": 19.0,
+                    "daily_chance_of_rain": 20,
+                    "avghumidity": 68,
+                    "condition": {"text": "Sunny"},
+                },
+            }
+            for day in range(1, 5)
+        ]
+    },
+}
+
+
+class _FakeWeatherHandler(_JSONHandler):
+    def do_GET(self) -> None:
+        app: FakeWeatherAPIServer = self.server.app
+        url = urlparse(self.path)
+
+        if not url.path.endswith("/forecast.json"):
+            self._send_json(404, {"error": {"message": f"Unknown path {url.path}"}})
+            return
+
+        app.requests += 1
+        if app.latency:
+            time.sleep(app.latency)
+
+        query = parse_qs(url.query)
+        payload = json.loads(json.dumps(WEATHER_PAYLOAD))
+        payload["location"]["name"] = query.get("q", ["Hanoi"])[0]
+        days = int(query.get("days", ["1"])[0])
+        payload["forecast"]["forecastday"] = payload["forecast"]["forecastday"][:days]
+        self._send_json(200, payload)
+
+
+class FakeWeatherAPIServer(_LocalServer):
+    """
+    A local stand-in for the WeatherAPI `forecast.json` endpoint with a configurable latency.
+    Point the weather tool to it with `WEATHERAPI_BASE_URL=<base_url>`.
+    """
+    handler_class = _FakeWeatherHandler
+
+    def __init__(self, latency: float = 0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency
+
+    @property
+    def base_url(self) -> str:
+        return f"{self.url}/v1"
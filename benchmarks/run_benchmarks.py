@@ -0,0 +1,581 @@
+"""
+Offline load and latency benchmarks for `OpenAIExecutor`.
+
+Everything runs against local stand-in servers (`benchmarks/fake_servers.py`, and the
+stdio MCP server `benchmarks/fake_mcp_server.py`), no API key or network access is needed. Results are written as JSON, and a previous
+result file can be given with `--baseline` to fail on regressions:
+
+    python -m benchmarks.run_benchmarks --output results.json
+    python -m benchmarks.run_benchmarks --baseline results.json --threshold 0.2
+
+The knowledge retrieval benchmark (exact scan versus the IVF index, on synthetic clustered
+embeddings) is not part of the default suites, as building its index takes a while:
+
+    python -m benchmarks.run_benchmarks --suite retrieval --retrieval-rows 1000000
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+from benchmarks.fake_mcp_server import SCRIPT_PATH as FAKE_MCP_SERVER_PATH
+from benchmarks.fake_servers import FakeOpenAIServer, FakeWeatherAPIServer
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """
+    Get the summary statistics of latency samples.
+
+    Args:
+        samples (List[float]): The latencies in seconds.
+
+    Returns:
+        Dict[str, float]: The count, mean, p50, p95, p99 and max, in milliseconds.
+    """
+    if not samples:
+        return {"count": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+
+    ordered = sorted(samples)
+
+    def rank(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))] * 1000
+
+    return {
+        "count": len(ordered),
+        "mean_ms": sum(ordered) / len(ordered) * 1000,
+        "p50_ms": rank(50),
+        "p95_ms": rank(95),
+        "p99_ms": rank(99),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def timed(fn: Callable[[], Any], repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def make_executor(openai_server: FakeOpenAIServer, tools: Optional[list] = None, **kwargs):
+    from core.utils.http_client_provider import get_http_client_provider
+    from modules.openai import OpenAIExecutor
+
+    if tools:
+        kwargs["tools"] = tools
+    kwargs.setdefault("stable_prefix", True)
+
+    client = get_http_client_provider().openai_client(api_key="benchmark", base_url=openai_server.base_url, max_retries=0)
+    return OpenAIExecutor(
+        client=client,
+        api_key="benchmark",
+        system_message="You are a benchmark assistant.",
+        **kwargs,
+    )
+
+
+def run_turn(executor, message: str, stream: bool) -> Dict[str, Any]:
+    """
+    Run one turn and measure it.
+
+    Args:
+        executor (OpenAIExecutor): The executor.
+        message (str): The user message.
+        stream (bool): Whether to use `stream_execute()`.
+
+    Returns:
+        Dict[str, Any]: The turn latency and, when streaming, the time to the first token.
+    """
+    start = time.perf_counter()
+    first_token = None
+    if stream:
+        for chunk in executor.stream_execute(messages=[{"role": "user", "content": message}]):
+            if first_token is None and chunk.delta_content:
+                first_token = time.perf_counter() - start
+    else:
+        for _ in executor.execute(messages=[{"role": "user", "content": message}]):
+            pass
+    return {"latency": time.perf_counter() - start, "first_token": first_token}
+
+
+def bench_executor_overhead(repeat: int) -> Dict[str, Any]:
+    """
+    Measure the time the executor loop adds on top of a raw client call against a zero-latency server.
+    """
+    with FakeOpenAIServer(latency=0.0, completion_tokens=16) as server:
+        executor = make_executor(server)
+        client = executor._llm_service.client
+        messages = [{"role": "user", "content": "ping"}]
+
+        # Warm up the connection pool and the lazy imports of both paths
+        for _ in range(5):
+            client.chat.completions.create(model="gpt-4o-mini", messages=messages)
+            run_turn(executor, "ping", stream=False)
+            executor.clear_history()
+
+        raw_samples = timed(lambda: client.chat.completions.create(model="gpt-4o-mini", messages=messages), repeat)
+
+        turn_samples = []
+        for _ in range(repeat):
+            turn_samples.append(run_turn(executor, "ping", stream=False)["latency"])
+            executor.clear_history()
+
+    raw, turn = percentiles(raw_samples), percentiles(turn_samples)
+    return {
+        "raw_call": raw,
+        "execute_turn": turn,
+        "overhead_p50_ms": turn["p50_ms"] - raw["p50_ms"],
+    }
+
+
+def bench_response_cache(repeat: int) -> Dict[str, Any]:
+    """
+    Replay the same conversations in two separate runs sharing a SQLite `ResponseCache`: the
+    second run uses a fresh executor and cache instance (empty memory tier) and a clock one day
+    later, as a later process would. Every replayed turn must be served from the cache.
+    """
+    import modules.openai.openai_executor as openai_executor
+    from core.cache import ResponseCache
+
+    class NextDay(datetime.datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.datetime.now(tz) + datetime.timedelta(days=1)
+
+    prompts = [f"Replay {index}" for index in range(max(1, repeat // 10))]
+    results: Dict[str, Any] = {"prompts": len(prompts)}
+    with FakeOpenAIServer(latency=0.01, completion_tokens=16) as server, tempfile.TemporaryDirectory() as directory:
+        for stable_prefix in (True, False):
+            path = os.path.join(directory, f"responses_{stable_prefix}.sqlite")
+            runs = []
+            for run in range(2):
+                openai_executor.datetime = SimpleNamespace(datetime=NextDay) if run else datetime
+                try:
+                    cache = ResponseCache(sqlite_path=path)
+                    executor = make_executor(server, temperature=0.0, response_cache=cache, stable_prefix=stable_prefix)
+                    samples = []
+                    for prompt in prompts:
+                        samples.append(run_turn(executor, prompt, stream=False)["latency"])
+                        executor.clear_history()
+                    runs.append({"turn": percentiles(samples), **cache.stats()})
+                    cache.persistent.close()
+                finally:
+                    openai_executor.datetime = datetime
+            name = "stable_prefix" if stable_prefix else "stamped_system_prompt"
+            results[name] = {"live": runs[0], "replay": runs[1], "cross_run_hit": runs[1]["hits"] == len(prompts)}
+            print(f"response cache ({name}) live p50={runs[0]['turn']['p50_ms']:.1f}ms replay p50={runs[1]['turn']['p50_ms']:.1f}ms "
+                  f"hits={runs[1]['hits']}/{len(prompts)} ({'ok' if results[name]['cross_run_hit'] else 'FAILED'})", file=sys.stderr)
+    return results
+
+
+def bench_tool_dispatch(repeat: int, tool_calls: int, tool_sleep: float) -> Dict[str, Any]:
+    """
+    Measure the `ToolHandler` cost per call with a no-op tool, the argument decoding
+    and validation alone, and sequential versus concurrent dispatch of several sleeping tools.
+    """
+    from core.handlers import ToolHandler
+    from core.models.responses import OpenAgentResponse
+    from core.utils.tool_wrapper import tool
+
+    @tool
+    def noop_tool(value: str) -> str:
+        """Return the value."""
+        return value
+
+    @tool
+    def sleep_tool(value: str) -> str:
+        """Sleep, then return the value."""
+        time.sleep(tool_sleep)
+        return value
+
+    def response_for(tool_name: str, count: int) -> OpenAgentResponse:
+        return OpenAgentResponse(
+            role="assistant",
+            tool_calls=[
+                {"id": f"call_{index}", "type": "function", "function": {"name": tool_name, "arguments": json.dumps({"value": str(index)})}}
+                for index in range(count)
+            ],
+        )
+
+    handler = ToolHandler(tools=[noop_tool, sleep_tool], llm_provider="openai", schema_type="OpenAI")
+    concurrent_handler = ToolHandler(tools=[noop_tool, sleep_tool], llm_provider="openai", schema_type="OpenAI", concurrent_tool_calls=True)
+
+    noop_response = response_for("noop_tool", 1)
+    noop_samples = timed(lambda: handler.handle_tool_request(noop_response), repeat * 10)
+    decode_samples = timed(lambda: handler._prepare_tool_calls(noop_response.tool_calls), repeat * 10)
+
+    sleep_response = response_for("sleep_tool", tool_calls)
+    sequential_samples = timed(lambda: handler.handle_tool_request(sleep_response), max(3, repeat // 10))
+    concurrent_samples = timed(lambda: concurrent_handler.handle_tool_request(sleep_response), max(3, repeat // 10))
+
+    noop = percentiles(noop_samples)
+    return {
+        "noop_call_us": noop["p50_ms"] * 1000,
+        "noop_call": noop,
+        "decode_args_us": percentiles(decode_samples)["p50_ms"] * 1000,
+        "tool_calls": tool_calls,
+        "tool_sleep_ms": tool_sleep * 1000,
+        "sequential": percentiles(sequential_samples),
+        "concurrent": percentiles(concurrent_samples),
+    }
+
+
+def bench_mcp(repeat: int, tool_calls: int, tool_sleep: float, concurrency: int = 8) -> Dict[str, Any]:
+    """
+    Measure MCP tool calls through `ToolHandler` and the shared session pool against the stdio
+    stand-in server: the call latency, concurrent calls in one response and from several
+    threads, the refresh after a `tools/list_changed` notification and the reconnect after
+    the server process exits.
+    """
+    from mcp import StdioServerParameters
+    from core.handlers import ToolHandler, get_mcp_session_pool
+    from core.models.responses import OpenAgentResponse
+
+    def response_for(*calls: tuple[str, Dict[str, Any]]) -> OpenAgentResponse:
+        return OpenAgentResponse(
+            role="assistant",
+            tool_calls=[
+                {"id": f"call_{index}", "type": "function", "function": {"name": name, "arguments": json.dumps(arguments)}}
+                for index, (name, arguments) in enumerate(calls)
+            ],
+        )
+
+    def call(response: OpenAgentResponse) -> List[str]:
+        return [message.content for message in handler.handle_tool_request(response).tool_messages]
+
+    def tool_names() -> List[str]:
+        return [schema["function"]["name"] for schema in handler.tools]
+
+    pool = get_mcp_session_pool()
+    server = "benchmark"
+    start = time.perf_counter()
+    handler = ToolHandler(
+        llm_provider="openai",
+        schema_type="OpenAI",
+        mcp_sessions={server: StdioServerParameters(command=sys.executable, args=[FAKE_MCP_SERVER_PATH])},
+        concurrent_tool_calls=True,
+    )
+    connect_ms = (time.perf_counter() - start) * 1000
+
+    try:
+        echo_response = response_for(("echo", {"text": "ping"}))
+        call_samples = timed(lambda: call(echo_response), repeat)
+
+        sleep_response = response_for(*[("sleep", {"seconds": tool_sleep})] * tool_calls)
+        concurrent_samples = timed(lambda: call(sleep_response), max(3, repeat // 10))
+
+        # Calls from several threads share the one session of the server
+        errors = 0
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as threads:
+            for index, contents in enumerate(threads.map(lambda index: call(response_for(("echo", {"text": str(index)}))), range(concurrency * 10))):
+                errors += contents != [str(index)]
+        threaded_ms = (time.perf_counter() - start) * 1000
+
+        # A tool added by the server is listed once the notification has been handled
+        refreshes = pool.refreshes
+        start = time.perf_counter()
+        call(response_for(("register_tool", {"name": "echo_registered"})))
+        while "echo_registered" not in tool_names() and time.perf_counter() - start < 5:
+            time.sleep(0.001)
+        refresh_ms = (time.perf_counter() - start) * 1000
+        refreshed = call(response_for(("echo_registered", {"text": "new"}))) == ["new"]
+
+        # The next call after the server exited respawns it
+        reconnects = pool.reconnects
+        call(response_for(("exit", {})))
+        start = time.perf_counter()
+        reconnected = call(echo_response) == ["ping"]
+        reconnect_ms = (time.perf_counter() - start) * 1000
+    finally:
+        pool.disconnect(server)
+
+    results = {
+        "connect_ms": connect_ms,
+        "call_us": percentiles(call_samples)["p50_ms"] * 1000,
+        "call": percentiles(call_samples),
+        "tool_calls": tool_calls,
+        "tool_sleep_ms": tool_sleep * 1000,
+        "concurrent": percentiles(concurrent_samples),
+        "threads": concurrency,
+        "threaded_calls": concurrency * 10,
+        "threaded_ms": threaded_ms,
+        "threaded_errors": errors,
+        "list_changed_refresh_ms": refresh_ms,
+        "refreshed": refreshed and pool.refreshes > refreshes,
+        "reconnect_ms": reconnect_ms,
+        "reconnected": reconnected and pool.reconnects > reconnects,
+    }
+    print(f"mcp call p50={results['call']['p50_ms']:.2f}ms {tool_calls} concurrent sleeps p50={results['concurrent']['p50_ms']:.1f}ms "
+          f"threaded errors={errors} refresh={refresh_ms:.1f}ms ({'ok' if results['refreshed'] else 'FAILED'}) "
+          f"reconnect={reconnect_ms:.1f}ms ({'ok' if results['reconnected'] else 'FAILED'})", file=sys.stderr)
+    return results
+
+
+def bench_load(concurrency_levels: List[int],
+               turns_per_worker: int,
+               model_latency: float,
+               tokens_per_second: Optional[float],
+               weather_latency: float,
+               stream: bool) -> List[Dict[str, Any]]:
+    """
+    Measure throughput and turn latency at increasing concurrency. Every turn calls the
+    weather tool once (through the WeatherAPI stand-in) before the final answer.
+    """
+    with FakeOpenAIServer(latency=model_latency, tokens_per_second=tokens_per_second, tool_rounds=1) as openai_server, \
+         FakeWeatherAPIServer(latency=weather_latency) as weather_server:
+        os.environ["WEATHERAPI_API_KEY"] = "benchmark"
+        os.environ["WEATHERAPI_BASE_URL"] = weather_server.base_url
+
+        from modules.tools.get_weather import get_weather_tool
+
+        base_executor = make_executor(openai_server, tools=[get_weather_tool])
+        run_turn(base_executor, "Warmup", stream)
+
+        results = []
+        for concurrency in concurrency_levels:
+            executors = [base_executor.clone() for _ in range(concurrency)]
+
+            def worker(worker_index: int) -> List[Dict[str, Any]]:
+                executor = executors[worker_index]
+                turns = []
+                for turn_index in range(turns_per_worker):
+                    try:
+                        # A unique location per turn, so no cache in the weather tool is hit
+                        turns.append(run_turn(executor, f"City {concurrency}-{worker_index}-{turn_index}", stream))
+                    except Exception as e:
+                        turns.append({"error": f"{type(e).__name__}: {e}"})
+                    executor.clear_history()
+                return turns
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                turns = [turn for worker_turns in pool.map(worker, range(concurrency)) for turn in worker_turns]
+            wall_time = time.perf_counter() - start
+
+            completed = [turn for turn in turns if "error" not in turn]
+            level = {
+                "concurrency": concurrency,
+                "turns": len(completed),
+                "errors": len(turns) - len(completed),
+                "wall_time_s": wall_time,
+                "throughput_turns_per_s": len(completed) / wall_time if wall_time else 0.0,
+                "turn_latency": percentiles([turn["latency"] for turn in completed]),
+            }
+            if stream:
+                level["first_token_latency"] = percentiles([turn["first_token"] for turn in completed if turn["first_token"] is not None])
+            results.append(level)
+            print(f"concurrency={concurrency:<3} throughput={level['throughput_turns_per_s']:.1f} turns/s "
+                  f"p50={level['turn_latency']['p50_ms']:.1f}ms p95={level['turn_latency']['p95_ms']:.1f}ms "
+                  f"p99={level['turn_latency']['p99_ms']:.1f}ms errors={level['errors']}", file=sys.stderr)
+        return results
+
+
+def bench_retrieval(rows: int, dimensions: int, nprobes: List[int], queries: int, k: int = 10) -> Dict[str, Any]:
+    """
+    Measure the latency of an exact `VectorStore` scan and the recall and latency of an
+    `IVFIndex` at several `nprobe`, on clustered random unit vectors standing in for embeddings.
+    """
+    import numpy as np
+    from modules.database import IVFIndex, VectorStore
+
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((max(1, rows // 250), dimensions)).astype(np.float32)
+
+    def sample(count: int) -> np.ndarray:
+        return centers[rng.integers(0, len(centers), count)] + 0.6 * rng.standard_normal((count, dimensions)).astype(np.float32)
+
+    with tempfile.TemporaryDirectory() as path:
+        store = VectorStore(path, dimensions=dimensions)
+        for start in range(0, rows, 100000):
+            count = min(100000, rows - start)
+            store.add_embeddings(sample(count), [f"chunk {row}" for row in range(start, start + count)])
+
+        index = IVFIndex(store)
+        start = time.perf_counter()
+        index_stats = index.build()
+        build_time = time.perf_counter() - start
+
+        query_vectors = sample(queries)
+        exact_samples, exact_hits = [], []
+        for vector in query_vectors:
+            start = time.perf_counter()
+            exact_hits.append({result.index for result in store.search(vector, k=k)})
+            exact_samples.append(time.perf_counter() - start)
+
+        results = {
+            "rows": rows,
+            "dimensions": dimensions,
+            "k": k,
+            "nlist": index_stats["nlist"],
+            "build_time_s": build_time,
+            "exact": percentiles(exact_samples),
+            "ivf": [],
+        }
+        for nprobe in nprobes:
+            samples, recall = [], 0.0
+            for vector, hits in zip(query_vectors, exact_hits):
+                start = time.perf_counter()
+                found = index.search(vector, k=k, nprobe=nprobe)
+                samples.append(time.perf_counter() - start)
+                recall += len({result.index for result in found} & hits) / k
+            level = {"nprobe": nprobe, "recall": recall / len(query_vectors), "latency": percentiles(samples)}
+            results["ivf"].append(level)
+            print(f"nprobe={nprobe:<4} recall@{k}={level['recall']:.3f} p50={level['latency']['p50_ms']:.2f}ms "
+                  f"p95={level['latency']['p95_ms']:.2f}ms (exact p50={results['exact']['p50_ms']:.2f}ms)", file=sys.stderr)
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Compare the results with a baseline.
+
+    Args:
+        results (Dict[str, Any]): The current results.
+        baseline (Dict[str, Any]): The baseline results.
+        threshold (float): The tolerated relative regression (0.2 means 20%).
+
+    Returns:
+        List[str]: A description of every metric that regressed beyond the threshold.
+    """
+    regressions = []
+
+    def check(name: str, current: float, previous: float, higher_is_better: bool = False) -> None:
+        if not previous:
+            return
+        change = (previous - current) / previous if higher_is_better else (current - previous) / previous
+        if change > threshold:
+            regressions.append(f"{name}: {previous:.3f} -> {current:.3f} ({change:+.0%})")
+
+    if "executor_overhead" in results and "executor_overhead" in baseline:
+        check("executor_overhead.execute_turn.p50_ms",
+              results["executor_overhead"]["execute_turn"]["p50_ms"],
+              baseline["executor_overhead"]["execute_turn"]["p50_ms"])
+
+    if "tool_dispatch" in results and "tool_dispatch" in baseline:
+        check("tool_dispatch.noop_call_us", results["tool_dispatch"]["noop_call_us"], baseline["tool_dispatch"]["noop_call_us"])
+        if "decode_args_us" in baseline["tool_dispatch"]:
+            check("tool_dispatch.decode_args_us", results["tool_dispatch"]["decode_args_us"], baseline["tool_dispatch"]["decode_args_us"])
+
+    if "response_cache" in results and "response_cache" in baseline:
+        for name in ("stable_prefix", "stamped_system_prompt"):
+            if baseline["response_cache"][name]["cross_run_hit"] and not results["response_cache"][name]["cross_run_hit"]:
+                regressions.append(f"response_cache.{name}.cross_run_hit: True -> False")
+
+    if "mcp" in results and "mcp" in baseline:
+        check("mcp.call_us", results["mcp"]["call_us"], baseline["mcp"]["call_us"])
+        check("mcp.concurrent.p50_ms", results["mcp"]["concurrent"]["p50_ms"], baseline["mcp"]["concurrent"]["p50_ms"])
+        for key in ("refreshed", "reconnected"):
+            if baseline["mcp"][key] and not results["mcp"][key]:
+                regressions.append(f"mcp.{key}: True -> False")
+        if results["mcp"]["threaded_errors"] > baseline["mcp"]["threaded_errors"]:
+            regressions.append(f"mcp.threaded_errors: {baseline['mcp']['threaded_errors']} -> {results['mcp']['threaded_errors']}")
+
+    previous_levels = {level["concurrency"]: level for level in baseline.get("load", [])}
+    for level in results.get("load", []):
+        previous = previous_levels.get(level["concurrency"])
+        if previous is None:
+            continue
+        prefix = f"load[concurrency={level['concurrency']}]"
+        check(f"{prefix}.throughput_turns_per_s", level["throughput_turns_per_s"], previous["throughput_turns_per_s"], higher_is_better=True)
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            check(f"{prefix}.turn_latency.{key}", level["turn_latency"][key], previous["turn_latency"][key])
+    previous_probes = {level["nprobe"]: level for level in baseline.get("retrieval", {}).get("ivf", [])}
+    for level in results.get("retrieval", {}).get("ivf", []):
+        previous = previous_probes.get(level["nprobe"])
+        if previous is None:
+            continue
+        prefix = f"retrieval.ivf[nprobe={level['nprobe']}]"
+        check(f"{prefix}.recall", level["recall"], previous["recall"], higher_is_better=True)
+        check(f"{prefix}.latency.p50_ms", level["latency"]["p50_ms"], previous["latency"]["p50_ms"])
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline OpenAIExecutor benchmarks against local stand-in servers.")
+    parser.add_argument("--suite", nargs="+", choices=["overhead", "cache", "tools", "mcp", "load", "retrieval"], default=["overhead", "cache", "tools", "mcp", "load"])
+    parser.add_argument("--repeat", type=int, default=200, help="Samples for the overhead, tool dispatch and MCP benchmarks.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--turns", type=int, default=20, help="Turns per worker in the load benchmark.")
+    parser.add_argument("--model-latency", type=float, default=0.05, help="Fake model time to first token in seconds.")
+    parser.add_argument("--tokens-per-second", type=float, default=None, help="Fake model token rate, unlimited by default.")
+    parser.add_argument("--weather-latency", type=float, default=0.02, help="Fake WeatherAPI latency in seconds.")
+    parser.add_argument("--tool-calls", type=int, default=4, help="Tool calls per response in the dispatch and MCP benchmarks.")
+    parser.add_argument("--tool-sleep", type=float, default=0.01, help="Sleep of each tool call in the dispatch and MCP benchmarks.")
+    parser.add_argument("--stream", action="store_true", help="Use stream_execute() in the load benchmark.")
+    parser.add_argument("--retrieval-rows", type=int, default=200000, help="Stored embeddings in the retrieval benchmark.")
+    parser.add_argument("--retrieval-dims", type=int, default=256, help="Embedding dimensions in the retrieval benchmark.")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 16, 64], help="IVF clusters scanned per query in the retrieval benchmark.")
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout.")
+    parser.add_argument("--baseline", help="A previous JSON result file to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Tolerated relative regression against the baseline.")
+    args = parser.parse_args(argv)
+
+    results: Dict[str, Any] = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": vars(args),
+        }
+    }
+
+    if "overhead" in args.suite:
+        results["executor_overhead"] = bench_executor_overhead(args.repeat)
+    if "cache" in args.suite:
+        results["response_cache"] = bench_response_cache(args.repeat)
+    if "tools" in args.suite:
+        results["tool_dispatch"] = bench_tool_dispatch(args.repeat, args.tool_calls, args.tool_sleep)
+    if "mcp" in args.suite:
+        results["mcp"] = bench_mcp(args.repeat, args.tool_calls, args.tool_sleep)
+    if "load" in args.suite:
+        results["load"] = bench_load(
+            concurrency_levels=args.concurrency,
+            turns_per_worker=args.turns,
+            model_latency=args.model_latency,
+            tokens_per_second=args.tokens_per_second,
+            weather_latency=args.weather_latency,
+            stream=args.stream,
+        )
+    if "retrieval" in args.suite:
+        results["retrieval"] = bench_retrieval(args.retrieval_rows, args.retrieval_dims, args.nprobe, queries=args.repeat)
+
+    from core.utils.http_client_provider import get_http_client_provider
+    results["http_pool"] = get_http_client_provider().stats()
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,3 @@
+from .response_cache import ResponseCache, MemoryCacheTier, SQLiteCacheTier, VolatileMessage
+from .semantic_cache import SemanticCache, embedding_to_vector
+from .tool_result_cache import ToolResultCache, tool_cache_stats
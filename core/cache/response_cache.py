@@ -0,0 +1,307 @@
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from loguru import logger
+from pydantic import BaseModel
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from core.models.responses import OpenAgentResponse, UsageResponse
+
+
+class VolatileMessage(dict):
+    """
+    A request message sent as is, but keyed in the response cache on `key` instead: a copy
+    without its volatile part (e.g. the clock), or None to leave the message out of the key.
+    """
+    def __init__(self, message: Dict[str, Any], key: Optional[Dict[str, Any]] = None):
+        super().__init__(message)
+        self.key = key
+
+
+class MemoryCacheTier:
+    """
+    An in-process LRU cache tier, every entry carries its own expiry time.
+
+    ## Methods:
+        `get()`: A method to get a payload, refreshing its LRU position.
+
+        `set()`: A method to store a payload, evicting the least recently used entry when full.
+    """
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    def set(self, key: str, payload: str, expires_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (expires_at, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheTier:
+    """
+    A persistent cache tier backed by a single SQLite table.
+
+    ## Methods:
+        `get()`: A method to get a payload that has not expired.
+
+        `set()`: A method to store or replace a payload.
+
+        `purge_expired()`: A method to delete the expired entries.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache ("
+                "key TEXT PRIMARY KEY, payload TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._connection.commit()
+
+    def get(self, key: str) -> Optional[tuple[float, str]]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT expires_at, payload FROM response_cache WHERE key = ? AND expires_at >= ?",
+                (key, time.time()),
+            ).fetchone()
+        return row
+
+    def set(self, key: str, payload: str, expires_at: float) -> None:
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO response_cache (key, payload, expires_at) VALUES (?, ?, ?)",
+                (key, payload, expires_at),
+            )
+            self._connection.commit()
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            cursor = self._connection.execute("DELETE FROM response_cache WHERE expires_at < ?", (time.time(),))
+            self._connection.commit()
+        return cursor.rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM response_cache")
+            self._connection.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class ResponseCache:
+    """
+    A deterministic cache of LLM responses keyed on a canonical hash of the request.
+
+    Lookups go to the in-process tier first and fall back to the optional SQLite tier,
+    promoting persistent hits into memory. Only deterministic requests are cached:
+    requests with a non-zero temperature bypass the cache unless `cache_nonzero_temperature` is set.
+
+    ## Methods:
+        `make_key()`: A method to build the canonical key of a request.
+
+        `is_cacheable()`: A method to check the bypass rules for a request.
+
+        `get()`: A method to get a cached response, rebuilt into an OpenAgentResponse.
+
+        `set()`: A method to store a response.
+
+        `stats()`: A method to get the hit, miss and bypass counters.
+    """
+    def __init__(self,
+                 max_entries: int = 1024,
+                 ttl: Optional[float] = 24 * 3600,
+                 sqlite_path: Optional[str] = None,
+                 cache_nonzero_temperature: bool = False):
+        self.ttl = ttl
+        self.cache_nonzero_temperature = cache_nonzero_temperature
+        self.memory = MemoryCacheTier(max_entries=max_entries)
+        self.persistent = SQLiteCacheTier(sqlite_path) if sqlite_path else None
+
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+
+    @staticmethod
+    def make_key(model: str,
+                 messages: List[Dict[str, Any]],
+                 tools: Optional[List[Dict[str, Any]]] = None,
+                 response_schema: Optional[type[BaseModel]] = None,
+                 temperature: Optional[float] = None,
+                 top_p: Optional[float] = None,
+                 max_tokens: Optional[int] = None) -> str:
+        """
+        Build the canonical key of a request. `VolatileMessage`s are keyed on their `key`,
+        so requests differing only in the clock share a key across runs and processes.
+
+        Args:
+            model (str): The model name.
+            messages (List[Dict[str, Any]]): The messages of the request.
+            tools (Optional[List[Dict[str, Any]]]): The tool schemas of the request.
+            response_schema (Optional[type[BaseModel]]): The response schema of the request.
+            temperature (Optional[float]): The sampling temperature.
+            top_p (Optional[float]): The top-p sampling parameter.
+            max_tokens (Optional[int]): The maximum number of tokens.
+
+        Returns:
+            str: The SHA-256 hex digest of the canonical request.
+        """
+        request = {
+            "model": model,
+            "messages": [
+                message.key if isinstance(message, VolatileMessage) else message
+                for message in messages
+                if not isinstance(message, VolatileMessage) or message.key is not None
+            ],
+            # Shared registry schemas carry the fingerprint of their serialized JSON
+            "tools": getattr(tools, "fingerprint", None) or (tools if isinstance(tools, list) else None),
+            "response_schema": response_schema.model_json_schema() if isinstance(response_schema, type) and issubclass(response_schema, BaseModel) else None,
+            "temperature": temperature,
+            "top_p": top_p,
+            "max_tokens": max_tokens,
+        }
+        canonical = json.dumps(request, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def is_cacheable(self, temperature: Optional[float], audio: bool = False) -> bool:
+        """
+        Check the bypass rules for a request.
+
+        Args:
+            temperature (Optional[float]): The sampling temperature of the request.
+            audio (bool): Whether the request asks for an audio response.
+
+        Returns:
+            bool: Whether the response of the request may be served from or stored in the cache.
+        """
+        if audio or (not self.cache_nonzero_temperature and temperature not in (0, 0.0)):
+            self.bypasses += 1
+            return False
+        return True
+
+    def _get_payload(self, key: str) -> Optional[str]:
+        payload = self.memory.get(key)
+        if payload is not None or self.persistent is None:
+            return payload
+
+        row = self.persistent.get(key)
+        if row is None:
+            return None
+        expires_at, payload = row
+        self.memory.set(key, payload, expires_at)
+        return payload
+
+    def get(self, key: str, response_schema: Optional[type[BaseModel]] = None) -> Optional[OpenAgentResponse]:
+        """
+        Get a cached response.
+
+        Args:
+            key (str): The key built by `make_key()`.
+            response_schema (Optional[type[BaseModel]]): The schema to rebuild a parsed content with.
+
+        Returns:
+            Optional[OpenAgentResponse]: The rebuilt response or None on a miss.
+        """
+        payload = self._get_payload(key)
+        if payload is None:
+            self.misses += 1
+            return None
+
+        try:
+            data = json.loads(payload)
+            content = data.get("content")
+            if content is not None and data.get("parsed") and response_schema is not None:
+                content = response_schema.model_validate(content)
+
+            response = OpenAgentResponse(
+                role=data["role"],
+                content=content,
+                tool_calls=data.get("tool_calls"),
+                refusal=data.get("refusal"),
+                usage=UsageResponse.model_validate(data["usage"]) if data.get("usage") else None,
+            )
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cached response: {e}")
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return response
+
+    def set(self, key: str, response: OpenAgentResponse, tool_calls: Optional[List[Dict[str, Any]]] = None) -> None:
+        """
+        Store a response.
+
+        Args:
+            key (str): The key built by `make_key()`.
+            response (OpenAgentResponse): The response to store.
+            tool_calls (Optional[List[Dict[str, Any]]]): The tool calls in their dictionary form.
+        """
+        content = response.content
+        parsed = isinstance(content, BaseModel)
+        payload = json.dumps(
+            {
+                "role": response.role,
+                "content": content.model_dump(mode="json") if parsed else content,
+                "parsed": parsed,
+                "tool_calls": tool_calls,
+                "refusal": response.refusal,
+                "usage": response.usage.model_dump() if response.usage else None,
+            },
+            ensure_ascii=False,
+            default=str,
+        )
+        expires_at = time.time() + self.ttl if self.ttl is not None else float("inf")
+
+        self.memory.set(key, payload, expires_at)
+        if self.persistent is not None:
+            self.persistent.set(key, payload, expires_at)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the cache counters.
+
+        Returns:
+            Dict[str, int]: The hits, misses, bypasses and the number of entries held in memory.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+            "memory_entries": len(self.memory),
+        }
+
+    def clear(self) -> None:
+        """
+        Clear both cache tiers.
+        """
+        self.memory.clear()
+        if self.persistent is not None:
+            self.persistent.clear()
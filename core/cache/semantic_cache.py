@@ -0,0 +1,238 @@
+from typing import Any, Dict, Iterable, List, Optional, Union
+from loguru import logger
+import base64
+import hashlib
+import threading
+import time
+import numpy as np
+from core.interfaces.base_embedding_model import BaseEmbeddingModel
+from core.models.io.embedding_unit import EmbeddingUnit
+from core.models.responses import OpenAgentResponse
+
+# Answers built on these tools go stale fast, other tools use `tool_ttl`
+DEFAULT_TOOL_TTLS: Dict[str, Optional[float]] = {"get_weather_tool": 600.0}
+
+
+def embedding_to_vector(embedding: Union[EmbeddingUnit, List[float], str]) -> np.ndarray:
+    """
+    Convert an embedding into a float32 vector.
+
+    Args:
+        embedding (Union[EmbeddingUnit, List[float], str]): An embedding unit, a list of floats or a base64 encoded float32 buffer.
+
+    Returns:
+        np.ndarray: The embedding as a float32 vector.
+    """
+    if isinstance(embedding, EmbeddingUnit):
+        embedding = embedding.embedding
+    if isinstance(embedding, str):
+        return np.frombuffer(base64.b64decode(embedding), dtype=np.float32)
+    return np.asarray(embedding, dtype=np.float32)
+
+
+class SemanticCache:
+    """
+    A semantic answer cache that serves a stored answer when a new query is close
+    enough to a previous one.
+
+    Queries are embedded with the embedding model and compared against an in-memory
+    matrix of normalized embeddings with a single matrix-vector product. Entries expire
+    according to the tools used to produce the answer (`tool_ttls`, `tool_ttl` for the
+    other tools), so answers built on time-sensitive tools go stale, and the least recently
+    used entry is evicted when full. Answers built without tools expire after `ttl`, None
+    meaning never.
+
+    Entries are stored under a namespace (e.g. the model and a hash of the system prompt,
+    see `namespace_of()`), and a lookup only matches the entries of its own namespace, so
+    executors sharing one cache with different prompts or models never get each other's answers.
+
+    ## Methods:
+        `namespace_of()`: A method to build the namespace of a model and a system prompt.
+
+        `lookup()`: A method to embed a query and get the closest stored answer above the threshold.
+
+        `store()`: A method to store an answer for an embedded query.
+
+        `stats()`: A method to get the hit, miss, expiry and eviction counters.
+    """
+    def __init__(self,
+                 embedding_model: BaseEmbeddingModel,
+                 threshold: float = 0.92,
+                 max_entries: int = 1000,
+                 ttl: Optional[float] = None,
+                 tool_ttls: Optional[Dict[str, Optional[float]]] = None,
+                 tool_ttl: Optional[float] = 3600.0):
+        self.embedding_model = embedding_model
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.tool_ttls = {**DEFAULT_TOOL_TTLS, **(tool_ttls or {})}
+        self.tool_ttl = tool_ttl
+
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None
+        self._queries: List[Optional[str]] = []
+        self._answers: List[Optional[OpenAgentResponse]] = []
+        self._expires_at = np.zeros(max_entries, dtype=np.float64)
+        self._last_used = np.zeros(max_entries, dtype=np.float64)
+        self._namespace_ids = np.full(max_entries, -1, dtype=np.int32)
+        self._namespaces: Dict[str, int] = {}
+        self._size = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def embed(self, query: str) -> np.ndarray:
+        """
+        Embed and normalize a query.
+
+        Args:
+            query (str): The query to embed.
+
+        Returns:
+            np.ndarray: The normalized query vector.
+        """
+        vector = embedding_to_vector(self.embedding_model.encode_query(query))
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    @staticmethod
+    def namespace_of(model: str, system_message: Optional[str]) -> str:
+        """
+        Build the namespace of the answers of a model under a system prompt.
+
+        Args:
+            model (str): The model name.
+            system_message (Optional[str]): The system prompt, without volatile parts such as the clock.
+
+        Returns:
+            str: The namespace.
+        """
+        digest = hashlib.sha256((system_message or "").encode("utf-8")).hexdigest()[:16]
+        return f"{model}:{digest}"
+
+    def _namespace_id(self, namespace: str) -> int:
+        namespace_id = self._namespaces.get(namespace)
+        if namespace_id is None:
+            namespace_id = self._namespaces[namespace] = len(self._namespaces)
+        return namespace_id
+
+    def lookup(self, query: str, namespace: str = "") -> tuple[Optional[OpenAgentResponse], np.ndarray]:
+        """
+        Get the stored answer of the closest previous query.
+
+        Args:
+            query (str): The incoming query.
+            namespace (str): The namespace of the answers to match.
+
+        Returns:
+            tuple[Optional[OpenAgentResponse], np.ndarray]: The answer (None on a miss) and the query vector, to be reused by `store()`.
+        """
+        vector = self.embed(query)
+
+        with self._lock:
+            namespace_id = self._namespaces.get(namespace)
+            if self._size == 0 or namespace_id is None:
+                self.misses += 1
+                return None, vector
+
+            now = time.time()
+            raw_similarities = self._matrix[:self._size] @ vector
+            stale = self._expires_at[:self._size] < now
+            similarities = np.where(stale | (self._namespace_ids[:self._size] != namespace_id), -np.inf, raw_similarities)
+
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                if np.any(stale & (self._namespace_ids[:self._size] == namespace_id) & (raw_similarities >= self.threshold)):
+                    self.expired += 1
+                self.misses += 1
+                return None, vector
+
+            self._last_used[best] = now
+            self.hits += 1
+            logger.debug(f"Semantic cache hit ({similarities[best]:.3f}): '{query}' ~ '{self._queries[best]}'")
+            return self._answers[best], vector
+
+    def _entry_ttl(self, tools_used: Iterable[str]) -> Optional[float]:
+        ttls = [self.ttl] + [self.tool_ttls.get(tool_name, self.tool_ttl) for tool_name in tools_used]
+        ttls = [ttl for ttl in ttls if ttl is not None]
+        return min(ttls) if ttls else None
+
+    def store(self,
+              vector: np.ndarray,
+              query: str,
+              answer: OpenAgentResponse,
+              tools_used: Optional[Iterable[str]] = None,
+              namespace: str = "") -> bool:
+        """
+        Store an answer for an embedded query.
+
+        Args:
+            vector (np.ndarray): The query vector returned by `lookup()`.
+            query (str): The query.
+            answer (OpenAgentResponse): The answer to serve for similar queries.
+            tools_used (Optional[Iterable[str]]): The names of the tools used to build the answer.
+            namespace (str): The namespace of the answer, the one given to `lookup()`.
+
+        Returns:
+            bool: Whether the answer was stored, answers of tools with a TTL of 0 are never stored.
+        """
+        ttl = self._entry_ttl(tools_used or [])
+        if ttl is not None and ttl <= 0:
+            return False
+
+        now = time.time()
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+
+            if self._size < self.max_entries:
+                slot = self._size
+                self._size += 1
+                self._queries.append(None)
+                self._answers.append(None)
+            else:
+                # Reuse an expired slot first, otherwise the least recently used one
+                stale = np.flatnonzero(self._expires_at < now)
+                slot = int(stale[0]) if stale.size else int(np.argmin(self._last_used))
+                self.evictions += 1
+
+            self._matrix[slot] = vector
+            self._queries[slot] = query
+            self._answers[slot] = answer
+            self._expires_at[slot] = now + ttl if ttl is not None else np.inf
+            self._last_used[slot] = now
+            self._namespace_ids[slot] = self._namespace_id(namespace)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the cache counters.
+
+        Returns:
+            Dict[str, Any]: The hits, misses, expired lookups, evictions, the number of entries and the hit ratio.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "entries": self._size,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+    def clear(self) -> None:
+        """
+        Remove every entry from the cache.
+        """
+        with self._lock:
+            self._queries = []
+            self._answers = []
+            self._expires_at[:] = 0
+            self._last_used[:] = 0
+            self._namespace_ids[:] = -1
+            self._namespaces.clear()
+            self._size = 0
@@ -0,0 +1,283 @@
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+from loguru import logger
+from pydantic import BaseModel
+import asyncio
+import inspect
+import json
+import threading
+import time
+from core.utils.tracing import get_tracer
+
+
+def _canonical(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    return repr(value)
+
+
+def is_none_result(result: Any) -> bool:
+    """
+    The default negative-result check: a tool returning None failed.
+    """
+    return result is None
+
+
+class _Flight:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class ToolResultCache:
+    """
+    A TTL and size-bounded LRU cache of tool results, keyed on the canonical arguments of
+    the call, with optional single-flight coalescing: concurrent identical calls wait for
+    the one in flight instead of executing the tool again.
+
+    Results are kept for `ttl` seconds, None meaning they never expire (as in the other caches)
+    and 0 that they are not cached, e.g. to only coalesce concurrent calls. Exceptions are never
+    cached. Negative results (None by default, see `is_negative`) are cached for `negative_ttl`
+    seconds only, 0 meaning they are retried on the next call.
+
+    ## Methods:
+        `make_key()`: A method to build the canonical key of a call.
+
+        `call()`: A method to run a synchronous tool through the cache.
+
+        `acall()`: A method to run an async tool through the cache.
+
+        `stats()`: A method to get the hit, miss and coalescing counters.
+
+        `clear()`: A method to empty the cache.
+    """
+    def __init__(self,
+                 func: Callable[..., Any],
+                 ttl: Optional[float] = 300.0,
+                 max_entries: int = 256,
+                 negative_ttl: float = 0.0,
+                 is_negative: Callable[[Any], bool] = is_none_result,
+                 single_flight: bool = True):
+        self.name = func.__name__
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.negative_ttl = negative_ttl
+        self.is_negative = is_negative
+        self.single_flight = single_flight
+
+        self._signature = inspect.signature(func)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._flights: Dict[str, _Flight] = {}
+        self._async_flights: Dict[tuple[int, str], asyncio.Future] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.negative = 0
+        self.evictions = 0
+
+    def make_key(self, args: tuple, kwargs: Dict[str, Any]) -> str:
+        """
+        Build the canonical key of a call: the arguments bound to the signature, defaults
+        applied, serialized with sorted keys, so equivalent calls share one entry.
+
+        Args:
+            args (tuple): The positional arguments.
+            kwargs (Dict[str, Any]): The keyword arguments.
+
+        Returns:
+            str: The key of the call.
+        """
+        bound = self._signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return json.dumps(bound.arguments, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=_canonical)
+
+    def _lookup(self, key: str) -> tuple[bool, Any]:
+        if self.ttl == 0 and not self.negative_ttl:
+            return False, None
+
+        hit, value = False, None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at >= time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    hit = True
+                else:
+                    del self._entries[key]
+            if not hit:
+                value = None
+                self.misses += 1
+        if hit:
+            get_tracer().current_span().set_attribute("tool_cache_hit", True)
+        return hit, value
+
+    def _store(self, key: str, result: Any) -> None:
+        negative = self.is_negative(result)
+        if negative:
+            self.negative += 1
+        ttl = self.negative_ttl if negative else self.ttl
+        if ttl is not None and ttl <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl if ttl is not None else float("inf"), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def call(self, func: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> Any:
+        """
+        Run a synchronous tool through the cache.
+
+        Args:
+            func (Callable[..., Any]): The tool function.
+            args (tuple): The positional arguments.
+            kwargs (Dict[str, Any]): The keyword arguments.
+
+        Returns:
+            Any: The cached or computed result.
+        """
+        key = self.make_key(args, kwargs)
+        hit, value = self._lookup(key)
+        if hit:
+            return value
+
+        if not self.single_flight:
+            result = func(*args, **kwargs)
+            self._store(key, result)
+            return result
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            logger.debug(f"Tool '{self.name}' call coalesced with the one in flight")
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = func(*args, **kwargs)
+            self._store(key, flight.result)
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.event.set()
+
+    async def acall(self, func: Callable[..., Awaitable[Any]], args: tuple, kwargs: Dict[str, Any]) -> Any:
+        """
+        Run an async tool through the cache, coalescing identical calls on the same event loop.
+
+        Args:
+            func (Callable[..., Awaitable[Any]]): The async tool function.
+            args (tuple): The positional arguments.
+            kwargs (Dict[str, Any]): The keyword arguments.
+
+        Returns:
+            Any: The cached or computed result.
+        """
+        key = self.make_key(args, kwargs)
+        hit, value = self._lookup(key)
+        if hit:
+            return value
+
+        if not self.single_flight:
+            result = await func(*args, **kwargs)
+            self._store(key, result)
+            return result
+
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        with self._lock:
+            future = self._async_flights.get(flight_key)
+            leader = future is None
+            if leader:
+                future = loop.create_future()
+                self._async_flights[flight_key] = future
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            # Shielded, so a cancelled waiter does not cancel the shared call
+            return await asyncio.shield(future)
+
+        try:
+            result = await func(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody waits for it
+            future.exception()
+            raise
+        else:
+            self._store(key, result)
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._async_flights.pop(flight_key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the cache counters.
+
+        Returns:
+            Dict[str, Any]: The hits, misses, coalesced calls, negative results, evictions, entries and hit ratio.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "negative": self.negative,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_TOOL_CACHES: Dict[str, ToolResultCache] = {}
+
+
+def register_tool_cache(cache: ToolResultCache) -> None:
+    """
+    Register a tool cache so that its counters are reported by `tool_cache_stats()`.
+
+    Args:
+        cache (ToolResultCache): The cache of a tool.
+    """
+    _TOOL_CACHES[cache.name] = cache
+
+
+def tool_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Get the counters of every tool cache of the process.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: The statistics per tool name.
+    """
+    return {name: cache.stats() for name, cache in _TOOL_CACHES.items()}
@@ -1 +1,6 @@
-from .tool_handler import ToolHandler
\ No newline at end of file
+from .tool_handler import ToolHandler
+from .context_window_manager import ContextWindowManager
+from .executor_session_manager import ExecutorSessionManager
+from .tool_registry import ToolRegistry, ToolSet, get_tool_registry
+from .tool_execution_engine import ToolExecutionEngine, get_tool_execution_engine
+from .mcp_session_pool import MCPSessionPool, get_mcp_session_pool
@@ -0,0 +1,212 @@
+from typing import Any, Callable, Dict, List, Literal, Optional
+from loguru import logger
+import json
+import tiktoken
+
+class ContextWindowManager:
+    """
+    A class to keep the request context of an executor under a token budget.
+
+    Token counts are computed once, when a message is added to the history, and the
+    window is assembled from those cached counts on every request. The policy is applied
+    on turn boundaries (a turn starts at a `user` message) so assistant tool calls are
+    never separated from their tool messages.
+
+    The manager holds no per-conversation state, so one instance can be shared by the
+    clones of an executor. Compacted tool messages are memoized in a dictionary owned by
+    the caller (one per executor, see `build_window()`).
+
+    ## Methods:
+        `count_tokens()`: A method to count the tokens of a single message.
+
+        `build_window()`: A method to select the messages to send under the token budget.
+
+    ## Policy:
+        `max_tokens`: The token budget of the request context.
+
+        `keep_last_turns`: The number of most recent turns whose tool outputs are never compacted.
+
+        `pin_system_message`: Whether the system message is always kept.
+
+        `tool_output_policy`: What to do with tool outputs of older turns (`keep`, `truncate` or `drop`).
+
+        `tool_output_max_tokens`: The token limit of a truncated tool output.
+    """
+    TRUNCATION_MARKER = "... [truncated]"
+    DROPPED_TOOL_OUTPUT = "[tool output omitted]"
+
+    def __init__(self,
+                 max_tokens: int = 16000,
+                 keep_last_turns: int = 4,
+                 pin_system_message: bool = True,
+                 tool_output_policy: Literal["keep", "truncate", "drop"] = "truncate",
+                 tool_output_max_tokens: int = 256,
+                 model: str = "gpt-4o-mini",
+                 token_counter: Optional[Callable[[str], int]] = None,
+                 message_overhead: int = 4):
+        if tool_output_policy not in ("keep", "truncate", "drop"):
+            raise ValueError(f"Unsupported tool output policy: {tool_output_policy}")
+
+        self.max_tokens = max_tokens
+        self.keep_last_turns = keep_last_turns
+        self.pin_system_message = pin_system_message
+        self.tool_output_policy = tool_output_policy
+        self.tool_output_max_tokens = tool_output_max_tokens
+        self.model = model
+        self.message_overhead = message_overhead
+
+        self._token_counter = token_counter
+        self._encoding = None
+
+    @property
+    def encoding(self) -> tiktoken.Encoding:
+        """
+        Get the tiktoken encoding of the model, loaded lazily on first use.
+
+        Returns:
+            tiktoken.Encoding: The encoding used to count tokens.
+        """
+        if self._encoding is None:
+            try:
+                self._encoding = tiktoken.encoding_for_model(self.model)
+            except KeyError:
+                self._encoding = tiktoken.get_encoding("cl100k_base")
+        return self._encoding
+
+    def _count_text(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._token_counter is not None:
+            return self._token_counter(text)
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def count_tokens(self, message: Dict[str, Any]) -> int:
+        """
+        Count the tokens of a single message, including its tool calls.
+
+        Args:
+            message (Dict[str, Any]): The message to count.
+
+        Returns:
+            int: The number of tokens of the message.
+        """
+        tokens = self.message_overhead + self._count_text(message.get("role", ""))
+
+        content = message.get("content")
+        if content is not None:
+            tokens += self._count_text(content if isinstance(content, str) else json.dumps(content, default=str))
+
+        for tool_call in message.get("tool_calls") or []:
+            function = tool_call.get("function", {}) if isinstance(tool_call, dict) else {}
+            tokens += self._count_text(function.get("name", "")) + self._count_text(function.get("arguments", ""))
+
+        return tokens
+
+    def _compact_tool_message(self,
+                              message: Dict[str, Any],
+                              tokens: int,
+                              memo: Optional[Dict[str, tuple[Dict[str, Any], Dict[str, Any], int]]]) -> tuple[Dict[str, Any], int]:
+        """
+        Apply the tool output policy to an old tool message.
+
+        Args:
+            message (Dict[str, Any]): The tool message.
+            tokens (int): The token count of the original message.
+            memo (Optional[Dict[str, tuple]]): The compacted messages of the conversation, keyed by tool call id.
+
+        Returns:
+            tuple[Dict[str, Any], int]: The message to send and its token count.
+        """
+        if self.tool_output_policy == "keep":
+            return message, tokens
+
+        # Wire dictionaries are built per request, the original is compared by value (its content is the same object)
+        key = message.get("tool_call_id") if memo is not None else None
+        cached = memo.get(key) if key is not None else None
+        if cached is not None and cached[0] == message:
+            return cached[1], cached[2]
+
+        if self.tool_output_policy == "drop":
+            compacted = {**message, "content": self.DROPPED_TOOL_OUTPUT}
+        else:
+            content = str(message.get("content") or "")
+            if self._token_counter is not None:
+                # Without the encoding, truncate proportionally to the custom token count
+                limit = max(1, len(content) * self.tool_output_max_tokens // max(1, self._token_counter(content)))
+                truncated = content[:limit]
+            else:
+                truncated = self.encoding.decode(self.encoding.encode(content, disallowed_special=())[:self.tool_output_max_tokens])
+            if len(truncated) >= len(content):
+                return message, tokens
+            compacted = {**message, "content": truncated + self.TRUNCATION_MARKER}
+
+        compacted_tokens = self.count_tokens(compacted)
+        if key is not None:
+            memo[key] = (message, compacted, compacted_tokens)
+        return compacted, compacted_tokens
+
+    def build_window(self,
+                     history: List[Dict[str, Any]],
+                     token_counts: List[int],
+                     memo: Optional[Dict[str, tuple[Dict[str, Any], Dict[str, Any], int]]] = None) -> List[Dict[str, Any]]:
+        """
+        Select the messages to send so that the request stays under the token budget.
+
+        Args:
+            history (List[Dict[str, Any]]): The full context history.
+            token_counts (List[int]): The cached token counts, aligned with `history`.
+            memo (Optional[Dict[str, tuple]]): The compacted tool messages of this conversation, reused and
+                updated across requests. It must not be shared between conversations. None to compact every time.
+
+        Returns:
+            List[Dict[str, Any]]: The messages to send to the model.
+        """
+        if not history:
+            return history
+
+        pinned: List[tuple[Dict[str, Any], int]] = []
+        start = 0
+        if self.pin_system_message and history[0].get("role") == "system":
+            pinned.append((history[0], token_counts[0]))
+            start = 1
+
+        # Group the remaining messages into turns, each turn starts at a user message
+        turns: List[List[tuple[Dict[str, Any], int]]] = []
+        for message, tokens in zip(history[start:], token_counts[start:]):
+            if message.get("role") == "user" or not turns:
+                turns.append([])
+            turns[-1].append((message, tokens))
+
+        protected = max(1, self.keep_last_turns)
+        old_turns, recent_turns = turns[:-protected], turns[-protected:]
+
+        # Compact the tool outputs of the older turns
+        old_turns = [
+            [
+                self._compact_tool_message(message, tokens, memo) if message.get("role") == "tool" else (message, tokens)
+                for message, tokens in turn
+            ]
+            for turn in old_turns
+        ]
+
+        window = old_turns + recent_turns
+        turn_tokens = [sum(tokens for _, tokens in turn) for turn in window]
+        total = sum(tokens for _, tokens in pinned) + sum(turn_tokens)
+
+        # Slide the window: drop the oldest turns first, but always keep the latest turn
+        dropped = 0
+        while total > self.max_tokens and dropped < len(window) - 1:
+            total -= turn_tokens[dropped]
+            dropped += 1
+
+        if total > self.max_tokens:
+            logger.warning(f"Context of {total} tokens exceeds the budget of {self.max_tokens} tokens even after trimming")
+
+        if memo is not None and len(memo) > len(history):
+            live_ids = {message.get("tool_call_id") for message in history}
+            for key in [key for key in memo if key not in live_ids]:
+                del memo[key]
+
+        return [message for message, _ in pinned] + [
+            message for turn in window[dropped:] for message, _ in turn
+        ]
@@ -0,0 +1,251 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Callable, Dict, Generator, Optional
+from loguru import logger
+import threading
+import time
+
+if TYPE_CHECKING:
+    # core.interfaces.base_executor imports from this package
+    from core.interfaces.base_executor import BaseExecutor
+
+
+class _Session:
+    __slots__ = ("executor", "lock", "created_at", "last_used", "turns", "active")
+
+    def __init__(self, executor: 'BaseExecutor'):
+        self.executor = executor
+        self.lock = threading.RLock()
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.turns = 0
+        # Number of turns (or the creation) in progress, a busy session is never evicted
+        self.active = 0
+
+
+class ExecutorSessionManager:
+    """
+    A class to give every user session its own executor, created lazily from a factory
+    (typically `template_executor.clone`, which shares the client, tools and caches).
+    The number of live sessions is bounded by LRU and idle-time eviction, and the
+    history of each session is capped in messages and tokens after every turn.
+    Sessions in the middle of a turn are never evicted, so the cap may be exceeded while
+    every session is busy. Safe to use from concurrent threads (e.g. Streamlit script runs).
+
+    ## Methods:
+        `get()`: A method to get the executor of a session, creating it if needed.
+
+        `session()`: A context manager holding the session lock for one turn and enforcing the caps afterwards.
+
+        `remove()`: A method to drop a session, calling `on_evict` on it.
+
+        `evict_idle()`: A method to drop the sessions idle for longer than `idle_timeout`.
+
+        `stats()`: A method to get the live session count and the creation/eviction counters.
+    """
+    def __init__(self,
+                 factory: Callable[[], 'BaseExecutor'],
+                 max_sessions: int = 100,
+                 idle_timeout: Optional[float] = 30 * 60,
+                 max_context_messages: Optional[int] = None,
+                 max_context_tokens: Optional[int] = None,
+                 on_create: Optional[Callable[[str, 'BaseExecutor'], Any]] = None,
+                 on_evict: Optional[Callable[[str, 'BaseExecutor'], Any]] = None):
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.max_context_messages = max_context_messages
+        self.max_context_tokens = max_context_tokens
+        self.on_create = on_create
+        self.on_evict = on_evict
+
+        self._lock = threading.Lock()
+        # Ordered from the least to the most recently used session
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+
+        self.created = 0
+        self.evicted_idle = 0
+        self.evicted_lru = 0
+        self.trimmed_messages = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def _evict(self, session_id: str, session: _Session, reason: str) -> None:
+        logger.debug(f"Evicting session '{session_id}' ({reason})")
+        if self.on_evict is not None:
+            try:
+                self.on_evict(session_id, session.executor)
+            except Exception as e:
+                logger.warning(f"on_evict failed for session '{session_id}': {e}")
+
+    def _pop_idle(self, now: float) -> list[tuple[str, _Session]]:
+        # Oldest first, so the scan stops at the first session that is still active
+        evicted = []
+        if self.idle_timeout is None:
+            return evicted
+        for session_id, session in list(self._sessions.items()):
+            if now - session.last_used <= self.idle_timeout:
+                break
+            if session.active:
+                continue
+            del self._sessions[session_id]
+            evicted.append((session_id, session))
+        self.evicted_idle += len(evicted)
+        return evicted
+
+    def _pop_lru(self) -> list[tuple[str, _Session]]:
+        # Least recently used first, skipping the sessions in the middle of a turn
+        evicted = []
+        for session_id, session in list(self._sessions.items()):
+            if len(self._sessions) < self.max_sessions:
+                break
+            if session.active:
+                continue
+            del self._sessions[session_id]
+            evicted.append((session_id, session))
+        if len(self._sessions) >= self.max_sessions:
+            logger.warning(f"All {len(self._sessions)} sessions are busy, exceeding max_sessions={self.max_sessions}")
+        self.evicted_lru += len(evicted)
+        return evicted
+
+    def _get_session(self, session_id: str, hold: bool = False) -> _Session:
+        now = time.monotonic()
+        evicted = []
+        with self._lock:
+            evicted.extend((idle_id, idle_session, "idle") for idle_id, idle_session in self._pop_idle(now))
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                session.last_used = now
+                session.active += hold
+
+        if session is None:
+            # The factory may be slow (e.g. cloning an executor), build the session outside the lock
+            candidate = _Session(self.factory())
+            with self._lock:
+                session = self._sessions.get(session_id)
+                if session is not None:
+                    # Created by a concurrent call in the meantime, the candidate is discarded
+                    self._sessions.move_to_end(session_id)
+                    session.last_used = now
+                    session.active += hold
+                else:
+                    evicted.extend((lru_id, lru_session, "lru") for lru_id, lru_session in self._pop_lru())
+                    session = candidate
+                    self._sessions[session_id] = session
+                    self.created += 1
+                    session.active += 1 + hold
+                    # Hold the new session until `on_create` ran, so no turn sees it half initialized
+                    session.lock.acquire()
+
+            if session is candidate:
+                try:
+                    if self.on_create is not None:
+                        self.on_create(session_id, session.executor)
+                except Exception as e:
+                    logger.warning(f"on_create failed for session '{session_id}': {e}")
+                finally:
+                    with self._lock:
+                        session.active -= 1
+                    session.lock.release()
+
+        # Callbacks may be slow (e.g. persisting the history), run them outside the lock
+        for evicted_id, evicted_session, reason in evicted:
+            self._evict(evicted_id, evicted_session, reason)
+        return session
+
+    def get(self, session_id: str) -> 'BaseExecutor':
+        """
+        Get the executor of a session, creating it on first use.
+
+        Args:
+            session_id (str): The session identifier.
+
+        Returns:
+            BaseExecutor: The executor of the session.
+        """
+        return self._get_session(session_id).executor
+
+    @contextmanager
+    def session(self, session_id: str) -> Generator['BaseExecutor', None, None]:
+        """
+        Hold the executor of a session for one turn. Concurrent turns of the same
+        session are serialized, and the history caps are enforced when the turn ends.
+
+        Args:
+            session_id (str): The session identifier.
+
+        Returns:
+            Generator[BaseExecutor, None, None]: The executor of the session.
+        """
+        session = self._get_session(session_id, hold=True)
+        try:
+            with session.lock:
+                try:
+                    yield session.executor
+                finally:
+                    session.turns += 1
+                    session.last_used = time.monotonic()
+                    dropped = session.executor.trim_context(
+                        max_messages=self.max_context_messages,
+                        max_tokens=self.max_context_tokens,
+                    )
+                    if dropped:
+                        self.trimmed_messages += dropped
+                        logger.debug(f"Trimmed {dropped} messages from session '{session_id}'")
+        finally:
+            with self._lock:
+                session.active -= 1
+
+    def remove(self, session_id: str) -> Optional['BaseExecutor']:
+        """
+        Drop a session, e.g. when the user logs out.
+
+        Args:
+            session_id (str): The session identifier.
+
+        Returns:
+            Optional[BaseExecutor]: The executor of the removed session, or None if it did not exist.
+        """
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            return None
+        self._evict(session_id, session, "removed")
+        return session.executor
+
+    def evict_idle(self) -> int:
+        """
+        Drop the sessions idle for longer than `idle_timeout`.
+
+        Returns:
+            int: The number of evicted sessions.
+        """
+        with self._lock:
+            evicted = self._pop_idle(time.monotonic())
+        for session_id, session in evicted:
+            self._evict(session_id, session, "idle")
+        return len(evicted)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the session statistics.
+
+        Returns:
+            Dict[str, Any]: The live sessions, their total messages, the limits and the creation, eviction and trimming counters.
+        """
+        with self._lock:
+            sessions = list(self._sessions.values())
+        return {
+            "sessions": len(sessions),
+            "max_sessions": self.max_sessions,
+            "messages": sum(len(session.executor.history) for session in sessions),
+            "created": self.created,
+            "evicted_idle": self.evicted_idle,
+            "evicted_lru": self.evicted_lru,
+            "trimmed_messages": self.trimmed_messages,
+        }
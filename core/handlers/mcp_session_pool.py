@@ -0,0 +1,546 @@
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from functools import partial
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+from loguru import logger
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+import mcp.types as mcp_types
+import anyio
+import asyncio
+import json
+import threading
+from core.handlers.tool_registry import SCHEMA_TYPES, SchemaType, ToolSchemas, ToolSet
+
+
+class MCPToolError(RuntimeError):
+    """
+    Raised when an MCP server reports a tool call as failed (`isError`).
+    """
+
+
+def _field(value: Any, name: str, legacy_name: str) -> Any:
+    # The MCP SDK renamed its camelCase fields (e.g. `inputSchema` -> `input_schema`) in 2.x
+    return getattr(value, name, getattr(value, legacy_name, None))
+
+
+def _is_connection_error(error: BaseException) -> bool:
+    if isinstance(error, (anyio.ClosedResourceError, anyio.BrokenResourceError, ConnectionError, EOFError)):
+        return True
+    return getattr(getattr(error, "error", None), "code", None) == mcp_types.CONNECTION_CLOSED
+
+
+def _result_text(result: Any) -> str:
+    texts = []
+    for block in getattr(result, "content", None) or []:
+        if getattr(block, "type", None) == "text":
+            texts.append(block.text)
+        else:
+            texts.append(f"[{getattr(block, 'type', 'unknown')} content]")
+    text = "\n".join(texts)
+
+    structured = _field(result, "structured_content", "structuredContent")
+    if not text and structured is not None:
+        text = json.dumps(structured, ensure_ascii=False)
+
+    if _field(result, "is_error", "isError"):
+        raise MCPToolError(text or "The MCP tool call failed")
+    return text
+
+
+class MCPToolRoute:
+    """
+    A tool of an MCP server as seen by the tool handler: its exposed name, the server and
+    tool name it routes to, and its schemas. Calling it runs the tool over the pooled session.
+
+    ## Methods:
+        `__call__()`: A method to call the tool synchronously.
+
+        `acall()`: A method to call the tool asynchronously.
+    """
+    __slots__ = ("pool", "server", "name", "remote_name", "schemas", "schemas_json")
+
+    # Execution settings read by the ToolExecutionEngine: calls wait on the pooled session from a worker thread
+    backend = "thread"
+    timeout = None
+    max_concurrency = None
+
+    def __init__(self, pool: 'MCPSessionPool', server: str, name: str, tool: Any):
+        self.pool = pool
+        self.server = server
+        self.name = name
+        self.remote_name = tool.name
+
+        parameters = _field(tool, "input_schema", "inputSchema") or {"type": "object", "properties": {}}
+        description = tool.description or ""
+        self.schemas: Dict[str, Dict[str, Any]] = {
+            "OpenAI": {"type": "function", "function": {"name": name, "description": description, "parameters": parameters}},
+            "OpenAIRealtime": {"type": "function", "name": name, "description": description, "parameters": parameters},
+        }
+        self.schemas_json = {
+            schema_type: json.dumps(schema, separators=(",", ":"), ensure_ascii=False)
+            for schema_type, schema in self.schemas.items()
+        }
+
+    def __call__(self, **kwargs) -> str:
+        return self.pool.call(self.server, self.remote_name, kwargs)
+
+    async def acall(self, **kwargs) -> str:
+        return await self.pool.acall(self.server, self.remote_name, kwargs)
+
+    def __repr__(self) -> str:
+        return f"MCPToolRoute({self.name!r} -> {self.server}:{self.remote_name})"
+
+
+class _MCPServer:
+    __slots__ = ("name", "params", "session", "loop", "tools", "ready", "closing", "task", "start_lock", "refresh_task")
+
+    def __init__(self, name: str, params: Optional[StdioServerParameters]):
+        self.name = name
+        self.params = params
+        self.session: Optional[ClientSession] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.tools: List[Any] = []
+        self.ready: Optional[asyncio.Future] = None
+        self.closing: Optional[asyncio.Event] = None
+        self.task: Optional[asyncio.Task] = None
+        self.start_lock: Optional[asyncio.Lock] = None
+        self.refresh_task: Optional[asyncio.Task] = None
+
+
+class MCPSessionPool:
+    """
+    A process-wide pool of persistent MCP client sessions.
+
+    Stdio servers are spawned once and their sessions live on a background event loop, so
+    synchronous and asynchronous executors share them and concurrent calls are multiplexed
+    over one session instead of spawning a server per call. The tool list of every server is
+    fetched once, converted to OpenAI tool schemas and cached, and refreshed when the server
+    sends a `tools/list_changed` notification. A session that dropped is reconnected on the next call.
+
+    ## Methods:
+        `connect()`: A method to spawn a stdio MCP server and open its session.
+
+        `aconnect()`: An asynchronous version of `connect()`.
+
+        `attach()`: A method to add a session opened by the caller, used on the caller's event loop.
+
+        `routes()`: A method to get the cached tool routes of some servers.
+
+        `tool_schemas()`: A method to get the tool schemas of a tool set and some MCP servers, cached.
+
+        `call()`: A method to call a tool of a server synchronously.
+
+        `acall()`: A method to call a tool of a server asynchronously.
+
+        `disconnect()`: A method to close the session of a server.
+
+        `stats()`: A method to get the servers, their tools and the call counters.
+
+        `close()`: A method to close every session and stop the background loop.
+    """
+    def __init__(self, connect_timeout: float = 30.0, call_timeout: Optional[float] = 120.0):
+        self.connect_timeout = connect_timeout
+        self.call_timeout = call_timeout
+
+        self._lock = threading.Lock()
+        self._servers: Dict[str, _MCPServer] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._routes: Dict[tuple, Dict[str, MCPToolRoute]] = {}
+        self._schemas: Dict[tuple, ToolSchemas] = {}
+        # Bumped under the lock on every tool list change, a map built across a change is not cached
+        self._version = 0
+
+        self.calls = 0
+        self.errors = 0
+        self.refreshes = 0
+        self.reconnects = 0
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    self._thread = threading.Thread(target=loop.run_forever, name="MCPSessionPool", daemon=True)
+                    self._thread.start()
+                    self._loop = loop
+        return self._loop
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._servers
+
+    def connect(self, name: str, params: StdioServerParameters, timeout: Optional[float] = None) -> List[str]:
+        """
+        Spawn a stdio MCP server and open its session, once per name and process.
+
+        Args:
+            name (str): The name of the server.
+            params (StdioServerParameters): The command starting the server.
+            timeout (Optional[float]): The maximum time to wait for the session and its tool list.
+
+        Returns:
+            List[str]: The names of the tools of the server.
+        """
+        future = asyncio.run_coroutine_threadsafe(self._connect(name, params), self._get_loop())
+        try:
+            return future.result(timeout=timeout or self.connect_timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise TimeoutError(f"MCP server '{name}' did not start within {timeout or self.connect_timeout}s")
+
+    async def aconnect(self, name: str, params: StdioServerParameters, timeout: Optional[float] = None) -> List[str]:
+        """
+        Spawn a stdio MCP server and open its session without blocking the event loop.
+
+        Args:
+            name (str): The name of the server.
+            params (StdioServerParameters): The command starting the server.
+            timeout (Optional[float]): The maximum time to wait for the session and its tool list.
+
+        Returns:
+            List[str]: The names of the tools of the server.
+        """
+        future = asyncio.run_coroutine_threadsafe(self._connect(name, params), self._get_loop())
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout=timeout or self.connect_timeout)
+
+    async def _connect(self, name: str, params: StdioServerParameters) -> List[str]:
+        with self._lock:
+            server = self._servers.get(name)
+            if server is None:
+                server = _MCPServer(name, params)
+                self._servers[name] = server
+        if server.params is not None and server.params != params:
+            raise ValueError(f"MCP server '{name}' is already connected with other parameters")
+        await self._ensure_session(server)
+        return [tool.name for tool in server.tools]
+
+    async def _ensure_session(self, server: _MCPServer) -> ClientSession:
+        # Runs on the background loop, the session task owns the stdio transport until closed
+        if server.start_lock is None:
+            server.start_lock = asyncio.Lock()
+        async with server.start_lock:
+            if server.session is not None:
+                return server.session
+            if server.params is None:
+                raise ConnectionError(f"The session of MCP server '{server.name}' is closed")
+            if server.task is not None:
+                self.reconnects += 1
+                logger.warning(f"Reconnecting to MCP server '{server.name}'")
+
+            loop = asyncio.get_running_loop()
+            server.loop = loop
+            server.ready = loop.create_future()
+            server.closing = asyncio.Event()
+            server.task = loop.create_task(self._serve(server))
+            await server.ready
+            return server.session
+
+    async def _serve(self, server: _MCPServer) -> None:
+        try:
+            async with stdio_client(server.params) as (read_stream, write_stream):
+                async with ClientSession(read_stream, write_stream, message_handler=partial(self._on_message, server)) as session:
+                    await session.initialize()
+                    server.session = session
+                    await self._list_tools(server)
+                    logger.debug(f"Connected to MCP server '{server.name}' with {len(server.tools)} tools")
+                    server.ready.set_result(None)
+                    await server.closing.wait()
+        except Exception as e:
+            if not server.ready.done():
+                server.ready.set_exception(e)
+            else:
+                logger.error(f"The session of MCP server '{server.name}' failed: {e}")
+        finally:
+            server.session = None
+            if not server.ready.done():
+                server.ready.set_exception(ConnectionError(f"MCP server '{server.name}' closed"))
+
+    async def _on_message(self, server: _MCPServer, message: Any) -> None:
+        notification = getattr(message, "root", message)
+        if isinstance(notification, mcp_types.ToolListChangedNotification):
+            # Listing sends a request, it cannot be awaited from the message handler itself
+            server.refresh_task = asyncio.get_running_loop().create_task(self._list_tools(server))
+        elif isinstance(notification, Exception):
+            logger.warning(f"MCP server '{server.name}' sent an error: {notification}")
+
+    async def _list_tools(self, server: _MCPServer) -> None:
+        tools = []
+        cursor = None
+        while True:
+            if cursor is None:
+                result = await server.session.list_tools()
+            else:
+                result = await server.session.list_tools(params=mcp_types.PaginatedRequestParams(cursor=cursor))
+            tools.extend(result.tools)
+            cursor = _field(result, "next_cursor", "nextCursor")
+            if not cursor:
+                break
+
+        with self._lock:
+            server.tools = tools
+            self._version += 1
+            self._routes.clear()
+            self._schemas.clear()
+            self.refreshes += 1
+        logger.debug(f"Listed {len(tools)} tools of MCP server '{server.name}'")
+
+    async def attach(self, name: str, session: ClientSession) -> List[str]:
+        """
+        Add an initialized session opened by the caller. Its calls are run on the caller's event loop.
+
+        Args:
+            name (str): The name of the server.
+            session (ClientSession): The initialized session.
+
+        Returns:
+            List[str]: The names of the tools of the server.
+        """
+        with self._lock:
+            server = self._servers.get(name)
+            if server is None:
+                server = _MCPServer(name, None)
+                self._servers[name] = server
+        if server.session is session:
+            return [tool.name for tool in server.tools]
+
+        server.session = session
+        server.loop = asyncio.get_running_loop()
+        await self._list_tools(server)
+        return [tool.name for tool in server.tools]
+
+    @staticmethod
+    def _selection_key(servers: Mapping[str, Optional[Sequence[str]]]) -> tuple:
+        return tuple((server, tuple(tools) if tools is not None else None) for server, tools in servers.items())
+
+    def routes(self, servers: Mapping[str, Optional[Sequence[str]]]) -> Dict[str, MCPToolRoute]:
+        """
+        Get the tool routes of some servers, keyed by the exposed tool name. A tool whose name is
+        already taken by another server is exposed as `<server>_<tool>`.
+
+        Args:
+            servers (Mapping[str, Optional[Sequence[str]]]): The server names and the tools to expose, None for all of them.
+
+        Returns:
+            Dict[str, MCPToolRoute]: The routes.
+        """
+        key = self._selection_key(servers)
+        with self._lock:
+            routes = self._routes.get(key)
+            if routes is not None:
+                return routes
+            version = self._version
+            server_tools = {name: self._servers[name].tools for name in servers if name in self._servers}
+
+        routes = {}
+        for server_name, tool_names in servers.items():
+            if server_name not in server_tools:
+                raise KeyError(f"MCP server '{server_name}' is not connected")
+            for tool in server_tools[server_name]:
+                if tool_names is not None and tool.name not in tool_names:
+                    continue
+                name = tool.name if tool.name not in routes else f"{server_name}_{tool.name}"
+                routes[name] = MCPToolRoute(self, server_name, name, tool)
+
+        with self._lock:
+            if self._version == version:
+                self._routes[key] = routes
+        return routes
+
+    def tool_schemas(self,
+                     tool_set: Optional[ToolSet],
+                     servers: Mapping[str, Optional[Sequence[str]]],
+                     schema_type: SchemaType = "OpenAI") -> ToolSchemas:
+        """
+        Get the schemas of local tools followed by the MCP tools of some servers, cached until a tool list changes.
+
+        Args:
+            tool_set (Optional[ToolSet]): The local tools.
+            servers (Mapping[str, Optional[Sequence[str]]]): The server names and the tools to expose, None for all of them.
+            schema_type (SchemaType): The schema format.
+
+        Returns:
+            ToolSchemas: The shared, read-only schemas.
+        """
+        if schema_type not in SCHEMA_TYPES:
+            raise ValueError(f"Unsupported schema type: {schema_type}")
+        # Keyed on the content of the tool set, an id could be reused by another one after collection
+        key = (tool_set.schemas.fingerprint if tool_set is not None else None, self._selection_key(servers), schema_type)
+        with self._lock:
+            schemas = self._schemas.get(key)
+            if schemas is not None:
+                return schemas
+            version = self._version
+
+        local = list(tool_set.schemas) if tool_set is not None else []
+        remote = [route for name, route in self.routes(servers).items() if tool_set is None or name not in tool_set]
+        schemas = ToolSchemas(
+            [*local, *(route.schemas[schema_type] for route in remote)],
+            [*(json.dumps(schema, separators=(",", ":"), ensure_ascii=False) for schema in local),
+             *(route.schemas_json[schema_type] for route in remote)],
+        )
+        with self._lock:
+            if self._version == version:
+                self._schemas[key] = schemas
+        return schemas
+
+    async def _call(self, server: _MCPServer, tool_name: str, arguments: Dict[str, Any]) -> str:
+        session = server.session
+        if session is None:
+            session = await self._ensure_session(server)
+        try:
+            result = await session.call_tool(tool_name, arguments)
+        except Exception as e:
+            if server.params is None or not _is_connection_error(e):
+                raise
+            # The server exited: close the dead session, respawn it and retry the call once
+            await self._drop_session(server, session)
+            session = await self._ensure_session(server)
+            result = await session.call_tool(tool_name, arguments)
+        return _result_text(result)
+
+    async def _drop_session(self, server: _MCPServer, session: ClientSession) -> None:
+        if server.start_lock is None:
+            server.start_lock = asyncio.Lock()
+        async with server.start_lock:
+            if server.session is not session:
+                # Another call already reconnected
+                return
+            server.session = None
+            server.closing.set()
+            task = server.task
+        await asyncio.wait([task], timeout=5)
+
+    def _get_server(self, name: str) -> _MCPServer:
+        server = self._servers.get(name)
+        if server is None:
+            raise KeyError(f"MCP server '{name}' is not connected")
+        return server
+
+    def call(self, server_name: str, tool_name: str, arguments: Dict[str, Any], timeout: Optional[float] = None) -> str:
+        """
+        Call a tool of a server and wait for its result, from a thread without a running event loop.
+
+        Args:
+            server_name (str): The name of the server.
+            tool_name (str): The name of the tool on the server.
+            arguments (Dict[str, Any]): The arguments of the call.
+            timeout (Optional[float]): The maximum time to wait, the call is cancelled past it.
+
+        Returns:
+            str: The text content of the result.
+        """
+        server = self._get_server(server_name)
+        self.calls += 1
+        future = asyncio.run_coroutine_threadsafe(self._call(server, tool_name, arguments), server.loop or self._get_loop())
+        timeout = timeout if timeout is not None else self.call_timeout
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            self.errors += 1
+            raise TimeoutError(f"MCP tool '{tool_name}' of server '{server_name}' timed out after {timeout}s")
+        except Exception:
+            self.errors += 1
+            raise
+
+    async def acall(self, server_name: str, tool_name: str, arguments: Dict[str, Any], timeout: Optional[float] = None) -> str:
+        """
+        Call a tool of a server asynchronously.
+
+        Args:
+            server_name (str): The name of the server.
+            tool_name (str): The name of the tool on the server.
+            arguments (Dict[str, Any]): The arguments of the call.
+            timeout (Optional[float]): The maximum time to wait, the call is cancelled past it.
+
+        Returns:
+            str: The text content of the result.
+        """
+        server = self._get_server(server_name)
+        self.calls += 1
+        call = self._call(server, tool_name, arguments)
+        loop = server.loop or self._get_loop()
+        if loop is not asyncio.get_running_loop():
+            call = asyncio.wrap_future(asyncio.run_coroutine_threadsafe(call, loop))
+        try:
+            return await asyncio.wait_for(call, timeout=timeout if timeout is not None else self.call_timeout)
+        except Exception:
+            self.errors += 1
+            raise
+
+    def disconnect(self, name: str) -> None:
+        """
+        Close the session of a server and forget its tools.
+
+        Args:
+            name (str): The name of the server.
+        """
+        with self._lock:
+            server = self._servers.pop(name, None)
+            self._version += 1
+            self._routes.clear()
+            self._schemas.clear()
+        if server is not None and server.closing is not None:
+            server.loop.call_soon_threadsafe(server.closing.set)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the pool statistics.
+
+        Returns:
+            Dict[str, Any]: The servers with their connection state and tool count, and the call, error, refresh and reconnect counters.
+        """
+        return {
+            "servers": {
+                name: {"connected": server.session is not None, "tools": len(server.tools)}
+                for name, server in list(self._servers.items())
+            },
+            "calls": self.calls,
+            "errors": self.errors,
+            "refreshes": self.refreshes,
+            "reconnects": self.reconnects,
+        }
+
+    def close(self, timeout: float = 5.0) -> None:
+        """
+        Close every session and stop the background loop.
+
+        Args:
+            timeout (float): The maximum time to wait for the servers to exit.
+        """
+        for name in list(self._servers):
+            self.disconnect(name)
+        loop, self._loop = self._loop, None
+        if loop is None:
+            return
+
+        async def _drain() -> None:
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            if tasks:
+                await asyncio.wait(tasks, timeout=timeout)
+
+        try:
+            asyncio.run_coroutine_threadsafe(_drain(), loop).result(timeout=timeout + 1)
+        except Exception as e:
+            logger.warning(f"MCP sessions did not close cleanly: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join(timeout)
+
+
+_MCP_SESSION_POOL: Optional[MCPSessionPool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_mcp_session_pool() -> MCPSessionPool:
+    """
+    Get the process-wide MCP session pool.
+
+    Returns:
+        MCPSessionPool: The pool.
+    """
+    global _MCP_SESSION_POOL
+    if _MCP_SESSION_POOL is None:
+        with _POOL_LOCK:
+            if _MCP_SESSION_POOL is None:
+                _MCP_SESSION_POOL = MCPSessionPool()
+    return _MCP_SESSION_POOL
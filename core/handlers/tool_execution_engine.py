@@ -0,0 +1,448 @@
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Literal, Optional
+from loguru import logger
+import asyncio
+import contextvars
+import inspect
+import threading
+import time
+
+ToolBackend = Literal["inline", "thread", "process"]
+TOOL_BACKENDS = ("inline", "thread", "process")
+
+# (result, wall time in seconds, error message for the model)
+ToolOutcome = tuple[Any, float, Optional[str]]
+
+
+class ToolBusyError(RuntimeError):
+    """
+    Raised when every concurrency slot of a tool stayed taken until the call deadline, or when
+    too many timed out calls of the tool are still running.
+    """
+
+
+def _call_tool(tool: Callable[..., Any], kwargs: Dict[str, Any]) -> Any:
+    # Module level so the process backend can pickle it; async tools get their own event loop
+    result = tool(**kwargs)
+    if inspect.iscoroutine(result):
+        result = asyncio.run(result)
+    return result
+
+
+class _PendingCall:
+    __slots__ = ("tool_name", "backend", "timeout", "started_at", "future", "outcome")
+
+    def __init__(self, tool_name: str, backend: str, timeout: Optional[float]):
+        self.tool_name = tool_name
+        self.backend = backend
+        self.timeout = timeout
+        self.started_at = time.perf_counter()
+        self.future: Optional[Future] = None
+        self.outcome: Optional[ToolOutcome] = None
+
+
+class ToolExecutionEngine:
+    """
+    A class to run tool calls in isolation from the turn that requested them.
+
+    Every call runs on a backend: `inline` (on the calling thread, for trusted and instant tools),
+    `thread` (a shared worker pool, the default) or `process` (a pool of worker processes per tool,
+    for CPU-bound or untrusted tools). Calls on the `thread` and `process` backends are bounded by
+    their timeout: a call that exceeds it is abandoned (threads) or killed (processes) and an error
+    outcome is returned for the model. A tool can also cap how many of its calls run at once, a
+    hung tool then only ever holds its own slots. Exceptions raised by tools are returned as error
+    outcomes as well, so a misbehaving tool never breaks or blocks the turn.
+
+    An abandoned thread keeps its worker until the tool returns, so a tool with
+    `max_abandoned_per_tool` calls still hung is reported busy without starting new calls, and
+    once the hung calls hold every worker of the shared pool the other calls run on a fresh thread.
+
+    ## Methods:
+        `start()`: A method to start a tool call, to be collected with `wait()`.
+
+        `wait()`: A method to wait for a started tool call under its timeout.
+
+        `run()`: A method to run a tool call and wait for its outcome.
+
+        `arun()`: An asynchronous version of `run()`, `async def` tools are awaited natively and cancelled on timeout.
+
+        `cancel_all()`: A method to cancel the queued calls and kill the running tool processes.
+
+        `stats()`: A method to get the call, timeout, error and busy counters.
+
+        `shutdown()`: A method to stop the worker pools.
+    """
+    def __init__(self,
+                 default_backend: ToolBackend = "thread",
+                 default_timeout: Optional[float] = 120.0,
+                 max_threads: int = 32,
+                 max_processes: int = 2,
+                 max_abandoned_per_tool: Optional[int] = 4):
+        if default_backend not in TOOL_BACKENDS:
+            raise ValueError(f"Unsupported tool backend: {default_backend}")
+        self.default_backend = default_backend
+        self.default_timeout = default_timeout
+        self.max_threads = max_threads
+        self.max_processes = max_processes
+        self.max_abandoned_per_tool = max_abandoned_per_tool
+
+        self._lock = threading.Lock()
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Dict[str, ProcessPoolExecutor] = {}
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        # Abandoned thread calls still running, per tool
+        self._hung: Dict[str, int] = {}
+        self._hung_total = 0
+
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.busy = 0
+        self.abandoned = 0
+        self.killed = 0
+
+    def backend_of(self, tool: Callable[..., Any], backend: Optional[ToolBackend] = None) -> ToolBackend:
+        """
+        Get the backend of a tool: the `@tool(backend=...)` value, else the given default, else the engine default.
+
+        Args:
+            tool (Callable[..., Any]): The tool.
+            backend (Optional[ToolBackend]): The backend requested by the caller.
+
+        Returns:
+            ToolBackend: The backend.
+        """
+        backend = getattr(tool, "backend", None) or backend or self.default_backend
+        if backend not in TOOL_BACKENDS:
+            raise ValueError(f"Unsupported tool backend: {backend}")
+        return backend
+
+    def _get_slots(self, tool_name: str, tool: Callable[..., Any]) -> Optional[threading.BoundedSemaphore]:
+        max_concurrency = getattr(tool, "max_concurrency", None)
+        if not max_concurrency:
+            return None
+        slots = self._slots.get(tool_name)
+        if slots is None:
+            with self._lock:
+                slots = self._slots.setdefault(tool_name, threading.BoundedSemaphore(max_concurrency))
+        return slots
+
+    def _get_thread_pool(self) -> ThreadPoolExecutor:
+        if self._threads is None:
+            with self._lock:
+                if self._threads is None:
+                    self._threads = ThreadPoolExecutor(max_workers=self.max_threads, thread_name_prefix="tool")
+        return self._threads
+
+    def _get_process_pool(self, tool_name: str, tool: Callable[..., Any]) -> ProcessPoolExecutor:
+        # One pool per tool, so killing a hung tool never takes down the calls of other tools
+        with self._lock:
+            pool = self._processes.get(tool_name)
+            if pool is None:
+                pool = ProcessPoolExecutor(max_workers=getattr(tool, "max_concurrency", None) or self.max_processes)
+                self._processes[tool_name] = pool
+        return pool
+
+    def _kill_process_pool(self, tool_name: str) -> None:
+        with self._lock:
+            pool = self._processes.pop(tool_name, None)
+        if pool is None:
+            return
+        # ProcessPoolExecutor cannot cancel a running task, terminate its workers instead
+        for process in list((getattr(pool, "_processes", None) or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            self.killed += 1
+        logger.warning(f"Killed the worker processes of tool '{tool_name}'")
+
+    def _run_with_slots(self,
+                        tool_name: str,
+                        slots: Optional[threading.BoundedSemaphore],
+                        deadline: Optional[float],
+                        tool: Callable[..., Any],
+                        kwargs: Dict[str, Any]) -> Any:
+        # The slot is taken on the worker and held until the tool really returns, even past its timeout
+        if slots is not None:
+            remaining = None if deadline is None else max(0.0, deadline - time.perf_counter())
+            if not slots.acquire(timeout=remaining):
+                raise ToolBusyError(f"Tool '{tool_name}' is busy, too many calls are already running")
+        try:
+            return _call_tool(tool, kwargs)
+        finally:
+            if slots is not None:
+                slots.release()
+
+    def _error_outcome(self, call: _PendingCall, error: BaseException) -> ToolOutcome:
+        if isinstance(error, ToolBusyError):
+            with self._lock:
+                self.busy += 1
+            message = str(error)
+        else:
+            with self._lock:
+                self.errors += 1
+            message = f"Tool '{call.tool_name}' failed: {type(error).__name__}: {error}"
+        logger.warning(message)
+        return None, time.perf_counter() - call.started_at, message
+
+    def _timeout_outcome(self, call: _PendingCall) -> ToolOutcome:
+        with self._lock:
+            self.timeouts += 1
+        logger.warning(f"Tool '{call.tool_name}' timed out after {call.timeout}s")
+        return None, call.timeout, f"Tool '{call.tool_name}' timed out after {call.timeout}s"
+
+    def start(self,
+              tool_name: str,
+              tool: Callable[..., Any],
+              kwargs: Dict[str, Any],
+              timeout: Optional[float] = None,
+              backend: Optional[ToolBackend] = None) -> _PendingCall:
+        """
+        Start a tool call. `inline` calls complete before this method returns.
+
+        Args:
+            tool_name (str): The name of the tool.
+            tool (Callable[..., Any]): The tool.
+            kwargs (Dict[str, Any]): The keyword arguments of the call.
+            timeout (Optional[float]): The timeout of the call in seconds, measured from now.
+            backend (Optional[ToolBackend]): The backend, unless the tool sets its own.
+
+        Returns:
+            _PendingCall: The started call, to be passed to `wait()`.
+        """
+        backend = self.backend_of(tool, backend)
+        call = _PendingCall(tool_name, backend, timeout)
+        with self._lock:
+            self.calls += 1
+
+        if backend == "inline":
+            try:
+                result = _call_tool(tool, kwargs)
+                call.outcome = (result, time.perf_counter() - call.started_at, None)
+            except Exception as e:
+                call.outcome = self._error_outcome(call, e)
+            return call
+
+        if backend == "process":
+            call.future = self._get_process_pool(tool_name, tool).submit(_call_tool, tool, kwargs)
+            return call
+
+        with self._lock:
+            hung = self._hung.get(tool_name, 0)
+            saturated = self._hung_total >= self.max_threads
+        if self.max_abandoned_per_tool is not None and hung >= self.max_abandoned_per_tool:
+            call.outcome = self._error_outcome(call, ToolBusyError(f"Tool '{tool_name}' is busy, {hung} timed out calls are still running"))
+            return call
+
+        deadline = None if timeout is None else call.started_at + timeout
+        # Run in a copy of the caller context, so the spans of the tool nest under the active one
+        args = (contextvars.copy_context().run, self._run_with_slots, tool_name, self._get_slots(tool_name, tool), deadline, tool, kwargs)
+        if saturated:
+            # Every shared worker is held by a hung call, queueing here would only time out
+            logger.warning(f"The tool thread pool is held by timed out calls, running '{tool_name}' on a new thread")
+            call.future = self._run_on_new_thread(*args)
+        else:
+            call.future = self._get_thread_pool().submit(*args)
+        return call
+
+    @staticmethod
+    def _run_on_new_thread(function: Callable[..., Any], *args: Any) -> Future:
+        future: Future = Future()
+
+        def run() -> None:
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(function(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, name="tool-overflow", daemon=True).start()
+        return future
+
+    def wait(self, call: _PendingCall) -> ToolOutcome:
+        """
+        Wait for a started tool call until its deadline.
+
+        Args:
+            call (_PendingCall): The call returned by `start()`.
+
+        Returns:
+            ToolOutcome: The result, the wall time in seconds and an error message if the call failed or timed out.
+        """
+        if call.outcome is not None:
+            return call.outcome
+
+        remaining = None if call.timeout is None else max(0.0, call.started_at + call.timeout - time.perf_counter())
+        try:
+            result = call.future.result(timeout=remaining)
+            call.outcome = (result, time.perf_counter() - call.started_at, None)
+        except FutureTimeoutError:
+            self._abandon(call)
+            call.outcome = self._timeout_outcome(call)
+        except Exception as e:
+            call.outcome = self._error_outcome(call, e)
+        return call.outcome
+
+    def _abandon(self, call: _PendingCall) -> None:
+        if call.future.cancel():
+            return
+        if call.backend == "process":
+            self._kill_process_pool(call.tool_name)
+            return
+        # A thread cannot be killed, it keeps its worker (and its slot) until the tool returns
+        with self._lock:
+            self.abandoned += 1
+            self._hung[call.tool_name] = self._hung.get(call.tool_name, 0) + 1
+            self._hung_total += 1
+        call.future.add_done_callback(lambda future: self._release_hung(call.tool_name))
+
+    def _release_hung(self, tool_name: str) -> None:
+        with self._lock:
+            self._hung_total -= 1
+            if self._hung[tool_name] <= 1:
+                del self._hung[tool_name]
+            else:
+                self._hung[tool_name] -= 1
+
+    def run(self,
+            tool_name: str,
+            tool: Callable[..., Any],
+            kwargs: Dict[str, Any],
+            timeout: Optional[float] = None,
+            backend: Optional[ToolBackend] = None) -> ToolOutcome:
+        """
+        Run a tool call and wait for its outcome.
+
+        Args:
+            tool_name (str): The name of the tool.
+            tool (Callable[..., Any]): The tool.
+            kwargs (Dict[str, Any]): The keyword arguments of the call.
+            timeout (Optional[float]): The timeout of the call in seconds.
+            backend (Optional[ToolBackend]): The backend, unless the tool sets its own.
+
+        Returns:
+            ToolOutcome: The result, the wall time in seconds and an error message if the call failed or timed out.
+        """
+        return self.wait(self.start(tool_name, tool, kwargs, timeout=timeout, backend=backend))
+
+    async def arun(self,
+                   tool_name: str,
+                   tool: Callable[..., Any],
+                   kwargs: Dict[str, Any],
+                   timeout: Optional[float] = None,
+                   backend: Optional[ToolBackend] = None) -> ToolOutcome:
+        """
+        Run a tool call asynchronously. `async def` tools are awaited natively (and cancelled on
+        timeout) unless they run on the `process` backend, synchronous tools never block the event loop.
+
+        Args:
+            tool_name (str): The name of the tool.
+            tool (Callable[..., Any]): The tool.
+            kwargs (Dict[str, Any]): The keyword arguments of the call.
+            timeout (Optional[float]): The timeout of the call in seconds.
+            backend (Optional[ToolBackend]): The backend, unless the tool sets its own.
+
+        Returns:
+            ToolOutcome: The result, the wall time in seconds and an error message if the call failed or timed out.
+        """
+        backend = self.backend_of(tool, backend)
+        if backend == "process" or not inspect.iscoroutinefunction(tool):
+            if backend == "inline":
+                return self.run(tool_name, tool, kwargs, timeout=timeout, backend=backend)
+            call = self.start(tool_name, tool, kwargs, timeout=timeout, backend=backend)
+            if call.outcome is not None:
+                return call.outcome
+            awaitable = asyncio.wrap_future(call.future)
+        else:
+            call = _PendingCall(tool_name, backend, timeout)
+            with self._lock:
+                self.calls += 1
+            awaitable = self._await_with_slots(call, tool, kwargs)
+
+        try:
+            result = await asyncio.wait_for(awaitable, timeout=timeout)
+            return result, time.perf_counter() - call.started_at, None
+        except asyncio.TimeoutError:
+            if call.future is not None:
+                self._abandon(call)
+            return self._timeout_outcome(call)
+        except Exception as e:
+            return self._error_outcome(call, e)
+
+    async def _await_with_slots(self, call: _PendingCall, tool: Callable[..., Any], kwargs: Dict[str, Any]) -> Any:
+        slots = self._get_slots(call.tool_name, tool)
+        if slots is not None:
+            # Polled rather than acquired on a thread, so a cancelled call can never leak a slot
+            while not slots.acquire(blocking=False):
+                await asyncio.sleep(0.005)
+        try:
+            return await tool(**kwargs)
+        finally:
+            if slots is not None:
+                slots.release()
+
+    def cancel_all(self) -> None:
+        """
+        Cancel the queued calls and kill the running tool processes. Running tool threads cannot be stopped.
+        """
+        with self._lock:
+            threads, self._threads = self._threads, None
+            tool_names = list(self._processes)
+        if threads is not None:
+            threads.shutdown(wait=False, cancel_futures=True)
+        for tool_name in tool_names:
+            self._kill_process_pool(tool_name)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the engine counters.
+
+        Returns:
+            Dict[str, Any]: The calls, failed, timed out and busy calls, abandoned threads (in total and still running) and killed process pools.
+        """
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "errors": self.errors,
+                "timeouts": self.timeouts,
+                "busy": self.busy,
+                "abandoned_threads": self.abandoned,
+                "hung_threads": self._hung_total,
+                "killed_process_pools": self.killed,
+                "process_pools": len(self._processes),
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop the worker pools.
+
+        Args:
+            wait (bool): Whether to wait for the running calls.
+        """
+        with self._lock:
+            threads, self._threads = self._threads, None
+            pools, self._processes = list(self._processes.values()), {}
+        if threads is not None:
+            threads.shutdown(wait=wait)
+        for pool in pools:
+            pool.shutdown(wait=wait)
+
+
+_TOOL_EXECUTION_ENGINE: Optional[ToolExecutionEngine] = None
+_ENGINE_LOCK = threading.Lock()
+
+
+def get_tool_execution_engine() -> ToolExecutionEngine:
+    """
+    Get the process-wide tool execution engine, created with the default settings on first use.
+
+    Returns:
+        ToolExecutionEngine: The engine.
+    """
+    global _TOOL_EXECUTION_ENGINE
+    if _TOOL_EXECUTION_ENGINE is None:
+        with _ENGINE_LOCK:
+            if _TOOL_EXECUTION_ENGINE is None:
+                _TOOL_EXECUTION_ENGINE = ToolExecutionEngine()
+    return _TOOL_EXECUTION_ENGINE
@@ -1,11 +1,17 @@
-from typing import List, Optional, Callable, Any, Literal
+from typing import List, Optional, Callable, Any, Literal, Union
 from loguru import logger
 from openai._types import NOT_GIVEN
+from pydantic import ValidationError
 import json
-from core.models.responses import OpenAgentResponse
+import asyncio
+from core.models.responses import OpenAgentResponse, OpenAgentStreamingResponse
 from core.models.tool_responses import ToolResponse, ToolCallResult
 from core.interfaces.base_tool_handler import BaseToolHandler
-from mcp import ClientSession 
+from core.utils.tracing import get_tracer
+from core.handlers.tool_registry import ToolSet, get_tool_registry
+from core.handlers.tool_execution_engine import ToolBackend, ToolExecutionEngine, get_tool_execution_engine
+from core.handlers.mcp_session_pool import MCPSessionPool, MCPToolRoute, get_mcp_session_pool
+from mcp import ClientSession, StdioServerParameters
 
 class ToolHandler(BaseToolHandler):
     """
@@ -18,17 +24,39 @@ class ToolHandler(BaseToolHandler):
 
         `handle_tool_request()`: A method to handle the tool request and get the final response with tool results.
 
+        `async_handle_tool_request()`: An asynchronous version of `handle_tool_request()` that awaits `async def` tools natively.
+
     ## Properties:
         `tools`: A property to get and set the tools.
 
         `tools_map`: A property to get the tools map.
+
+        `tool_set`: The shared `ToolSet` view of the registry holding the tools.
+
+    Tool calls run on a `ToolExecutionEngine` (`tool_backend`: "inline", "thread" or "process",
+    overridable per tool with `@tool(backend=...)`), under their timeout (`@tool(timeout=...)`,
+    `tool_timeout`, else the engine default) and per-tool concurrency limit. A call that fails,
+    times out or finds its tool busy is reported back to the model as an error tool message.
+    When `concurrent_tool_calls` is enabled, the tool calls of one response are started together
+    and the turn only waits for the slowest call.
+
+    MCP tools (`mcp_sessions`, optionally filtered by `mcp_tools`) are listed with the local tools
+    and routed by name to persistent sessions of the `MCPSessionPool`.
+
+    Tool arguments are parsed and validated in one pass by the validator compiled by `@tool`;
+    invalid JSON, wrong types (arguments are validated strictly, without coercion) or unknown tools are also reported to the model as error tool messages.
     """
     def __init__(self,
                  tools: Optional[List[Callable[..., Any]]] = NOT_GIVEN,
-                 mcp_sessions: Optional[dict[str, ClientSession]] = None,
-                 mcp_tools: Optional[dict[str, list[str]]] = None,
+                 mcp_sessions: Optional[dict[str, Union[ClientSession, StdioServerParameters]]] = None,
+                 mcp_tools: Optional[dict[str, Optional[list[str]]]] = None,
                  llm_provider: Literal["openai"] = None,
                  schema_type: Literal["OpenAI", "OpenAIRealtime"] = None,
+                 concurrent_tool_calls: bool = False,
+                 max_workers: Optional[int] = None,
+                 tool_timeout: Optional[float] = None,
+                 tool_backend: Optional[ToolBackend] = None,
+                 execution_engine: Optional[ToolExecutionEngine] = None,
                  *args,
                  **kwargs):
         
@@ -36,69 +64,84 @@ class ToolHandler(BaseToolHandler):
         self.tools_map = NOT_GIVEN
         self.llm_provider = llm_provider
 
+        # Tools run on the execution engine (process-wide by default), never inline on the turn
+        self.concurrent_tool_calls = concurrent_tool_calls
+        self.tool_timeout = tool_timeout
+        self.tool_backend = tool_backend
+        if execution_engine is None:
+            execution_engine = get_tool_execution_engine() if max_workers is None else ToolExecutionEngine(max_threads=max_workers)
+        self.execution_engine = execution_engine
+
         if llm_provider is None:
             raise ValueError("llm_provider must be provided")
 
+        self.schema_type = schema_type
+        self.tool_set: Optional[ToolSet] = None
+
         if tools is not NOT_GIVEN:
-            self._tools = []
-            for tool in tools:
-                if not hasattr(tool, "schema"):
-                    raise ValueError(f"Function '{tool.__name__}' does not have a `schema` attribute. Please wrap the function with `@tool` decorator from `openagentkit.core.utils.tool_wrapper`.")
-                self._tools.append(tool.schema)
-
-            match schema_type:
-                case "OpenAI":
-                    self.tools_map = {
-                        tool.schema["function"]["name"]: tool for tool in tools
-                    }
-                case "OpenAIRealtime":
-                    self.tools_map = {
-                        tool.schema["name"]: tool for tool in tools
-                    }
-                case None:
-                    raise ValueError("schema_type must be provided")
-                case _:
-                    raise ValueError(f"Unsupported schema type: {schema_type}")
+            if schema_type is None:
+                raise ValueError("schema_type must be provided")
+            # Schemas are built once per process by the registry, the handler only holds a shared view
+            self._bind_tool_set(get_tool_registry().view(tools, schema_type=schema_type))
 
+        # MCP servers: stdio servers are spawned once by the process-wide pool, open sessions must be attached to it
         self.sessions_map = mcp_sessions
         self.mcp_tools_map = mcp_tools
+        self.mcp_pool: MCPSessionPool = get_mcp_session_pool()
+        self.mcp_servers: dict[str, Optional[list[str]]] = {}
+        for server_name, session in (mcp_sessions or {}).items():
+            if isinstance(session, StdioServerParameters):
+                self.mcp_pool.connect(server_name, session)
+            elif server_name not in self.mcp_pool:
+                raise ValueError(f"MCP session '{server_name}' must be attached first with `await get_mcp_session_pool().attach(name, session)`")
+            self.mcp_servers[server_name] = (mcp_tools or {}).get(server_name)
+        for server_name, tool_names in (mcp_tools or {}).items():
+            if server_name not in self.mcp_servers:
+                if server_name not in self.mcp_pool:
+                    raise ValueError(f"MCP server '{server_name}' is not connected")
+                self.mcp_servers[server_name] = tool_names
 
-
-        
     @property
     def tools(self):
+        if self.mcp_servers:
+            # Cached by the pool until a server reports that its tool list changed
+            return self.mcp_pool.tool_schemas(self.tool_set, self.mcp_servers, schema_type=self.schema_type or "OpenAI")
         return self._tools
     
     @tools.setter
     def tools(self, tools):
-        self._tools = [tool.schema for tool in tools] if tools else NOT_GIVEN
-        self.tools_map = {
-            tool.schema["function"]["name"]: tool for tool in tools
-        } if tools is not NOT_GIVEN else NOT_GIVEN
-        return f"Binded {len(self._tools)} tools."
+        if tools is NOT_GIVEN or not tools:
+            self.tool_set = None
+            self._tools = NOT_GIVEN
+            self.tools_map = NOT_GIVEN
+            return
+        self._bind_tool_set(get_tool_registry().view(tools, schema_type=self.schema_type or "OpenAI"))
+
+    def _bind_tool_set(self, tool_set: ToolSet) -> None:
+        self.tool_set = tool_set
+        self._tools = tool_set.schemas
+        self.tools_map = tool_set.tools_map
     
         
-    def _handle_tool_call(self, tool_name: str, **kwargs) -> Any:
+    def _get_tool(self, tool_name: str) -> Optional[Callable[..., Any]]:
         """
-        Handle the tool call and return the tool result.
+        Get the tool callable by its name.
 
         Args:
-            tool_name (str): The name of the tool to handle.
-            **kwargs: The keyword arguments to pass to the tool
-        
+            tool_name (str): The name of the tool.
+
         Returns:
-            Any: The result of the tool call.
-        """
-        if self.tools_map is not NOT_GIVEN:
-            tool = self.tools_map.get(tool_name, None)
-            if not tool:
-                return None
-            elif callable(tool):
-                return tool(**kwargs)
-        else:
+            Optional[Callable[..., Any]]: The tool (an `MCPToolRoute` for MCP tools) or None if it is not registered.
+        """
+        tool = self.tools_map.get(tool_name, None) if self.tools_map is not NOT_GIVEN else None
+        if tool is None and self.mcp_servers:
+            tool = self.mcp_pool.routes(self.mcp_servers).get(tool_name)
+        if tool is None and self.tools_map is NOT_GIVEN and not self.mcp_servers:
             logger.error("No tools provided")
+        if not tool or not callable(tool):
             return None
-    
+        return tool
+
     def parse_tool_args(self, response: dict) -> list[dict[str, Any]]:
         """
         Parse the tool calls from the response.
@@ -112,7 +155,7 @@ class ToolHandler(BaseToolHandler):
         tool_calls = None
         if hasattr(response, "tool_calls") and response.tool_calls is not None:
             tool_calls = [
-                {
+                tc if isinstance(tc, dict) else {
                     "id": tc.id,
                     "type": tc.type,
                     "function": {
@@ -126,48 +169,196 @@ class ToolHandler(BaseToolHandler):
         return tool_calls
     
     
-    def handle_tool_request(self, response: OpenAgentResponse) -> ToolResponse:
+    def _get_tool_timeout(self, tool_name: str) -> Optional[float]:
         """
-        Handle tool requests and get the final response with tool results
+        Get the timeout of a tool, preferring the `@tool(timeout=...)` value over the handler
+        default, then the execution engine default.
 
         Args:
-            response (OpenAgentResponse or OpenAgentStreamingResponse): The response from the OpenAI model.
+            tool_name (str): The name of the tool.
+
+        Returns:
+            Optional[float]: The timeout in seconds or None if the tool may run unbounded.
+        """
+        tool = self._get_tool(tool_name)
+        timeout = getattr(tool, "timeout", None) if tool is not None else None
+        if timeout is None:
+            timeout = self.tool_timeout
+        return timeout if timeout is not None else self.execution_engine.default_timeout
+
+    def _timed_tool_call(self, tool_name: str, **kwargs) -> tuple[Any, float, Optional[str]]:
+        """
+        Run the tool call on the execution engine under its timeout.
+
+        Args:
+            tool_name (str): The name of the tool to handle.
+            **kwargs: The keyword arguments to pass to the tool
+
+        Returns:
+            tuple[Any, float, Optional[str]]: The result, the wall time in seconds and an error message if the call failed or timed out.
+        """
+        tool = self._get_tool(tool_name)
+        timeout = self._get_tool_timeout(tool_name)
+        with get_tracer().span("tool.call", tool_name=tool_name, timeout=timeout) as span:
+            outcome = self.execution_engine.run(tool_name, tool, kwargs, timeout=timeout, backend=self.tool_backend)
+            if outcome[2] is not None:
+                span.set_attribute("error", outcome[2])
+            return outcome
+
+    async def _async_timed_tool_call(self, tool_name: str, **kwargs) -> tuple[Any, float, Optional[str]]:
+        """
+        Run the tool call asynchronously on the execution engine under its timeout.
+        `async def` tools are awaited natively, synchronous tools never block the event loop.
+
+        Args:
+            tool_name (str): The name of the tool to handle.
+            **kwargs: The keyword arguments to pass to the tool
+
+        Returns:
+            tuple[Any, float, Optional[str]]: The result, the wall time in seconds and an error message if the call failed or timed out.
+        """
+        tool = self._get_tool(tool_name)
+        backend = self.tool_backend
+        if isinstance(tool, MCPToolRoute):
+            # MCP calls are awaited over the pooled session
+            tool, backend = tool.acall, "thread"
+        timeout = self._get_tool_timeout(tool_name)
+        with get_tracer().span("tool.call", tool_name=tool_name, timeout=timeout) as span:
+            outcome = await self.execution_engine.arun(tool_name, tool, kwargs, timeout=timeout, backend=backend)
+            if outcome[2] is not None:
+                span.set_attribute("error", outcome[2])
+            return outcome
+
+    @staticmethod
+    async def _invalid_call_outcome(error: str) -> tuple[Any, float, Optional[str]]:
+        return None, 0.0, error
+
+    def _dispatch_concurrently(self, prepared_calls: list[tuple[str, str, dict[str, Any], Optional[str], Optional[str]]]) -> list[tuple[Any, float, Optional[str]]]:
+        """
+        Start the tool calls together on the execution engine and collect their outcomes in call order.
+
+        Args:
+            prepared_calls (list[tuple[str, str, dict[str, Any], Optional[str], Optional[str]]]): The prepared tool calls.
+
+        Returns:
+            list[tuple[Any, float, Optional[str]]]: The result, wall time and error message of every call.
+        """
+        # Every call is started before the first one is awaited, so each deadline runs from submission
+        started = [
+            self.execution_engine.start(
+                tool_name, self._get_tool(tool_name), tool_args,
+                timeout=self._get_tool_timeout(tool_name), backend=self.tool_backend,
+            ) if error is None else None
+            for _, tool_name, tool_args, _, error in prepared_calls
+        ]
+
+        tracer = get_tracer()
+        outcomes = []
+        for (_, tool_name, _, _, error), call in zip(prepared_calls, started):
+            if call is None:
+                outcomes.append((None, 0.0, error))
+                continue
+            outcome = self.execution_engine.wait(call)
+            # The calls overlap, so their spans are recorded once collected with the measured wall time
+            with tracer.span("tool.call", tool_name=tool_name, timeout=call.timeout, concurrent=True, elapsed_time=outcome[1]) as span:
+                if outcome[2] is not None:
+                    span.set_attribute("error", outcome[2])
+            outcomes.append(outcome)
+        return outcomes
+
+    @staticmethod
+    def _format_validation_error(tool_name: str, error: ValidationError) -> str:
+        """
+        Format the validation errors of tool arguments for the model, one `location: message (type)` per error.
+        """
+        details = "; ".join(
+            f"{'.'.join(str(part) for part in detail['loc']) or 'arguments'}: {detail['msg']} ({detail['type']})"
+            for detail in error.errors(include_url=False)
+        )
+        return f"Invalid arguments for tool '{tool_name}': {details}"
+
+    def _decode_arguments(self, tool_name: str, arguments: Union[str, dict, None]) -> tuple[dict[str, Any], Optional[str], Optional[str]]:
+        """
+        Decode and validate the arguments of a tool call with the validator compiled by `@tool`.
+        Invalid arguments never raise, they are returned as an error for the model.
+
+        Args:
+            tool_name (str): The name of the tool.
+            arguments (Union[str, dict, None]): The JSON arguments sent by the model.
+
+        Returns:
+            tuple[dict[str, Any], Optional[str], Optional[str]]: The keyword arguments, the notification and an error message.
+        """
+        tool = self._get_tool(tool_name)
+        if tool is None:
+            return {}, None, f"Unknown tool '{tool_name}'"
+
+        decode_arguments = getattr(tool, "decode_arguments", None)
+        try:
+            if decode_arguments is not None:
+                tool_args, notification = decode_arguments(arguments)
+                return tool_args, notification, None
+
+            # Tools with a hand-written schema are only JSON decoded
+            tool_args = arguments if isinstance(arguments, dict) else json.loads(arguments or "{}")
+            if not isinstance(tool_args, dict):
+                return {}, None, f"Invalid arguments for tool '{tool_name}': expected a JSON object"
+            notification = tool_args.pop("_notification", None)
+            return tool_args, notification, None
+        except ValidationError as e:
+            return {}, None, self._format_validation_error(tool_name, e)
+        except json.JSONDecodeError as e:
+            return {}, None, f"Invalid arguments for tool '{tool_name}': {e}"
+
+    def _prepare_tool_calls(self, tool_calls: list[dict[str, Any]]) -> list[tuple[str, str, dict[str, Any], Optional[str], Optional[str]]]:
+        """
+        Decode the tool calls into their id, name, arguments, notification and decoding error.
+
+        Args:
+            tool_calls (list[dict[str, Any]]): The tool calls from the response.
+
+        Returns:
+            list[tuple[str, str, dict[str, Any], Optional[str], Optional[str]]]: The prepared tool calls.
+        """
+        prepared_calls = []
+        for tool_call in tool_calls:
+            if isinstance(tool_call, dict):
+                tool_call_id = tool_call.get("id")
+                function = tool_call.get("function") or {}
+                tool_name, arguments = function.get("name"), function.get("arguments")
+            else:
+                tool_call_id = tool_call.id
+                tool_name, arguments = tool_call.function.name, tool_call.function.arguments
+
+            tool_args, notification, error = self._decode_arguments(tool_name, arguments)
+            if error is not None:
+                logger.warning(error)
+            prepared_calls.append((tool_call_id, tool_name, tool_args, notification, error))
+        return prepared_calls
+
+    def _build_tool_response(self,
+                             tool_calls: list[dict[str, Any]],
+                             prepared_calls: list[tuple[str, str, dict[str, Any], Optional[str], Optional[str]]],
+                             tool_outcomes: list[tuple[Any, float, Optional[str]]]) -> ToolResponse:
+        """
+        Build the tool response from the prepared tool calls and their outcomes.
+
+        Args:
+            tool_calls (list[dict[str, Any]]): The tool calls from the response.
+            prepared_calls (list[tuple[str, str, dict[str, Any], Optional[str], Optional[str]]]): The prepared tool calls.
+            tool_outcomes (list[tuple[Any, float, Optional[str]]]): The result, wall time and error message of every call, in the same order.
 
         Returns:
             ToolResponse: The final response with tool results.
         """
-        if type(response) != OpenAgentResponse:
-            raise AttributeError("Response must be an OpenAgentResponse or OpenAgentStreamingResponse object")
-        
         tool_args_list = []
         tool_results_list = []
         tool_messages_list = []
         notifications_list = []
-        
-        # Check if the response contains tool calls
-        if response.tool_calls is None:
-            #logger.debug("No tool calls found in the response. Skipping tool call handling.")
-            return ToolResponse(
-                tool_args=[],
-                tool_calls=[],
-                tool_results=[],
-                tool_messages=[],
-                tool_notifications=[]
-            )
 
-        # Handle tool calls 
-        for tool_call in response.tool_calls:
-            tool_call_id = tool_call.get("id")
-            tool_name = tool_call.get("function").get("name")
-            tool_args: dict = eval(tool_call.get("function").get("arguments"))
-            # Save notification value and remove _notification key from tool args if present
-            notification = tool_args.get("_notification", None)
+        for (tool_call_id, tool_name, tool_args, notification, _), (tool_result, elapsed_time, error) in zip(prepared_calls, tool_outcomes):
             notifications_list.append(notification)
-            tool_args.pop("_notification", None)
-            
-            # Handle the tool call (execute the tool)
-            tool_result = self._handle_tool_call(tool_name, **tool_args)
-            
+
             # Store the tool args
             tool_args_list.append(tool_args)
 
@@ -175,14 +366,15 @@ class ToolHandler(BaseToolHandler):
             tool_results_list.append(
                 ToolCallResult(
                     tool_name=tool_name,
-                    result=tool_result
+                    tool_call_id=tool_call_id,
+                    result=tool_result,
+                    elapsed_time=elapsed_time,
+                    error=error,
                 )
             )
             
-            #logger.info(f"Tool Result: {tool_result}")
-            
-            # Convert tool result to string if it's not already a string
-            tool_result_str = str(tool_result)
+            # Convert tool result to string if it's not already a string, errors are reported to the model as is
+            tool_result_str = f"Error: {error}" if error is not None else str(tool_result)
             
             tool_message = {
                 "role": "tool",
@@ -194,8 +386,93 @@ class ToolHandler(BaseToolHandler):
         
         return ToolResponse(
             tool_args=tool_args_list,
-            tool_calls=response.tool_calls,
+            tool_calls=tool_calls,
             tool_results=tool_results_list,
             tool_messages=tool_messages_list,
             tool_notifications=notifications_list
-        )
\ No newline at end of file
+        )
+    
+    def handle_tool_request(self, response: Union[OpenAgentResponse, OpenAgentStreamingResponse]) -> ToolResponse:
+        """
+        Handle tool requests and get the final response with tool results
+
+        Args:
+            response (OpenAgentResponse or OpenAgentStreamingResponse): The response from the OpenAI model.
+
+        Returns:
+            ToolResponse: The final response with tool results.
+        """
+        if not isinstance(response, (OpenAgentResponse, OpenAgentStreamingResponse)):
+            raise AttributeError("Response must be an OpenAgentResponse or OpenAgentStreamingResponse object")
+        
+        # Check if the response contains tool calls
+        if response.tool_calls is None:
+            return ToolResponse(
+                tool_args=[],
+                tool_calls=[],
+                tool_results=[],
+                tool_messages=[],
+                tool_notifications=[]
+            )
+
+        tracer = get_tracer()
+        with tracer.span("tool.handle_request", tool_calls=len(response.tool_calls), concurrent=self.concurrent_tool_calls):
+            with tracer.span("tool.parse_args"):
+                prepared_calls = self._prepare_tool_calls(response.tool_calls)
+
+            # Handle the tool calls (execute the tools)
+            if self.concurrent_tool_calls and len(prepared_calls) > 1:
+                tool_outcomes = self._dispatch_concurrently(prepared_calls)
+            else:
+                tool_outcomes = [
+                    self._timed_tool_call(tool_name, **tool_args) if error is None else (None, 0.0, error)
+                    for _, tool_name, tool_args, _, error in prepared_calls
+                ]
+
+            with tracer.span("tool.build_response"):
+                return self._build_tool_response(response.tool_calls, prepared_calls, tool_outcomes)
+
+    async def async_handle_tool_request(self, response: Union[OpenAgentResponse, OpenAgentStreamingResponse]) -> ToolResponse:
+        """
+        Handle tool requests asynchronously and get the final response with tool results
+
+        Args:
+            response (OpenAgentResponse or OpenAgentStreamingResponse): The response from the OpenAI model.
+
+        Returns:
+            ToolResponse: The final response with tool results.
+        """
+        if not isinstance(response, (OpenAgentResponse, OpenAgentStreamingResponse)):
+            raise AttributeError("Response must be an OpenAgentResponse or OpenAgentStreamingResponse object")
+
+        # Check if the response contains tool calls
+        if response.tool_calls is None:
+            return ToolResponse(
+                tool_args=[],
+                tool_calls=[],
+                tool_results=[],
+                tool_messages=[],
+                tool_notifications=[]
+            )
+
+        tracer = get_tracer()
+        with tracer.span("tool.handle_request", tool_calls=len(response.tool_calls), concurrent=self.concurrent_tool_calls):
+            with tracer.span("tool.parse_args"):
+                prepared_calls = self._prepare_tool_calls(response.tool_calls)
+
+            # Handle the tool calls (await async tools, offload sync tools to a thread)
+            if self.concurrent_tool_calls:
+                tool_outcomes = await asyncio.gather(*[
+                    self._async_timed_tool_call(tool_name, **tool_args) if error is None else self._invalid_call_outcome(error)
+                    for _, tool_name, tool_args, _, error in prepared_calls
+                ])
+            else:
+                tool_outcomes = []
+                for _, tool_name, tool_args, _, error in prepared_calls:
+                    if error is not None:
+                        tool_outcomes.append((None, 0.0, error))
+                        continue
+                    tool_outcomes.append(await self._async_timed_tool_call(tool_name, **tool_args))
+
+            with tracer.span("tool.build_response"):
+                return self._build_tool_response(response.tool_calls, prepared_calls, tool_outcomes)
\ No newline at end of file
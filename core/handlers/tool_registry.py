@@ -0,0 +1,303 @@
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Literal, Mapping, Optional, Union
+from loguru import logger
+import copy
+import hashlib
+import importlib
+import json
+import threading
+
+SchemaType = Literal["OpenAI", "OpenAIRealtime"]
+SCHEMA_TYPES = ("OpenAI", "OpenAIRealtime")
+
+
+class ToolSchemas(list):
+    """
+    A read-only list of tool schemas shared by every executor using the same tools.
+    It is a plain `list` for the OpenAI client and `json`, with the pre-serialized JSON
+    and its fingerprint (used in cache keys) attached, and refuses in-place modification.
+    """
+    __slots__ = ("json", "fingerprint")
+
+    def __init__(self, schemas: Iterable[Dict[str, Any]], schemas_json: Iterable[str]):
+        super().__init__(schemas)
+        self.json = "[" + ",".join(schemas_json) + "]"
+        self.fingerprint = hashlib.sha256(self.json.encode("utf-8")).hexdigest()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("Tool schemas are shared and read-only, build a new tool set instead")
+
+    append = extend = insert = remove = pop = clear = sort = reverse = _read_only
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+
+    def __copy__(self) -> List[Dict[str, Any]]:
+        return list(self)
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> List[Dict[str, Any]]:
+        return copy.deepcopy(list(self), memo)
+
+    def __reduce__(self):
+        return (list, (list(self),))
+
+
+class RegisteredTool:
+    """
+    A tool registered once per process, with its schemas built and serialized at registration.
+
+    ## Properties:
+        `name`: The name of the tool.
+
+        `function`: The `@tool` decorated callable.
+
+        `schemas`: The schema of the tool per schema type.
+
+        `schemas_json`: The serialized schema of the tool per schema type.
+    """
+    __slots__ = ("name", "function", "schemas", "schemas_json")
+
+    def __init__(self, name: str, function: Callable[..., Any]):
+        openai_schema = copy.deepcopy(function.schema)
+        if openai_schema.get("type") == "function" and "function" not in openai_schema:
+            # Decorated with schema_type="OpenAIRealtime"
+            openai_schema = {
+                "type": "function",
+                "function": {
+                    "name": openai_schema["name"],
+                    "description": openai_schema.get("description", ""),
+                    "strict": bool(openai_schema.get("parameters")),
+                    "parameters": openai_schema.get("parameters", {}),
+                },
+            }
+        openai_schema["function"]["name"] = name
+
+        function_schema = openai_schema["function"]
+        realtime_schema = {
+            "type": "function",
+            "name": name,
+            "description": function_schema.get("description", ""),
+            "parameters": function_schema.get("parameters", {}),
+        }
+
+        self.name = name
+        self.function = function
+        self.schemas: Mapping[str, Dict[str, Any]] = MappingProxyType({"OpenAI": openai_schema, "OpenAIRealtime": realtime_schema})
+        self.schemas_json: Mapping[str, str] = MappingProxyType({
+            schema_type: json.dumps(schema, separators=(",", ":"), ensure_ascii=False)
+            for schema_type, schema in self.schemas.items()
+        })
+
+
+class ToolSet:
+    """
+    A cheap read-only view over registered tools for one schema type, cached and shared by
+    every executor and tool handler using the same tools.
+
+    ## Properties:
+        `names`: The tool names, in order.
+
+        `schemas`: The shared `ToolSchemas` list sent to the model.
+
+        `tools_map`: A read-only mapping of the tool names to their callables.
+
+        `schema_type`: The schema format of the view.
+    """
+    __slots__ = ("names", "schema_type", "schemas", "tools_map")
+
+    def __init__(self, tools: List[RegisteredTool], schema_type: SchemaType):
+        self.names = tuple(tool.name for tool in tools)
+        self.schema_type = schema_type
+        self.schemas = ToolSchemas(
+            (tool.schemas[schema_type] for tool in tools),
+            (tool.schemas_json[schema_type] for tool in tools),
+        )
+        self.tools_map: Mapping[str, Callable[..., Any]] = MappingProxyType({tool.name: tool.function for tool in tools})
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __iter__(self) -> Iterator[Callable[..., Any]]:
+        return iter(self.tools_map.values())
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.tools_map
+
+    def __repr__(self) -> str:
+        return f"ToolSet({list(self.names)}, schema_type={self.schema_type!r})"
+
+
+class ToolRegistry:
+    """
+    A process-wide registry of `@tool` functions. Each tool is registered once with its
+    schemas for every format and their serialized JSON, and executors get shared, cached
+    `ToolSet` views instead of rebuilding schemas per instance. Tools can also be registered
+    lazily by import path and are only imported when a tool set first asks for them.
+
+    ## Methods:
+        `register()`: A method to register a `@tool` function.
+
+        `register_lazy()`: A method to register a tool by its `module:attribute` import path.
+
+        `get()`: A method to get a registered tool by name, importing it if it is lazy.
+
+        `view()`: A method to get the cached tool set of some tools or tool names.
+
+        `names()`: A method to get the names of the registered tools, lazy ones included.
+    """
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._tools: Dict[str, RegisteredTool] = {}
+        self._lazy: Dict[str, str] = {}
+        self._views: Dict[tuple, ToolSet] = {}
+
+    def register(self, function: Callable[..., Any], name: Optional[str] = None, replace: bool = False) -> RegisteredTool:
+        """
+        Register a `@tool` function. Registering the same function again is a no-op.
+
+        Args:
+            function (Callable[..., Any]): The tool, decorated with `@tool`.
+            name (Optional[str]): The name of the tool, the name of its schema by default.
+            replace (bool): Whether to replace another tool registered under the same name.
+
+        Returns:
+            RegisteredTool: The registered tool.
+        """
+        name = name or self._tool_name(function)
+
+        with self._lock:
+            registered = self._tools.get(name)
+            if registered is not None and registered.function is function:
+                return registered
+            if registered is not None and not replace:
+                raise ValueError(f"A different tool is already registered as '{name}'")
+
+            registered = RegisteredTool(name, function)
+            self._tools[name] = registered
+            self._lazy.pop(name, None)
+            if replace:
+                # Views holding the previous tool are rebuilt on next use
+                self._views = {key: view for key, view in self._views.items() if name not in view.names}
+        return registered
+
+    @staticmethod
+    def _tool_name(function: Callable[..., Any]) -> str:
+        if not hasattr(function, "schema"):
+            raise ValueError(f"Function '{getattr(function, '__name__', function)}' does not have a `schema` attribute. Please wrap the function with `@tool` decorator from `openagentkit.core.utils.tool_wrapper`.")
+        schema = function.schema
+        return schema.get("function", schema).get("name") or function.__name__
+
+    def _resolve(self, tool: Union[str, Callable[..., Any]], replace: bool) -> RegisteredTool:
+        if isinstance(tool, str):
+            return self.get(tool)
+        if replace:
+            return self.register(tool, replace=True)
+
+        name = self._tool_name(tool)
+        with self._lock:
+            registered = self._tools.get(name)
+            if registered is None or registered.function is tool:
+                return self.register(tool, name=name)
+        # Another function holds the name (e.g. a tool built in a closure): it is only used in this
+        # view, the registered tool stays in place for the executors looking it up by name
+        logger.debug(f"Tool '{name}' is registered as another function, using this one in the tool set only")
+        return RegisteredTool(name, tool)
+
+    def register_lazy(self, name: str, import_path: str) -> None:
+        """
+        Register a tool by import path, it is imported the first time a tool set uses it.
+
+        Args:
+            name (str): The name of the tool.
+            import_path (str): The `package.module:attribute` path of the `@tool` function.
+        """
+        if ":" not in import_path:
+            raise ValueError(f"Invalid import path '{import_path}', expected 'package.module:attribute'")
+        with self._lock:
+            if name not in self._tools:
+                self._lazy[name] = import_path
+
+    def get(self, name: str) -> RegisteredTool:
+        """
+        Get a registered tool, importing it if it was registered lazily.
+
+        Args:
+            name (str): The name of the tool.
+
+        Returns:
+            RegisteredTool: The registered tool.
+        """
+        with self._lock:
+            registered = self._tools.get(name)
+            if registered is not None:
+                return registered
+
+            import_path = self._lazy.get(name)
+            if import_path is None:
+                raise KeyError(f"Tool '{name}' is not registered")
+
+            module_name, attribute = import_path.split(":", 1)
+            logger.debug(f"Loading tool '{name}' from {import_path}")
+            function = getattr(importlib.import_module(module_name), attribute)
+            return self.register(function, name=name)
+
+    def view(self,
+             tools: Union[ToolSet, Iterable[Union[str, Callable[..., Any]]]],
+             schema_type: SchemaType = "OpenAI",
+             replace: bool = False) -> ToolSet:
+        """
+        Get the tool set of some tools, registering the functions that are not registered yet.
+        A function whose name is held by a different registered function is used in this tool
+        set only, the registered one is kept, unless `replace` rebinds the name process-wide.
+        Tool sets are cached, so every executor with the same tools shares one view.
+
+        Args:
+            tools (Union[ToolSet, Iterable[Union[str, Callable[..., Any]]]]): The `@tool` functions or the names of registered tools.
+            schema_type (SchemaType): The schema format of the view.
+            replace (bool): Whether the functions replace the tools registered under their names.
+
+        Returns:
+            ToolSet: The read-only tool set.
+        """
+        if schema_type not in SCHEMA_TYPES:
+            raise ValueError(f"Unsupported schema type: {schema_type}")
+        if isinstance(tools, ToolSet):
+            if tools.schema_type == schema_type:
+                return tools
+            tools = tools.names
+
+        registered = [self._resolve(tool, replace) for tool in tools]
+        key = (tuple(id(tool.function) for tool in registered), tuple(tool.name for tool in registered), schema_type)
+
+        view = self._views.get(key)
+        if view is None:
+            with self._lock:
+                view = self._views.get(key)
+                if view is None:
+                    view = ToolSet(registered, schema_type)
+                    self._views[key] = view
+        return view
+
+    def names(self) -> List[str]:
+        """
+        Get the names of the registered tools.
+
+        Returns:
+            List[str]: The names, lazy tools included.
+        """
+        with self._lock:
+            return [*self._tools, *self._lazy]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools or name in self._lazy
+
+
+_TOOL_REGISTRY = ToolRegistry()
+
+
+def get_tool_registry() -> ToolRegistry:
+    """
+    Get the process-wide tool registry.
+
+    Returns:
+        ToolRegistry: The tool registry.
+    """
+    return _TOOL_REGISTRY
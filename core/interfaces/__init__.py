@@ -2,4 +2,6 @@ from .base_embedding_model import BaseEmbeddingModel
 from .base_executor import BaseExecutor
 from .base_tool_handler import BaseToolHandler
 from .base_llm_model import BaseLLMModel
-from .base_speech_model import BaseSpeechModel
\ No newline at end of file
+from .base_speech_model import BaseSpeechModel
+from .async_base_executor import AsyncBaseExecutor
+from .async_base_llm_model import AsyncBaseLLMModel
@@ -0,0 +1,69 @@
+from abc import abstractmethod
+from core.interfaces.base_executor import BaseExecutor
+from core.models.responses import OpenAgentResponse, OpenAgentStreamingResponse
+from typing import Optional, AsyncGenerator, List, Dict, Any
+
+class AsyncBaseExecutor(BaseExecutor):
+    """
+    An abstract base class for executing user messages asynchronously.
+    It shares the context handling of `BaseExecutor` but its execution methods
+    are async generators, so many conversations can be served on one event loop.
+
+    ## Methods:
+        `execute()`: An abstract async generator to execute a user message with the given tools and parameters.
+
+        `stream_execute()`: An abstract async generator to stream execute a user message with the given tools and parameters.
+    """
+    @abstractmethod
+    def clone(self) -> 'AsyncBaseExecutor':
+        """
+        An abstract method to clone the executor instance.
+        
+        Returns:
+            AsyncBaseExecutor: A clone of the executor instance.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def execute(self,
+                messages: List[Dict[str, str]],
+                tools: Optional[List[Dict[str, Any]]],
+                temperature: Optional[float] = None,
+                max_tokens: Optional[int] = None,
+                top_p: Optional[float] = None
+                ) -> AsyncGenerator[OpenAgentResponse, None]:
+        """
+        An abstract async generator to execute an user message with the given tools and parameters.
+        
+        Args:
+            messages (List[Dict[str, str]]): A list of messages to be processed.
+            tools (Optional[List[Dict[str, Any]]]): A list of tools to be used.
+            temperature (Optional[float]): The temperature for the response generation.
+            max_tokens (Optional[int]): The maximum number of tokens for the response.
+            top_p (Optional[float]): The top-p sampling parameter.
+        Returns:
+            AsyncGenerator[OpenAgentResponse, None]: An async generator that yields OpenAgentResponse objects.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def stream_execute(self,
+                       messages: List[Dict[str, str]],
+                       tools: Optional[List[Dict[str, Any]]],
+                       temperature: Optional[float] = None,
+                       max_tokens: Optional[int] = None,
+                       top_p: Optional[float] = None
+                       ) -> AsyncGenerator[OpenAgentStreamingResponse, None]:
+        """
+        An abstract async generator to stream execute an user message with the given tools and parameters.
+
+        Args:
+            messages (List[Dict[str, str]]): A list of messages to be processed.
+            tools (Optional[List[Dict[str, Any]]]): A list of tools to be used.
+            temperature (Optional[float]): The temperature for the response generation.
+            max_tokens (Optional[int]): The maximum number of tokens for the response.
+            top_p (Optional[float]): The top-p sampling parameter.
+        Returns:
+            AsyncGenerator[OpenAgentStreamingResponse, None]: An async generator that yields OpenAgentStreamingResponse objects.
+        """
+        raise NotImplementedError
@@ -0,0 +1,83 @@
+from abc import abstractmethod
+from core.interfaces.base_llm_model import BaseLLMModel
+from core.models.responses import OpenAgentResponse, OpenAgentStreamingResponse
+from pydantic import BaseModel
+from typing import Union, Optional, AsyncGenerator, List, Dict
+
+class AsyncBaseLLMModel(BaseLLMModel):
+    """
+    An abstract base class for asynchronous LLM models.
+    It shares the sampling properties of `BaseLLMModel` but its generation methods are coroutines.
+    
+    ## Methods:
+        `model_generate()`: An abstract coroutine to generate a response from the LLM model.
+
+        `model_stream()`: An abstract async generator to stream a response from the LLM model.
+    """
+    @abstractmethod
+    def clone(self) -> 'AsyncBaseLLMModel':
+        """
+        An abstract method to clone the LLM model instance.
+        
+        Returns:
+            AsyncBaseLLMModel: A clone of the LLM model instance.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def model_generate(self,
+                             messages: List[Dict[str, str]],
+                             response_schema: Optional[BaseModel] = None,
+                             temperature: Optional[float] = None,
+                             max_tokens: Optional[int] = None,
+                             top_p: Optional[float] = None,
+                             **kwargs) -> Union[OpenAgentResponse, BaseModel]:
+        """
+        An abstract coroutine to generate a response from the LLM model.
+
+        Args:
+            messages (List[Dict[str, str]]): The messages to be processed.
+
+            response_schema (Optional[BaseModel]): The response schema to be used.
+
+            temperature (Optional[float]): The temperature for the response generation.
+
+            max_tokens (Optional[int]): The maximum number of tokens for the response.
+
+            top_p (Optional[float]): The top-p sampling parameter.
+
+            **kwargs: Additional keyword arguments.
+
+        Returns:
+            Union[OpenAgentResponse, BaseModel]: The generated response.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def model_stream(self,
+                     messages: List[Dict[str, str]],
+                     response_schema: Optional[BaseModel] = None,
+                     temperature: Optional[float] = None,
+                     max_tokens: Optional[int] = None,
+                     top_p: Optional[float] = None,
+                     **kwargs) -> AsyncGenerator[OpenAgentStreamingResponse, None]:
+        """
+        An abstract async generator to stream a response from the LLM model.
+        
+        Args:
+            messages (List[Dict[str, str]]): The messages to be processed.
+
+            response_schema (Optional[BaseModel]): The response schema to be used.
+
+            temperature (Optional[float]): The temperature for the response generation.
+
+            max_tokens (Optional[int]): The maximum number of tokens for the response.
+
+            top_p (Optional[float]): The top-p sampling parameter.
+
+            **kwargs: Additional keyword arguments.
+
+        Returns:
+            AsyncGenerator[OpenAgentStreamingResponse, None]: The streamed response.
+        """
+        raise NotImplementedError
@@ -1,6 +1,9 @@
 from abc import ABC, abstractmethod
-from core.models.responses import OpenAgentResponse
-from typing import Optional, Generator, List, Dict, Any
+from loguru import logger
+from core.models.responses import OpenAgentResponse, OpenAgentStreamingResponse
+from core.handlers.context_window_manager import ContextWindowManager
+from core.models.io.message_log import Message, MessageLog
+from typing import Optional, Generator, List, Dict, Any, Callable, Union
 
 class BaseExecutor(ABC):
     """
@@ -16,21 +19,31 @@ class BaseExecutor(ABC):
         `execute()`: An abstract method to execute a user message with the given tools and parameters.
 
         `stream_execute()`: An abstract method to stream execute a user message with the given tools and parameters.
+
+        `get_request_context()`: A method to get the messages to send, trimmed by the context window manager if one is set.
+
+        `context_size()`: A method to get the number of messages and the (estimated) tokens held in the history.
+
+        `trim_context()`: A method to drop the oldest turns of the history to stay within message/token caps.
+
+        `set_history_listener()`: A method to set a callback receiving every message added to the history (e.g. to persist it).
     """
     def __init__(self,
                  system_message: Optional[str] = None, 
-                 context_history: Optional[List[Dict[str, str]]] = None):
+                 context_history: Optional[List[Dict[str, str]]] = None,
+                 context_window: Optional[ContextWindowManager] = None):
         self._system_message = system_message or "You are a helpful assistant. Try to assist the user as best as you can. If you are unsure, ask clarifying questions. If you don't know the answer, say 'I don't know'."
 
-        self._context_history = [
-            {
-                "role": "system",
-                "content": self._system_message,
-            }
-        ]
+        # The single history of the conversation, encoded to the wire format only when sent
+        self._history = MessageLog(context_history) if context_history is not None else MessageLog([Message("system", self._system_message)])
+
+        # Token counts are kept on the message records, only tracked when a context window is set
+        self._context_window = context_window
+        self._sync_context_tokens()
+        # Compacted tool messages of this conversation, the context window manager may be shared by clones
+        self._compacted_messages: Dict[str, tuple] = {}
 
-        if context_history is not None:
-            self._context_history = context_history
+        self._history_listener: Optional[Callable[[List[Dict[str, Any]]], Any]] = None
 
     @property
     def system_message(self) -> str:
@@ -51,7 +64,19 @@ class BaseExecutor(ABC):
             value: The system message to set.
         """
         self._system_message = value
-        self._context_history[0]["content"] = value
+        self._history[0] = Message("system", value)
+        if self._context_window is not None:
+            self._history[0].tokens = self._context_window.count_tokens(self._history[0].to_wire())
+
+    @property
+    def context_window(self) -> Optional[ContextWindowManager]:
+        """
+        Get the context window manager.
+
+        Returns:
+            The context window manager or None if the full history is sent.
+        """
+        return self._context_window
 
     @abstractmethod
     def clone(self) -> 'BaseExecutor':
@@ -84,34 +109,103 @@ class BaseExecutor(ABC):
             Generator[OpenAgentResponse, None, None]: A generator that yields OpenAgentResponse objects.
         """
         raise NotImplementedError
+
+    @abstractmethod
+    def stream_execute(self,
+                       messages: List[Dict[str, str]],
+                       tools: Optional[List[Dict[str, Any]]],
+                       temperature: Optional[float] = None,
+                       max_tokens: Optional[int] = None,
+                       top_p: Optional[float] = None
+                       ) -> Generator[OpenAgentStreamingResponse, None, None]:
+        """
+        An abstract method to stream execute an user message with the given tools and parameters.
+
+        Args:
+            messages (List[Dict[str, str]]): A list of messages to be processed.
+            tools (Optional[List[Dict[str, Any]]]): A list of tools to be used.
+            temperature (Optional[float]): The temperature for the response generation.
+            max_tokens (Optional[int]): The maximum number of tokens for the response.
+            top_p (Optional[float]): The top-p sampling parameter.
+        Returns:
+            Generator[OpenAgentStreamingResponse, None, None]: A generator that yields OpenAgentStreamingResponse objects.
+        """
+        raise NotImplementedError
     
     
     def get_context(self) -> List[Dict[str, Any]]:
         """
-        An abstract method to get the history of the conversation.
+        Get the history of the conversation in the OpenAI wire format.
 
         Returns:
             List[Dict[str, Any]]: The history of the conversation.
         """
-        return self._context_history
+        return self._history.wire()
+
+    @property
+    def history(self) -> MessageLog:
+        """
+        Get the message log of the conversation.
+
+        Returns:
+            MessageLog: The compact message records.
+        """
+        return self._history
+
+    def _sync_context_tokens(self) -> None:
+        """
+        Count the tokens of the messages that are not counted yet.
+        Messages are counted once, new messages are always at the end of the log.
+        """
+        if self._context_window is None:
+            return
+
+        pending = []
+        for message in reversed(self._history):
+            if message.tokens is not None:
+                break
+            pending.append(message)
+        for message in pending:
+            message.tokens = self._context_window.count_tokens(message.to_wire())
+
+    def get_request_context(self) -> List[Dict[str, Any]]:
+        """
+        Get the messages to send to the model.
+        With a context window manager the history is trimmed to its token budget,
+        otherwise the full history is returned.
+
+        Returns:
+            List[Dict[str, Any]]: The messages to send to the model.
+        """
+        if self._context_window is None:
+            return self._history.wire()
+
+        self._sync_context_tokens()
+        return self._context_window.build_window(
+            self._history.wire(),
+            [message.tokens for message in self._history],
+            memo=self._compacted_messages,
+        )
     
-    def add_context(self, content: dict[str, str]):
+    def add_context(self, content: Union[Message, Dict[str, Any]]) -> MessageLog:
         """
         Add context to the model.
 
         Args:
-            content: The content to add to the context.
+            content: The message to add to the context, a `Message` or a wire dictionary.
 
         Returns:
             The context history.
         """
         if not content:
-            return self._context_history
+            return self._history
         
-        self._context_history.append(content)
-        return self._context_history
+        record = self._history.append(content)
+        self._sync_context_tokens()
+        self._notify_history_listener([record])
+        return self._history
     
-    def extend_context(self, content: List[dict[str, str]]):
+    def extend_context(self, content: List[Union[Message, Dict[str, Any]]]) -> MessageLog:
         """
         Extend the context of the model.
 
@@ -122,10 +216,12 @@ class BaseExecutor(ABC):
             The context history.
         """
         if not content:
-            return self._context_history
+            return self._history
         
-        self._context_history.extend(content)
-        return self._context_history
+        records = self._history.extend(content)
+        self._sync_context_tokens()
+        self._notify_history_listener(records)
+        return self._history
     
     def clear_context(self):
         """
@@ -134,10 +230,83 @@ class BaseExecutor(ABC):
         Returns:
             The cleared context history.
         """
-        self._context_history = [
-            {
-                "role": "system",
-                "content": self._system_message,
-            }
-        ]
-        return self._context_history
\ No newline at end of file
+        self._history = MessageLog([Message("system", self._system_message)])
+        self._compacted_messages.clear()
+        self._sync_context_tokens()
+        return self._history
+
+    def set_history_listener(self, listener: Optional[Callable[[List[Dict[str, Any]]], Any]]) -> None:
+        """
+        Set a callback called with the new messages every time the history grows.
+        The callback runs on the request thread, so it must not block (e.g. enqueue the messages).
+
+        Args:
+            listener (Optional[Callable[[List[Dict[str, Any]]], Any]]): The callback, or None to remove it.
+        """
+        self._history_listener = listener
+
+    def _notify_history_listener(self, messages: List[Message]) -> None:
+        if self._history_listener is None:
+            return
+        try:
+            self._history_listener([message.to_wire() for message in messages])
+        except Exception as e:
+            logger.warning(f"History listener failed: {e}")
+
+    def _message_tokens(self) -> List[int]:
+        """
+        Get the token count of every message, exact with a context window manager,
+        otherwise estimated from the content length (~4 characters per token).
+        """
+        if self._context_window is not None:
+            self._sync_context_tokens()
+            return [message.tokens for message in self._history]
+
+        return [len(str(message.content or "")) // 4 + 4 for message in self._history]
+
+    def context_size(self) -> Dict[str, int]:
+        """
+        Get the size of the context history.
+
+        Returns:
+            Dict[str, int]: The number of messages and their (estimated) token count.
+        """
+        return {
+            "messages": len(self._history),
+            "tokens": sum(self._message_tokens()),
+        }
+
+    def trim_context(self, max_messages: Optional[int] = None, max_tokens: Optional[int] = None) -> int:
+        """
+        Drop the oldest turns (a user message and everything up to the next one) until the
+        history fits the caps. The system message and the latest turn are always kept, so
+        tool calls are never separated from their results.
+
+        Args:
+            max_messages (Optional[int]): The maximum number of messages to keep.
+            max_tokens (Optional[int]): The maximum number of (estimated) tokens to keep.
+
+        Returns:
+            int: The number of dropped messages.
+        """
+        if max_messages is None and max_tokens is None:
+            return 0
+
+        token_counts = self._message_tokens()
+        message_count = len(self._history)
+        token_total = sum(token_counts)
+
+        turn_starts = [index for index, message in enumerate(self._history) if index > 0 and message.role == "user"]
+        cut = 1
+        for next_start in turn_starts[1:]:
+            if (max_messages is None or message_count <= max_messages) and (max_tokens is None or token_total <= max_tokens):
+                break
+            message_count -= next_start - cut
+            token_total -= sum(token_counts[cut:next_start])
+            cut = next_start
+
+        if cut == 1:
+            return 0
+
+        del self._history[1:cut]
+        return cut - 1
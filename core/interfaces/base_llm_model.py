@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from core.models.responses import OpenAgentResponse
+from core.models.responses import OpenAgentResponse, OpenAgentStreamingResponse
 from pydantic import BaseModel
 from typing import Union, Optional, Generator, List, Dict, Any
 
@@ -115,31 +115,31 @@ class BaseLLMModel(ABC):
         """
         raise NotImplementedError
     
-    # @abstractmethod
-    # def model_stream(self,
-    #                  messages: List[Dict[str, str]],
-    #                  response_schema: Optional[BaseModel] = None,
-    #                  temperature: Optional[float] = None,
-    #                  max_tokens: Optional[int] = None,
-    #                  top_p: Optional[float] = None,
-    #                  **kwargs) -> Generator[OpenAgentResponse, None, None]:
-    #     """
-    #     An abstract method to stream a response from the LLM model.
+    @abstractmethod
+    def model_stream(self,
+                     messages: List[Dict[str, str]],
+                     response_schema: Optional[BaseModel] = None,
+                     temperature: Optional[float] = None,
+                     max_tokens: Optional[int] = None,
+                     top_p: Optional[float] = None,
+                     **kwargs) -> Generator[OpenAgentStreamingResponse, None, None]:
+        """
+        An abstract method to stream a response from the LLM model.
         
-    #     Args:
-    #         messages (List[Dict[str, str]]): The messages to be processed.
+        Args:
+            messages (List[Dict[str, str]]): The messages to be processed.
 
-    #         response_schema (Optional[BaseModel]): The response schema to be used.
+            response_schema (Optional[BaseModel]): The response schema to be used.
 
-    #         temperature (Optional[float]): The temperature for the response generation.
+            temperature (Optional[float]): The temperature for the response generation.
 
-    #         max_tokens (Optional[int]): The maximum number of tokens for the response.
+            max_tokens (Optional[int]): The maximum number of tokens for the response.
 
-    #         top_p (Optional[float]): The top-p sampling parameter.
+            top_p (Optional[float]): The top-p sampling parameter.
 
-    #         **kwargs: Additional keyword arguments.
+            **kwargs: Additional keyword arguments.
 
-    #     Returns:
-    #         Generator[OpenAgentStreamingResponse, None]: The streamed response.
-    #     """
-    #     raise NotImplementedError
\ No newline at end of file
+        Returns:
+            Generator[OpenAgentStreamingResponse, None, None]: The streamed response.
+        """
+        raise NotImplementedError
\ No newline at end of file
@@ -0,0 +1,204 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+from pydantic import BaseModel
+import json
+import sys
+
+
+class ToolCall:
+    """
+    A compact tool call requested by the model, stored once in the history.
+
+    ## Methods:
+        `from_any()`: A method to build a tool call from an OpenAI object or a wire dictionary.
+
+        `to_wire()`: A method to get the tool call in the OpenAI wire format.
+    """
+    __slots__ = ("id", "name", "arguments")
+
+    def __init__(self, id: Optional[str], name: str, arguments: str):
+        self.id = id
+        self.name = sys.intern(name)
+        self.arguments = arguments
+
+    @classmethod
+    def from_any(cls, tool_call: Union['ToolCall', Dict[str, Any], Any]) -> 'ToolCall':
+        """
+        Build a tool call from an OpenAI `ChatCompletionMessageToolCall`, a wire dictionary or a tool call.
+
+        Args:
+            tool_call (Union[ToolCall, Dict[str, Any], Any]): The tool call.
+
+        Returns:
+            ToolCall: The compact tool call.
+        """
+        if isinstance(tool_call, ToolCall):
+            return tool_call
+        if isinstance(tool_call, dict):
+            function = tool_call.get("function") or {}
+            arguments = function.get("arguments", "")
+            return cls(tool_call.get("id"), function.get("name", ""), arguments if isinstance(arguments, str) else json.dumps(arguments))
+        return cls(tool_call.id, tool_call.function.name, tool_call.function.arguments)
+
+    def to_wire(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "type": "function",
+            "function": {"name": self.name, "arguments": self.arguments},
+        }
+
+    def __repr__(self) -> str:
+        return f"ToolCall(id={self.id!r}, name={self.name!r}, arguments={self.arguments!r})"
+
+
+class Message:
+    """
+    A compact record of one message of the history. Roles are interned, tool calls are
+    held once as `ToolCall` records, and the OpenAI wire dictionary is built per request
+    (sharing the content), so the history holds a single copy of every message.
+
+    ## Methods:
+        `from_wire()`: A method to build a message from an OpenAI wire dictionary.
+
+        `to_wire()`: A method to get the OpenAI wire dictionary of the message.
+
+    ## Properties:
+        `tokens`: The token count of the message, set by the executor when a context window is used.
+    """
+    __slots__ = ("role", "content", "tool_calls", "tool_call_id", "name", "tokens")
+
+    def __init__(self,
+                 role: str,
+                 content: Any = None,
+                 tool_calls: Optional[Iterable[Any]] = None,
+                 tool_call_id: Optional[str] = None,
+                 name: Optional[str] = None):
+        self.role = sys.intern(role)
+        self.content = content
+        self.tool_calls = tuple(ToolCall.from_any(tool_call) for tool_call in tool_calls) if tool_calls else None
+        self.tool_call_id = tool_call_id
+        self.name = name
+        self.tokens: Optional[int] = None
+
+    @classmethod
+    def from_wire(cls, message: Union['Message', Dict[str, Any]]) -> 'Message':
+        """
+        Build a message from an OpenAI wire dictionary.
+
+        Args:
+            message (Union[Message, Dict[str, Any]]): The message dictionary (or a message, returned as is).
+
+        Returns:
+            Message: The compact message.
+        """
+        if isinstance(message, Message):
+            return message
+        return cls(
+            role=message.get("role", "user"),
+            content=message.get("content"),
+            tool_calls=message.get("tool_calls"),
+            tool_call_id=message.get("tool_call_id"),
+            name=message.get("name"),
+        )
+
+    def to_wire(self) -> Dict[str, Any]:
+        """
+        Get the message in the OpenAI wire format, a new dictionary sharing the content of the record.
+
+        Returns:
+            Dict[str, Any]: The message dictionary.
+        """
+        content = self.content
+        if isinstance(content, BaseModel):
+            content = content.model_dump_json()
+        elif content is not None and not isinstance(content, (str, list)):
+            content = str(content)
+
+        wire: Dict[str, Any] = {"role": self.role, "content": content}
+        if self.tool_calls:
+            wire["tool_calls"] = [tool_call.to_wire() for tool_call in self.tool_calls]
+        if self.tool_call_id is not None:
+            wire["tool_call_id"] = self.tool_call_id
+        if self.name is not None:
+            wire["name"] = self.name
+        return wire
+
+    def __repr__(self) -> str:
+        return f"Message(role={self.role!r}, content={self.content!r}, tool_calls={self.tool_calls!r}, tool_call_id={self.tool_call_id!r})"
+
+
+class MessageLog:
+    """
+    The single history of a conversation, an ordered list of compact `Message` records.
+
+    ## Methods:
+        `append()`: A method to add a message (a `Message` or a wire dictionary).
+
+        `extend()`: A method to add several messages.
+
+        `wire()`: A method to get the messages in the OpenAI wire format.
+    """
+    __slots__ = ("_messages",)
+
+    def __init__(self, messages: Optional[Iterable[Union[Message, Dict[str, Any]]]] = None):
+        self._messages: List[Message] = [Message.from_wire(message) for message in messages or []]
+
+    def append(self, message: Union[Message, Dict[str, Any]]) -> Message:
+        """
+        Add a message to the log.
+
+        Args:
+            message (Union[Message, Dict[str, Any]]): The message.
+
+        Returns:
+            Message: The stored record.
+        """
+        record = Message.from_wire(message)
+        self._messages.append(record)
+        return record
+
+    def extend(self, messages: Iterable[Union[Message, Dict[str, Any]]]) -> List[Message]:
+        """
+        Add several messages to the log.
+
+        Args:
+            messages (Iterable[Union[Message, Dict[str, Any]]]): The messages.
+
+        Returns:
+            List[Message]: The stored records.
+        """
+        records = [Message.from_wire(message) for message in messages]
+        self._messages.extend(records)
+        return records
+
+    def wire(self, start: int = 0) -> List[Dict[str, Any]]:
+        """
+        Get the messages in the OpenAI wire format, built for this request.
+
+        Args:
+            start (int): The index of the first message.
+
+        Returns:
+            List[Dict[str, Any]]: The message dictionaries.
+        """
+        return [message.to_wire() for message in self._messages[start:]]
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def __iter__(self) -> Iterator[Message]:
+        return iter(self._messages)
+
+    def __reversed__(self) -> Iterator[Message]:
+        return reversed(self._messages)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Message, List[Message]]:
+        return self._messages[index]
+
+    def __setitem__(self, index: int, message: Union[Message, Dict[str, Any]]) -> None:
+        self._messages[index] = Message.from_wire(message)
+
+    def __delitem__(self, index: Union[int, slice]) -> None:
+        del self._messages[index]
+
+    def __repr__(self) -> str:
+        return f"MessageLog({len(self._messages)} messages)"
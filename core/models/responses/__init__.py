@@ -1,3 +1,4 @@
 from .openagent_response import OpenAgentResponse
+from .openagent_streaming_response import OpenAgentStreamingResponse
 from .embedding_response import EmbeddingResponse
 from .usage_response import UsageResponse, PromptTokensDetails, CompletionTokensDetails
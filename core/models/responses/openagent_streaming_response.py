@@ -0,0 +1,47 @@
+from pydantic import BaseModel
+from core.models.responses.usage_response import UsageResponse
+from typing import Optional, Dict, Any, List, Union
+
+
+class OpenAgentStreamingResponse(BaseModel):
+    """
+    A streaming response model for the OpenAgent. Intermediate chunks carry
+    only the `delta_*` fields, while the final chunk of a model call carries
+    the fully assembled message along with its `finish_reason` and usage.
+
+    Schema:
+        ```python
+        class OpenAgentStreamingResponse(BaseModel):
+            role: str
+            index: Optional[int] = None
+            delta_content: Optional[str] = None
+            delta_audio: Optional[str] = None
+            content: Optional[Union[str, BaseModel, dict]] = None
+            tool_calls: Optional[List[Union[Dict[str, Any], BaseModel]]] = None
+            tool_results: Optional[List[Union[Dict[str, Any], BaseModel]]] = None
+            refusal: Optional[str] = None
+            finish_reason: Optional[str] = None
+            usage: Optional[UsageResponse] = None
+        ```
+    Where:
+        - `role`: The role of the response (e.g., "assistant", "tool").
+        - `index`: The index of the chunk within the current model call.
+        - `delta_content`: The content delta received in this chunk.
+        - `delta_audio`: The audio delta received in this chunk.
+        - `content`: The complete content, only set on the final chunk.
+        - `tool_calls`: The fully assembled tool calls, only set on the final chunk.
+        - `tool_results`: A list of results from the tool calls.
+        - `refusal`: A string indicating a refusal to answer.
+        - `finish_reason`: The reason the model stopped generating, only set on the final chunk.
+        - `usage`: An instance of UsageResponse containing usage details.
+    """
+    role: str
+    index: Optional[int] = None
+    delta_content: Optional[str] = None
+    delta_audio: Optional[str] = None
+    content: Optional[Union[str, BaseModel, dict, Any]] = None
+    tool_calls: Optional[List[Union[Dict[str, Any], BaseModel, Any]]] = None
+    tool_results: Optional[List[Union[Dict[str, Any], BaseModel, Any]]] = None
+    refusal: Optional[str] = None
+    finish_reason: Optional[str] = None
+    usage: Optional[UsageResponse] = None
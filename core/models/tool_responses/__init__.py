@@ -1,2 +1,3 @@
 from .tool_response import ToolResponse, ToolCallResult, ToolCallFunction, ToolCallInput
-from .weather_response import WeatherResponse, WeatherForecast, CurrentWeather
\ No newline at end of file
+from .weather_response import WeatherResponse, WeatherForecast, CurrentWeather
+from .knowledge_response import KnowledgeResponse, KnowledgeResult
\ No newline at end of file
@@ -0,0 +1,12 @@
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+
+class KnowledgeResult(BaseModel):
+    content: str
+    score: float
+    metadata: Dict[str, Any] = {}
+
+class KnowledgeResponse(BaseModel):
+    query: str
+    results: List[KnowledgeResult]
+    error: Optional[str] = None
@@ -4,6 +4,9 @@ from typing import Optional, Union, Any, Literal
 class ToolCallResult(BaseModel):
     tool_name: str
     result: Any
+    tool_call_id: Optional[str] = None
+    elapsed_time: Optional[float] = None
+    error: Optional[str] = None
     
 class ToolCallInput(BaseModel):
     role: Literal["tool"] = "tool"
@@ -0,0 +1,269 @@
+from typing import Any, Dict, Optional
+from loguru import logger
+import asyncio
+import threading
+import weakref
+import httpx
+
+
+class _CountingTransport(httpx.HTTPTransport):
+    """
+    An httpx transport reporting every request to the provider counters.
+    """
+    def __init__(self, provider: 'HTTPClientProvider', **kwargs):
+        super().__init__(**kwargs)
+        self._provider = provider
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        self._provider._request_started()
+        try:
+            response = super().handle_request(request)
+        except Exception:
+            self._provider._request_finished(error=True)
+            raise
+        self._provider._request_finished(error=response.status_code >= 500)
+        return response
+
+
+class _AsyncCountingTransport(httpx.AsyncHTTPTransport):
+    """
+    An httpx async transport reporting every request to the provider counters.
+    """
+    def __init__(self, provider: 'HTTPClientProvider', **kwargs):
+        super().__init__(**kwargs)
+        self._provider = provider
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self._provider._request_started()
+        try:
+            response = await super().handle_async_request(request)
+        except Exception:
+            self._provider._request_finished(error=True)
+            raise
+        self._provider._request_finished(error=response.status_code >= 500)
+        return response
+
+
+class HTTPClientProvider:
+    """
+    A central provider of pooled HTTP clients. Every OpenAI client and every tool
+    HTTP call share one keep-alive connection pool instead of paying a new TCP/TLS
+    handshake per client or per call.
+
+    Async clients are bound to the event loop that was current when they were created: an
+    `AsyncOpenAI` client built by `async_openai_client()` must only be used on that loop, other
+    loops build their own.
+
+    ## Methods:
+        `get_client()`: A method to get the shared synchronous httpx client.
+
+        `get_async_client()`: A method to get the shared httpx async client of the running event loop.
+
+        `openai_client()`: A method to build an `OpenAI` client on the shared pool.
+
+        `async_openai_client()`: A method to build an `AsyncOpenAI` client on the shared pool.
+
+        `stats()`: A method to get the request counters and the connections of the pools.
+
+        `close()`: A method to close the shared synchronous client.
+    """
+    def __init__(self,
+                 max_connections: int = 100,
+                 max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 30.0,
+                 connect_timeout: float = 5.0,
+                 read_timeout: float = 60.0,
+                 write_timeout: float = 30.0,
+                 pool_timeout: float = 10.0,
+                 http2: bool = False):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(
+            connect=connect_timeout,
+            read=read_timeout,
+            write=write_timeout,
+            pool=pool_timeout,
+        )
+        self.http2 = http2 and self._http2_available()
+
+        self._lock = threading.Lock()
+        self._client: Optional[httpx.Client] = None
+        # httpx async connections are bound to the event loop that opened them
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+        self.requests = 0
+        self.in_flight = 0
+        self.errors = 0
+
+    @staticmethod
+    def _http2_available() -> bool:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("HTTP/2 requested but the `h2` package is not installed, falling back to HTTP/1.1")
+            return False
+        return True
+
+    def _request_started(self) -> None:
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+
+    def _request_finished(self, error: bool) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            if error:
+                self.errors += 1
+
+    def get_client(self) -> httpx.Client:
+        """
+        Get the shared synchronous client, created on first use.
+
+        Returns:
+            httpx.Client: The shared client.
+        """
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(
+                        timeout=self.timeout,
+                        transport=_CountingTransport(self, limits=self.limits, http2=self.http2),
+                    )
+        return self._client
+
+    def get_async_client(self) -> httpx.AsyncClient:
+        """
+        Get the shared async client of the running event loop, created on first use. The client
+        is bound to that loop and must not be used from another one.
+
+        Returns:
+            httpx.AsyncClient: The shared async client.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = asyncio.get_event_loop()
+
+        with self._lock:
+            client = self._async_clients.get(loop)
+            if client is None or client.is_closed:
+                client = httpx.AsyncClient(
+                    timeout=self.timeout,
+                    transport=_AsyncCountingTransport(self, limits=self.limits, http2=self.http2),
+                )
+                self._async_clients[loop] = client
+        return client
+
+    def openai_client(self, api_key: Optional[str] = None, **kwargs) -> Any:
+        """
+        Build an `OpenAI` client on the shared connection pool.
+
+        Args:
+            api_key (Optional[str]): The OpenAI API key.
+            **kwargs: Other `OpenAI` arguments (e.g. `base_url`).
+
+        Returns:
+            OpenAI: The client.
+        """
+        from openai import OpenAI
+        return OpenAI(api_key=api_key, http_client=self.get_client(), **kwargs)
+
+    def async_openai_client(self, api_key: Optional[str] = None, **kwargs) -> Any:
+        """
+        Build an `AsyncOpenAI` client on the shared connection pool of the running event loop.
+        The client is bound to that loop, build one per loop.
+
+        Args:
+            api_key (Optional[str]): The OpenAI API key.
+            **kwargs: Other `AsyncOpenAI` arguments (e.g. `base_url`).
+
+        Returns:
+            AsyncOpenAI: The client.
+        """
+        from openai import AsyncOpenAI
+        return AsyncOpenAI(api_key=api_key, http_client=self.get_async_client(), **kwargs)
+
+    @staticmethod
+    def _pool_stats(client: Optional[Any]) -> Dict[str, int]:
+        # httpx does not expose its pool, read the httpcore connection pool behind the default transport
+        pool = getattr(getattr(client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        closed = sum(1 for connection in connections if connection.is_closed())
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {
+            "connections": len(connections) - closed,
+            "idle": idle,
+            "active": len(connections) - closed - idle,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the request counters and the state of the connection pools.
+
+        Returns:
+            Dict[str, Any]: The limits, the request/in-flight/error (transport errors and 5xx) counters and the
+            connections, idle and active, of the sync pool and of every async pool.
+        """
+        with self._lock:
+            async_clients = list(self._async_clients.values())
+            counters = {"requests": self.requests, "in_flight": self.in_flight, "errors": self.errors}
+
+        return {
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            **counters,
+            "sync_pool": self._pool_stats(self._client),
+            "async_pools": [self._pool_stats(client) for client in async_clients if not client.is_closed],
+        }
+
+    def close(self) -> None:
+        """
+        Close the sync client. Async clients are closed with their event loop.
+        """
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+
+_HTTP_CLIENT_PROVIDER: Optional[HTTPClientProvider] = None
+_PROVIDER_LOCK = threading.Lock()
+
+
+def get_http_client_provider() -> HTTPClientProvider:
+    """
+    Get the process-wide HTTP client provider, created with the default settings on first use.
+
+    Returns:
+        HTTPClientProvider: The provider.
+    """
+    global _HTTP_CLIENT_PROVIDER
+    if _HTTP_CLIENT_PROVIDER is None:
+        with _PROVIDER_LOCK:
+            if _HTTP_CLIENT_PROVIDER is None:
+                _HTTP_CLIENT_PROVIDER = HTTPClientProvider()
+    return _HTTP_CLIENT_PROVIDER
+
+
+def configure_http_client_provider(**settings: Any) -> HTTPClientProvider:
+    """
+    Replace the process-wide provider, to be called at startup before any client is created.
+    The clients already handed out by the previous provider (e.g. held by `OpenAI` clients) are
+    left open for their holders, only the new clients use the new settings.
+
+    Args:
+        **settings: The `HTTPClientProvider` arguments (pool limits, timeouts, `http2`).
+
+    Returns:
+        HTTPClientProvider: The new provider.
+    """
+    global _HTTP_CLIENT_PROVIDER
+    with _PROVIDER_LOCK:
+        if _HTTP_CLIENT_PROVIDER is not None and _HTTP_CLIENT_PROVIDER._client is not None:
+            logger.warning("The HTTP client provider is reconfigured after clients were created, they keep the previous settings")
+        _HTTP_CLIENT_PROVIDER = HTTPClientProvider(**settings)
+    return _HTTP_CLIENT_PROVIDER
@@ -0,0 +1,70 @@
+from collections import deque
+from typing import Optional, Any
+import threading
+from core.models.responses import UsageResponse
+
+class PromptCacheTracker:
+    """
+    A class to record prompt caching per request, so the cache-hit ratio of a
+    prompt prefix can be watched over time.
+
+    ## Methods:
+        `record()`: A method to record the usage of a request.
+
+        `snapshot()`: A method to get the totals, the overall and the recent cache-hit ratio.
+
+    ## Properties:
+        `records`: The most recent `(prompt_tokens, cached_tokens)` pairs.
+
+        `hit_ratio`: The share of prompt tokens served from the cache since creation.
+    """
+    def __init__(self, max_records: int = 1000):
+        self._lock = threading.Lock()
+        self._records: deque[tuple[int, int]] = deque(maxlen=max_records)
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+
+    def record(self, usage: Optional[UsageResponse]) -> None:
+        """
+        Record the prompt and cached tokens of a request.
+
+        Args:
+            usage (Optional[UsageResponse]): The usage of the request, ignored if None.
+        """
+        if usage is None:
+            return
+
+        cached_tokens = usage.prompt_tokens_details.cached_tokens if usage.prompt_tokens_details else 0
+        with self._lock:
+            self._records.append((usage.prompt_tokens, cached_tokens))
+            self.requests += 1
+            self.prompt_tokens += usage.prompt_tokens
+            self.cached_tokens += cached_tokens
+
+    @property
+    def records(self) -> list[tuple[int, int]]:
+        with self._lock:
+            return list(self._records)
+
+    @property
+    def hit_ratio(self) -> float:
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        Get a snapshot of the prompt caching statistics.
+
+        Returns:
+            dict[str, Any]: The request count, token totals, the overall hit ratio and the hit ratio of the recorded window.
+        """
+        with self._lock:
+            recent_prompt = sum(prompt for prompt, _ in self._records)
+            recent_cached = sum(cached for _, cached in self._records)
+            return {
+                "requests": self.requests,
+                "prompt_tokens": self.prompt_tokens,
+                "cached_tokens": self.cached_tokens,
+                "hit_ratio": self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0,
+                "recent_hit_ratio": recent_cached / recent_prompt if recent_prompt else 0.0,
+            }
@@ -1,7 +1,12 @@
 from functools import wraps
-from typing import Annotated, Literal, Callable
-from pydantic import create_model
+from typing import Annotated, Any, Literal, Callable, Optional, Union
+from pydantic import ConfigDict, Field, create_model
 import inspect
+import json
+from core.cache.tool_result_cache import ToolResultCache, is_none_result, register_tool_cache
+
+# The `_notification` argument is validated under this field name (pydantic fields cannot start with `_`)
+NOTIFICATION_FIELD = "openagent_notification"
 
 def tool(
     _func: Callable = None,
@@ -9,6 +14,14 @@ def tool(
     description: str = "",
     schema_type: Literal["OpenAI", "OpenAIRealtime"] = "OpenAI",
     add_tool_notification: bool = False,
+    timeout: Optional[float] = None,
+    max_concurrency: Optional[int] = None,
+    backend: Optional[Literal["inline", "thread", "process"]] = None,
+    cache_ttl: Optional[float] = None,
+    cache_max_entries: int = 256,
+    cache_negative_ttl: float = 0.0,
+    cache_is_negative: Optional[Callable[[Any], bool]] = None,
+    single_flight: bool = False,
     notification_message_guide: str = (
         "The notification that you say to the user when you are executing this tool. "
         "If you execute multiple tools, you must include all the tool names in this notification too and all the notifications must be the same."
@@ -17,9 +30,45 @@ def tool(
     def decorator(func: Callable):
         func.__tool_wrapped__ = True
 
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            return func(*args, **kwargs)
+        # Opt-in result cache (TTL + LRU) and/or single-flight coalescing of identical calls:
+        # `cache_ttl` alone caches results (`math.inf` to keep them until evicted), `single_flight=True`
+        # alone only coalesces concurrent identical calls (nothing is kept once they return, a cache
+        # TTL of 0), and both cache and coalesce
+        cache = None
+        if cache_ttl is not None or single_flight:
+            cache = ToolResultCache(
+                func,
+                ttl=cache_ttl if cache_ttl is not None else 0,
+                max_entries=cache_max_entries,
+                negative_ttl=cache_negative_ttl,
+                is_negative=cache_is_negative or is_none_result,
+                single_flight=single_flight,
+            )
+            register_tool_cache(cache)
+
+        if inspect.iscoroutinefunction(func):
+            # Keep async tools awaitable so async handlers can detect and await them natively
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                if cache is not None:
+                    return await cache.acall(func, args, kwargs)
+                return await func(*args, **kwargs)
+        else:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if cache is not None:
+                    return cache.call(func, args, kwargs)
+                return func(*args, **kwargs)
+
+        # The result cache of the tool (None when disabled), e.g. for `cache.stats()` or `cache.clear()`
+        wrapper.cache = cache
+
+        # Per-tool timeout (seconds) honoured by the ToolHandler, the call is abandoned or killed past it
+        wrapper.timeout = timeout
+        # Execution settings of the ToolExecutionEngine: the most calls running at once and the backend
+        # (None keeps the handler default, "process" for CPU-bound or untrusted tools)
+        wrapper.max_concurrency = max_concurrency
+        wrapper.backend = backend
 
         signature = inspect.signature(func)
         final_description = inspect.getdoc(func) or description
@@ -31,6 +80,39 @@ def tool(
 
         ToolArguments = create_model("ToolArguments", **model_fields)
         tool_arguments = ToolArguments.model_json_schema()
+
+        # Compiled once: the pydantic-core validator parses the JSON arguments and validates them in one pass.
+        # Strict mode: JSON values must already have the parameter types ("3" is not coerced to an int)
+        ToolCallArguments = create_model(
+            "ToolCallArguments",
+            __config__=ConfigDict(extra="forbid", strict=True),
+            **model_fields,
+            **{NOTIFICATION_FIELD: (Optional[str], Field(None, alias="_notification"))},
+        )
+
+        def decode_arguments(arguments: Union[str, dict, None]) -> tuple[dict[str, Any], Optional[str]]:
+            """
+            Decode and validate the arguments of a tool call.
+
+            Args:
+                arguments (Union[str, dict, None]): The JSON arguments sent by the model.
+
+            Returns:
+                tuple[dict[str, Any], Optional[str]]: The keyword arguments of the tool and the notification, if any.
+
+            Raises:
+                pydantic.ValidationError: If the arguments are not valid JSON or do not match the signature.
+            """
+            if isinstance(arguments, dict):
+                # Validated as the JSON it was decoded from, strict Python validation would reject enum and date strings
+                arguments = json.dumps(arguments)
+            parsed = ToolCallArguments.model_validate_json(arguments or "{}")
+            kwargs = dict(parsed.__dict__)
+            notification = kwargs.pop(NOTIFICATION_FIELD)
+            return kwargs, notification
+
+        wrapper.arguments_model = ToolArguments
+        wrapper.decode_arguments = decode_arguments
         tool_arguments.pop("title")
         tool_arguments["additionalProperties"] = False
 
@@ -0,0 +1,320 @@
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Union
+from loguru import logger
+import json
+import os
+import threading
+import time
+
+
+_current_span: ContextVar[Optional['Span']] = ContextVar("openagent_current_span", default=None)
+
+
+def _new_id() -> str:
+    return os.urandom(8).hex()
+
+
+class Span:
+    """
+    A timed operation with attributes, nested under the span that was active when it started.
+    Use it as a context manager, or `start_span()` / `end()` where a `with` block does not fit
+    (e.g. across the yields of a generator).
+
+    ## Methods:
+        `set_attribute()`: A method to set one attribute.
+
+        `set_attributes()`: A method to set several attributes.
+
+        `end()`: A method to close the span and hand it to the tracer.
+
+        `as_dict()`: A method to get the span as a JSON-serializable dictionary.
+    """
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "start_time",
+        "duration",
+        "attributes",
+        "error",
+        "_tracer",
+        "_start",
+        "_token",
+    )
+
+    def __init__(self, tracer: 'Tracer', name: str, parent: Optional['Span'], attributes: Dict[str, Any]):
+        self.name = name
+        self.span_id = _new_id()
+        self.trace_id = parent.trace_id if parent is not None else self.span_id
+        self.parent_id = parent.span_id if parent is not None else None
+        self.start_time = time.time()
+        self.duration: Optional[float] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+        self._tracer = tracer
+        self._start = time.perf_counter()
+        self._token = _current_span.set(self)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        """
+        Close the span, restore its parent as the active span and hand it to the tracer.
+
+        Args:
+            error (Optional[BaseException]): The exception that ended the span, if any.
+        """
+        if self.duration is not None:
+            return
+
+        self.duration = time.perf_counter() - self._start
+        if error is not None and not isinstance(error, GeneratorExit):
+            self.error = f"{type(error).__name__}: {error}"
+
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # Ended from another context (e.g. a generator closed by the garbage collector)
+            pass
+
+        self._tracer._finish(self)
+
+    def __enter__(self) -> 'Span':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        self.end(exc_value)
+        return False
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Get the span as a dictionary.
+
+        Returns:
+            Dict[str, Any]: The identifiers, timing, attributes and error of the span.
+        """
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "duration": self.duration,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """
+    The span returned while tracing is disabled, every method does nothing.
+    """
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, **attributes: Any) -> None:
+        pass
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        pass
+
+    def __enter__(self) -> '_NoopSpan':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class JSONLSpanExporter:
+    """
+    A span exporter appending one JSON object per finished span to a local file.
+
+    ## Methods:
+        `export()`: A method to write a finished span.
+
+        `close()`: A method to close the file.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, span: Span) -> None:
+        """
+        Write a finished span as a JSON line.
+
+        Args:
+            span (Span): The finished span.
+        """
+        line = json.dumps(span.as_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class Tracer:
+    """
+    A lightweight tracer keeping finished spans in an in-memory ring buffer and
+    forwarding them to exporters. While disabled, `span()` returns a shared no-op
+    span, so an instrumented call costs one attribute check.
+
+    ## Methods:
+        `span()`: A method to start a span, to be used as a context manager.
+
+        `start_span()`: A method to start a span that is closed explicitly with `end()`.
+
+        `current_span()`: A method to get the active span.
+
+        `spans()`: A method to get the buffered spans, optionally of one trace.
+
+        `add_exporter()`: A method to add a span exporter.
+
+        `clear()`: A method to empty the ring buffer.
+    """
+    def __init__(self,
+                 enabled: bool = False,
+                 buffer_size: int = 10000,
+                 exporters: Optional[List[JSONLSpanExporter]] = None):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._buffer: deque[Span] = deque(maxlen=buffer_size)
+        self._exporters = list(exporters or [])
+
+    def span(self, name: str, **attributes: Any) -> Union[Span, _NoopSpan]:
+        """
+        Start a span nested under the active span.
+
+        Args:
+            name (str): The name of the span (e.g. `llm.generate`).
+            **attributes: The attributes of the span.
+
+        Returns:
+            Union[Span, _NoopSpan]: The span, or the no-op span when tracing is disabled.
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, _current_span.get(), attributes)
+
+    start_span = span
+
+    def current_span(self) -> Union[Span, _NoopSpan]:
+        """
+        Get the active span.
+
+        Returns:
+            Union[Span, _NoopSpan]: The active span, or the no-op span if there is none.
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        return _current_span.get() or NOOP_SPAN
+
+    def _finish(self, span: Span) -> None:
+        with self._lock:
+            self._buffer.append(span)
+
+        for exporter in self._exporters:
+            try:
+                exporter.export(span)
+            except Exception as e:
+                logger.warning(f"Span exporter {type(exporter).__name__} failed: {e}")
+
+    def spans(self, trace_id: Optional[str] = None) -> List[Span]:
+        """
+        Get the finished spans in the ring buffer.
+
+        Args:
+            trace_id (Optional[str]): Only return the spans of this trace.
+
+        Returns:
+            List[Span]: The spans, oldest first.
+        """
+        with self._lock:
+            spans = list(self._buffer)
+        if trace_id is not None:
+            spans = [span for span in spans if span.trace_id == trace_id]
+        return spans
+
+    def add_exporter(self, exporter: JSONLSpanExporter) -> None:
+        self._exporters.append(exporter)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buffer.clear()
+
+
+_TRACER = Tracer(
+    enabled=os.getenv("OPENAGENT_TRACING", "").lower() in ("1", "true", "yes"),
+    exporters=[JSONLSpanExporter(os.environ["OPENAGENT_TRACE_FILE"])] if os.getenv("OPENAGENT_TRACE_FILE") else None,
+)
+
+
+def get_tracer() -> Tracer:
+    """
+    Get the process-wide tracer. It is disabled unless the `OPENAGENT_TRACING`
+    environment variable is set, `OPENAGENT_TRACE_FILE` adds a JSONL exporter.
+
+    Returns:
+        Tracer: The process-wide tracer.
+    """
+    return _TRACER
+
+
+def configure_tracing(enabled: bool = True,
+                      jsonl_path: Optional[str] = None,
+                      buffer_size: Optional[int] = None) -> Tracer:
+    """
+    Configure the process-wide tracer.
+
+    Args:
+        enabled (bool): Whether spans are recorded.
+        jsonl_path (Optional[str]): A file to append the finished spans to as JSON lines.
+        buffer_size (Optional[int]): The size of the in-memory ring buffer, the buffer is emptied when it changes.
+
+    Returns:
+        Tracer: The process-wide tracer.
+    """
+    if buffer_size is not None:
+        with _TRACER._lock:
+            _TRACER._buffer = deque(maxlen=buffer_size)
+    if jsonl_path is not None:
+        _TRACER.add_exporter(JSONLSpanExporter(jsonl_path))
+    _TRACER.enabled = enabled
+    return _TRACER
+
+
+def usage_attributes(usage: Any) -> Dict[str, int]:
+    """
+    Get the token counts of a `UsageResponse` as span attributes.
+
+    Args:
+        usage (Any): The usage response, may be None.
+
+    Returns:
+        Dict[str, int]: The prompt, completion and cached token counts.
+    """
+    if usage is None:
+        return {}
+
+    return {
+        "prompt_tokens": usage.prompt_tokens,
+        "completion_tokens": usage.completion_tokens,
+        "cached_tokens": usage.prompt_tokens_details.cached_tokens if usage.prompt_tokens_details else 0,
+    }
@@ -0,0 +1,407 @@
+from bisect import bisect_left
+from collections import deque
+from itertools import count
+from typing import Any, Dict, List, Optional
+import threading
+import time
+from core.models.responses import UsageResponse
+
+
+def _latency_bounds(min_latency: float = 0.001, max_latency: float = 600.0, growth: float = 1.2) -> List[float]:
+    bounds = []
+    bound = min_latency
+    while bound < max_latency:
+        bounds.append(bound)
+        bound *= growth
+    bounds.append(max_latency)
+    return bounds
+
+# Log-spaced bucket upper bounds (1ms to 10min, ~20% apart) shared by every histogram
+LATENCY_BOUNDS = _latency_bounds()
+
+
+class LatencyHistogram:
+    """
+    A fixed-bucket latency histogram, recording is a bisect and an increment,
+    percentiles are read back with the precision of a bucket (~20%).
+
+    ## Methods:
+        `record()`: A method to record a latency in seconds.
+
+        `percentile()`: A method to get an approximate latency percentile.
+
+        `merge()`: A method to add the counts of another histogram.
+
+        `snapshot()`: A method to get the count, mean, max and the p50/p90/p99 latencies.
+    """
+    __slots__ = ("_counts", "count", "total", "max")
+
+    def __init__(self):
+        self._counts = [0] * (len(LATENCY_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        """
+        Record a latency.
+
+        Args:
+            seconds (float): The latency in seconds.
+        """
+        self._counts[bisect_left(LATENCY_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        """
+        Get an approximate latency percentile.
+
+        Args:
+            q (float): The percentile, between 0 and 100.
+
+        Returns:
+            float: The upper bound of the bucket holding the percentile, capped by the max latency.
+        """
+        if not self.count:
+            return 0.0
+
+        rank = q / 100 * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self._counts):
+            cumulative += bucket_count
+            if bucket_count and cumulative >= rank:
+                bound = LATENCY_BOUNDS[index] if index < len(LATENCY_BOUNDS) else self.max
+                return min(bound, self.max)
+        return self.max
+
+    def merge(self, other: 'LatencyHistogram') -> None:
+        """
+        Add the counts of another histogram.
+
+        Args:
+            other (LatencyHistogram): The histogram to merge.
+        """
+        for index, bucket_count in enumerate(other._counts):
+            if bucket_count:
+                self._counts[index] += bucket_count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def snapshot(self) -> Dict[str, float]:
+        """
+        Get a snapshot of the histogram.
+
+        Returns:
+            Dict[str, float]: The count, mean, max and the p50/p90/p99 latencies in seconds.
+        """
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+class UsageCounters:
+    """
+    Token and call counters accumulated from `UsageResponse` objects.
+
+    ## Methods:
+        `add_usage()`: A method to add the usage of a model call.
+
+        `merge()`: A method to add the counters of another instance.
+
+        `as_dict()`: A method to get the counters as a dictionary.
+    """
+    __slots__ = (
+        "prompt_tokens",
+        "completion_tokens",
+        "cached_tokens",
+        "reasoning_tokens",
+        "audio_prompt_tokens",
+        "audio_completion_tokens",
+        "model_calls",
+        "tool_calls",
+    )
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def add_usage(self, usage: Optional[UsageResponse]) -> None:
+        """
+        Add the usage of a model call, the call is counted even without usage.
+
+        Args:
+            usage (Optional[UsageResponse]): The usage reported by the model.
+        """
+        self.model_calls += 1
+        if usage is None:
+            return
+
+        self.prompt_tokens += usage.prompt_tokens
+        self.completion_tokens += usage.completion_tokens
+        if usage.prompt_tokens_details:
+            self.cached_tokens += usage.prompt_tokens_details.cached_tokens
+            self.audio_prompt_tokens += usage.prompt_tokens_details.audio_tokens
+        if usage.completion_tokens_details:
+            self.reasoning_tokens += usage.completion_tokens_details.reasoning_tokens
+            self.audio_completion_tokens += usage.completion_tokens_details.audio_tokens
+
+    def merge(self, other: 'UsageCounters') -> None:
+        """
+        Add the counters of another instance.
+
+        Args:
+            other (UsageCounters): The counters to merge.
+        """
+        for name in self.__slots__:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+    def as_dict(self) -> Dict[str, int]:
+        """
+        Get the counters as a dictionary.
+
+        Returns:
+            Dict[str, int]: The counters and the total tokens.
+        """
+        counters = {name: getattr(self, name) for name in self.__slots__}
+        counters["total_tokens"] = self.total_tokens
+        return counters
+
+
+class TurnUsage:
+    """
+    The usage of a single turn, from the user message to the final answer.
+    A turn is owned by one executor call, so recording into it takes no lock.
+
+    ## Methods:
+        `record_model_call()`: A method to record a model call and its latency.
+
+        `record_first_token()`: A method to record the time to the first streamed token.
+
+        `record_tool_calls()`: A method to count executed tool calls.
+
+        `as_dict()`: A method to get the turn as a dictionary.
+    """
+    __slots__ = (
+        "turn_id",
+        "session",
+        "started_at",
+        "latency",
+        "first_token_latency",
+        "counters",
+        "model_latencies",
+        "_start",
+    )
+
+    def __init__(self, turn_id: int, session: str):
+        self.turn_id = turn_id
+        self.session = session
+        self.started_at = time.time()
+        self.latency: Optional[float] = None
+        self.first_token_latency: Optional[float] = None
+        self.counters = UsageCounters()
+        self.model_latencies: List[float] = []
+        self._start = time.perf_counter()
+
+    def elapsed(self) -> float:
+        """
+        Get the wall-clock time since the turn started.
+
+        Returns:
+            float: The elapsed time in seconds.
+        """
+        return time.perf_counter() - self._start
+
+    def record_model_call(self, usage: Optional[UsageResponse], latency: float) -> None:
+        """
+        Record a model call.
+
+        Args:
+            usage (Optional[UsageResponse]): The usage reported by the model.
+            latency (float): The wall-clock latency of the call in seconds.
+        """
+        self.counters.add_usage(usage)
+        self.model_latencies.append(latency)
+
+    def record_first_token(self) -> None:
+        """
+        Record the time to the first streamed token of the turn, later calls are ignored.
+        """
+        if self.first_token_latency is None:
+            self.first_token_latency = self.elapsed()
+
+    def record_tool_calls(self, tool_calls: int) -> None:
+        """
+        Count executed tool calls.
+
+        Args:
+            tool_calls (int): The number of tool calls.
+        """
+        self.counters.tool_calls += tool_calls
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Get the turn as a dictionary.
+
+        Returns:
+            Dict[str, Any]: The identifiers, latencies and counters of the turn.
+        """
+        return {
+            "turn_id": self.turn_id,
+            "session": self.session,
+            "started_at": self.started_at,
+            "latency": self.latency,
+            "first_token_latency": self.first_token_latency,
+            **self.counters.as_dict(),
+        }
+
+
+class UsageTracker:
+    """
+    A class to aggregate token usage, call counts and latencies per turn and
+    per session. A session tracker forwards every finished turn to its parent,
+    usually the process-wide tracker returned by `get_process_usage_tracker()`.
+
+    ## Methods:
+        `start_turn()`: A method to start recording a turn.
+
+        `end_turn()`: A method to finish a turn and add it to the totals.
+
+        `snapshot()`: A method to get the totals, latency percentiles and the slowest and most expensive recent turns.
+
+        `reset()`: A method to clear every counter.
+
+    ## Properties:
+        `totals`: A copy of the accumulated counters.
+
+        `turns`: The most recent finished turns.
+    """
+    _turn_ids = count(1)
+
+    def __init__(self,
+                 session: str = "default",
+                 max_turns: int = 1000,
+                 parent: Optional['UsageTracker'] = None):
+        self.session = session
+        self.parent = parent
+        self._lock = threading.Lock()
+        self._max_turns = max_turns
+        self._init_counters()
+
+    def _init_counters(self) -> None:
+        self._totals = UsageCounters()
+        self._turns: deque[TurnUsage] = deque(maxlen=self._max_turns)
+        self._turn_count = 0
+        self._turn_latency = LatencyHistogram()
+        self._model_latency = LatencyHistogram()
+        self._first_token_latency = LatencyHistogram()
+
+    @property
+    def totals(self) -> UsageCounters:
+        with self._lock:
+            totals = UsageCounters()
+            totals.merge(self._totals)
+            return totals
+
+    @property
+    def turns(self) -> List[TurnUsage]:
+        with self._lock:
+            return list(self._turns)
+
+    def start_turn(self) -> TurnUsage:
+        """
+        Start recording a turn.
+
+        Returns:
+            TurnUsage: The turn to record model and tool calls into.
+        """
+        return TurnUsage(next(self._turn_ids), self.session)
+
+    def end_turn(self, turn: TurnUsage) -> None:
+        """
+        Finish a turn and add it to the totals of this tracker and its parents.
+
+        Args:
+            turn (TurnUsage): The turn returned by `start_turn()`.
+        """
+        if turn.latency is None:
+            turn.latency = turn.elapsed()
+        self._add_turn(turn)
+
+    def _add_turn(self, turn: TurnUsage) -> None:
+        with self._lock:
+            self._totals.merge(turn.counters)
+            self._turns.append(turn)
+            self._turn_count += 1
+            self._turn_latency.record(turn.latency)
+            for latency in turn.model_latencies:
+                self._model_latency.record(latency)
+            if turn.first_token_latency is not None:
+                self._first_token_latency.record(turn.first_token_latency)
+
+        if self.parent is not None:
+            self.parent._add_turn(turn)
+
+    def snapshot(self, top_n: int = 5) -> Dict[str, Any]:
+        """
+        Get a snapshot of the aggregated usage.
+
+        Args:
+            top_n (int): The number of slowest and most expensive recent turns to include.
+
+        Returns:
+            Dict[str, Any]: The session name, the turn count, the token and call totals,
+            the latency percentiles and the slowest and most expensive recent turns.
+        """
+        with self._lock:
+            turns = list(self._turns)
+            snapshot = {
+                "session": self.session,
+                "turns": self._turn_count,
+                "totals": self._totals.as_dict(),
+                "latency": {
+                    "turn": self._turn_latency.snapshot(),
+                    "model_call": self._model_latency.snapshot(),
+                    "first_token": self._first_token_latency.snapshot(),
+                },
+            }
+
+        snapshot["slowest_turns"] = [
+            turn.as_dict() for turn in sorted(turns, key=lambda turn: turn.latency, reverse=True)[:top_n]
+        ]
+        snapshot["most_expensive_turns"] = [
+            turn.as_dict() for turn in sorted(turns, key=lambda turn: turn.counters.total_tokens, reverse=True)[:top_n]
+        ]
+        return snapshot
+
+    def reset(self) -> None:
+        """
+        Clear every counter of this tracker, the parent keeps its totals.
+        """
+        with self._lock:
+            self._init_counters()
+
+
+_PROCESS_USAGE_TRACKER = UsageTracker(session="process")
+
+
+def get_process_usage_tracker() -> UsageTracker:
+    """
+    Get the process-wide usage tracker every session tracker reports to by default.
+
+    Returns:
+        UsageTracker: The process-wide tracker.
+    """
+    return _PROCESS_USAGE_TRACKER
@@ -0,0 +1,6 @@
+from .conversation_store import ConversationStore
+from .vector_store import VectorStore, VectorSearchResult
+from .ivf_index import IVFIndex
+from .bm25_index import BM25Index
+from .hybrid_retriever import HybridRetriever, reciprocal_rank_fusion
+from .knowledge_ingestion import KnowledgeIngestor, split_text
\ No newline at end of file
@@ -0,0 +1,325 @@
+from array import array
+from typing import Any, Dict, List, Optional
+from loguru import logger
+import json
+import math
+import os
+import re
+import threading
+import numpy as np
+from .vector_store import VectorSearchResult, VectorStore, top_k
+
+# Words, and identifiers joined by "-", "_", ".", "/" or ":" (e.g. "TCK-1042", "v2.3.1")
+_TOKEN_PATTERN = re.compile(r"\w+(?:[-./:]\w+)*")
+_SPLIT_PATTERN = re.compile(r"[-./:_]")
+_IDENTIFIER_PATTERN = re.compile(r"\d|[-./:_]")
+
+MAX_TERM_FREQUENCY = 65535
+
+_FILES = ("ids", "tfs", "offsets", "lengths")
+_VERSIONED_FILE = re.compile(r"bm25_[a-z]+\.(\d+)\.npy$")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split a text into lowercase terms. Compound identifiers are kept whole and also split
+    into their parts, so "TCK-1042" matches both "tck-1042" and "1042".
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        List[str]: The terms, in order, with repetitions.
+    """
+    terms = []
+    for token in _TOKEN_PATTERN.findall(text.casefold()):
+        terms.append(token)
+        if _SPLIT_PATTERN.search(token):
+            terms.extend(part for part in _SPLIT_PATTERN.split(token) if part)
+    return terms
+
+
+def is_identifier(term: str) -> bool:
+    """
+    Whether a term looks like an identifier (a ticket number, a product code, a version)
+    rather than a word, i.e. it holds a digit or a separator.
+    """
+    return bool(_IDENTIFIER_PATTERN.search(term))
+
+
+class _BM25State:
+    # Swapped as a whole, so a search never mixes two versions of the index
+    __slots__ = ("terms", "ids", "tfs", "offsets", "saved_rows", "delta", "lengths", "total_length")
+
+    def __init__(self,
+                 terms: Dict[str, int],
+                 ids: np.ndarray,
+                 tfs: np.ndarray,
+                 offsets: np.ndarray,
+                 saved_rows: int,
+                 delta: Dict[str, tuple[np.ndarray, np.ndarray]],
+                 lengths: np.ndarray,
+                 total_length: int):
+        # Saved postings: term -> position in the offsets of the memory-mapped arrays
+        self.terms = terms
+        self.ids = ids
+        self.tfs = tfs
+        self.offsets = offsets
+        self.saved_rows = saved_rows
+        # Postings of the rows indexed since the last save
+        self.delta = delta
+        self.lengths = lengths
+        self.total_length = total_length
+
+    def postings(self, term: str) -> tuple[np.ndarray, np.ndarray]:
+        position = self.terms.get(term)
+        delta = self.delta.get(term)
+        if position is None:
+            return delta if delta is not None else (np.empty(0, dtype=np.int32), np.empty(0, dtype=np.uint16))
+        start, stop = self.offsets[position], self.offsets[position + 1]
+        if delta is None:
+            return self.ids[start:stop], self.tfs[start:stop]
+        return np.concatenate([self.ids[start:stop], delta[0]]), np.concatenate([self.tfs[start:stop], delta[1]])
+
+
+_EMPTY_STATE = _BM25State({}, np.empty(0, dtype=np.int32), np.empty(0, dtype=np.uint16), np.zeros(1, dtype=np.int64), 0, {}, np.empty(0, dtype=np.int32), 0)
+
+
+class BM25Index:
+    """
+    A BM25 inverted index over the texts of a `VectorStore`, answering keyword and exact
+    identifier lookups without an embedding call.
+
+    Postings are compact: per term, one array of row ids and one array of term frequencies.
+    The saved postings of every term are concatenated in `bm25_ids.<version>.npy` and
+    `bm25_tfs.<version>.npy` and memory-mapped on open, and rows added to the store since are
+    indexed in memory on the next `sync()` (run on every search) until `save()` merges them
+    into a new version of the files. `bm25.json`, written last, names the current version.
+
+    ## Methods:
+        `sync()`: A method to index the rows added to the store since the last call.
+
+        `save()`: A method to write the postings to the store directory.
+
+        `scores()`: A method to get the BM25 score of every row matching a query.
+
+        `search()`: A method to get the k best matching stored texts of a query.
+
+        `stats()`: A method to get the size of the index.
+    """
+    def __init__(self,
+                 store: VectorStore,
+                 k1: float = 1.5,
+                 b: float = 0.75,
+                 autosave_rows: int = 50000):
+        self.store = store
+        self.k1 = k1
+        self.b = b
+        self.autosave_rows = autosave_rows
+
+        self._meta_path = os.path.join(store.path, "bm25.json")
+        self._version = 0
+
+        self._lock = threading.Lock()
+        self._state = self._load()
+
+    def _paths(self, version: int) -> Dict[str, str]:
+        return {name: os.path.join(self.store.path, f"bm25_{name}.{version}.npy") for name in _FILES}
+
+    def _load(self) -> _BM25State:
+        if not os.path.exists(self._meta_path):
+            return _EMPTY_STATE
+        with open(self._meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self._version = meta.get("version", 0)
+        paths = self._paths(self._version)
+        if meta["rows"] > len(self.store):
+            logger.warning(f"The BM25 index at '{self.store.path}' is ahead of its store, it is rebuilt")
+            return _EMPTY_STATE
+        if not all(os.path.exists(path) for path in paths.values()):
+            logger.warning(f"Files of the BM25 index at '{self.store.path}' are missing, it is rebuilt")
+            return _EMPTY_STATE
+
+        lengths = np.load(paths["lengths"])
+        return _BM25State(
+            terms={term: position for position, term in enumerate(meta["terms"])},
+            ids=np.load(paths["ids"], mmap_mode="r"),
+            tfs=np.load(paths["tfs"], mmap_mode="r"),
+            offsets=np.load(paths["offsets"]),
+            saved_rows=meta["rows"],
+            delta={},
+            lengths=lengths,
+            total_length=int(lengths.sum()),
+        )
+
+    def __len__(self) -> int:
+        return len(self._state.lengths)
+
+    def sync(self) -> int:
+        """
+        Index the rows added to the store since the last call.
+
+        Returns:
+            int: The number of rows indexed.
+        """
+        if len(self._state.lengths) >= len(self.store):
+            return len(self._state.lengths)
+
+        with self._lock:
+            state = self._state
+            start, stop = len(state.lengths), len(self.store)
+            if start < stop:
+                lengths = array("i")
+                batch: Dict[str, tuple[array, array]] = {}
+                for row, (text, _) in enumerate(self.store.records(start, stop), start):
+                    terms = tokenize(text)
+                    lengths.append(len(terms))
+                    frequencies: Dict[str, int] = {}
+                    for term in terms:
+                        frequencies[term] = frequencies.get(term, 0) + 1
+                    for term, frequency in frequencies.items():
+                        postings = batch.get(term)
+                        if postings is None:
+                            postings = batch[term] = (array("i"), array("H"))
+                        postings[0].append(row)
+                        postings[1].append(min(frequency, MAX_TERM_FREQUENCY))
+
+                # Copy on write, searches in progress keep reading the previous postings
+                delta = dict(state.delta)
+                for term, (ids, tfs) in batch.items():
+                    ids, tfs = np.array(ids, dtype=np.int32), np.array(tfs, dtype=np.uint16)
+                    previous = delta.get(term)
+                    if previous is not None:
+                        ids, tfs = np.concatenate([previous[0], ids]), np.concatenate([previous[1], tfs])
+                    delta[term] = (ids, tfs)
+
+                self._state = state = _BM25State(
+                    terms=state.terms,
+                    ids=state.ids,
+                    tfs=state.tfs,
+                    offsets=state.offsets,
+                    saved_rows=state.saved_rows,
+                    delta=delta,
+                    lengths=np.concatenate([state.lengths, np.array(lengths, dtype=np.int32)]),
+                    total_length=state.total_length + sum(lengths),
+                )
+                logger.debug(f"Indexed rows {start} to {stop} of '{self.store.path}' for BM25")
+                if len(state.lengths) - state.saved_rows >= self.autosave_rows:
+                    self._save()
+        return len(self._state.lengths)
+
+    def save(self) -> None:
+        """
+        Merge the postings indexed since the last save into the files of the store directory.
+        """
+        self.sync()
+        with self._lock:
+            if len(self._state.lengths) > self._state.saved_rows:
+                self._save()
+
+    def _save(self) -> None:
+        state = self._state
+        terms = list(state.terms)
+        terms.extend(term for term in state.delta if term not in state.terms)
+
+        ids, tfs = [], []
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        for position, term in enumerate(terms):
+            term_ids, term_tfs = state.postings(term)
+            ids.append(term_ids)
+            tfs.append(term_tfs)
+            offsets[position + 1] = offsets[position] + len(term_ids)
+
+        # Saved row ids are all smaller than the new ones, so the merged postings stay sorted
+        version = self._version + 1
+        paths = self._paths(version)
+        for name, values in (("ids", np.concatenate(ids) if ids else np.empty(0, dtype=np.int32)),
+                             ("tfs", np.concatenate(tfs) if tfs else np.empty(0, dtype=np.uint16)),
+                             ("offsets", offsets),
+                             ("lengths", state.lengths)):
+            with open(paths[name], "wb") as f:
+                np.save(f, values)
+
+        # The metadata is the commit point, written last
+        with open(f"{self._meta_path}.tmp", "w", encoding="utf-8") as f:
+            json.dump({"version": version, "rows": len(state.lengths), "k1": self.k1, "b": self.b, "terms": terms}, f, ensure_ascii=False)
+        os.replace(f"{self._meta_path}.tmp", self._meta_path)
+        self._state = self._load()
+
+        # The previous version may still be memory-mapped by a search in progress (and on Windows cannot be removed yet)
+        for name in os.listdir(self.store.path):
+            match = _VERSIONED_FILE.match(name)
+            if match is not None and int(match.group(1)) != version:
+                try:
+                    os.remove(os.path.join(self.store.path, name))
+                except OSError as e:
+                    logger.debug(f"Could not remove the stale BM25 file '{name}': {e}")
+
+    def scores(self, query: str) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get the BM25 score of every row matching at least one term of a query.
+
+        Args:
+            query (str): The query.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The matching rows and their scores.
+        """
+        self.sync()
+        state = self._state
+        rows = len(state.lengths)
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        lengths = state.lengths
+        average_length = max(state.total_length / rows, 1.0)
+        matched_ids, contributions = [], []
+        for term in set(tokenize(query)):
+            ids, tfs = state.postings(term)
+            if not len(ids):
+                continue
+            idf = math.log(1.0 + (rows - len(ids) + 0.5) / (len(ids) + 0.5))
+            tfs = tfs.astype(np.float32)
+            norms = self.k1 * (1.0 - self.b + self.b * lengths[ids] / average_length)
+            matched_ids.append(ids)
+            contributions.append(idf * tfs * (self.k1 + 1.0) / (tfs + norms))
+
+        if not matched_ids:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        if len(matched_ids) == 1:
+            return matched_ids[0].astype(np.int64), contributions[0]
+        matched, positions = np.unique(np.concatenate(matched_ids), return_inverse=True)
+        return matched.astype(np.int64), np.bincount(positions, weights=np.concatenate(contributions)).astype(np.float32)
+
+    def search(self, query: str, k: int = 5, min_score: Optional[float] = None) -> List[VectorSearchResult]:
+        """
+        Get the k stored texts with the highest BM25 score for a query.
+
+        Args:
+            query (str): The query.
+            k (int): The number of results.
+            min_score (Optional[float]): The minimum BM25 score of a result.
+
+        Returns:
+            List[VectorSearchResult]: The results, best first, scored with BM25.
+        """
+        rows, scores = self.scores(query)
+        if not len(rows) or k <= 0:
+            return []
+        positions, best = top_k(scores, k)
+        return self.store.results(rows[positions], best, k, min_score)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the index statistics.
+
+        Returns:
+            Dict[str, Any]: The indexed and saved rows, the terms and the postings.
+        """
+        state = self._state
+        return {
+            "rows": len(state.lengths),
+            "saved_rows": state.saved_rows,
+            "terms": len(state.terms) + sum(1 for term in state.delta if term not in state.terms),
+            "postings": len(state.ids) + sum(len(ids) for ids, _ in state.delta.values()),
+        }
@@ -0,0 +1,330 @@
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from loguru import logger
+from pydantic import BaseModel
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+if TYPE_CHECKING:
+    from core.interfaces.base_executor import BaseExecutor
+
+
+def _to_jsonable(value: Any) -> Any:
+    # Messages appended directly (not through an executor) may still hold pydantic objects
+    if isinstance(value, BaseModel):
+        return value.model_dump(exclude_none=True)
+    return str(value)
+
+
+class ConversationStore:
+    """
+    An append-only, per-session conversation store backed by SQLite.
+
+    Messages are enqueued on the request thread and written in batches by a background
+    writer thread, so persisting never blocks a turn. Every message is one row keyed on
+    `(session_id, seq)`, so an append and loading the latest messages of a session cost
+    the same whatever the length of the conversation. Rows are only ever inserted, and `seq`
+    is computed inside the write transaction, so several processes can share one database.
+
+    ## Methods:
+        `append()`: A method to enqueue one message of a session.
+
+        `extend()`: A method to enqueue several messages of a session.
+
+        `load_recent()`: A method to load the most recent messages of a session.
+
+        `attach()`: A method to resume a session into an executor and persist its new messages.
+
+        `count()`: A method to get the number of stored messages of a session.
+
+        `delete_session()`: A method to delete every message of a session.
+
+        `flush()`: A method to wait until the queued messages are written.
+
+        `stats()`: A method to get the written, queued and dropped message counters.
+
+        `close()`: A method to flush the queue and stop the writer thread.
+    """
+    def __init__(self,
+                 path: str = "conversations.sqlite",
+                 batch_size: int = 256,
+                 max_queue: int = 10000,
+                 flush_timeout: float = 5.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_timeout = flush_timeout
+        self.max_queue = max_queue
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Every `extend()` is one item, the queue is bounded by its number of messages
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._counter_lock = threading.Lock()
+        self._queued = 0
+        self._read_lock = threading.Lock()
+        self._reader = sqlite3.connect(path, check_same_thread=False)
+        with self._read_lock:
+            self._reader.execute("PRAGMA journal_mode=WAL")
+            # Clustered on (session_id, seq): appends and tail reads are index range operations
+            self._reader.execute(
+                "CREATE TABLE IF NOT EXISTS messages ("
+                "session_id TEXT NOT NULL, seq INTEGER NOT NULL, role TEXT, payload TEXT NOT NULL, "
+                "created_at REAL NOT NULL, PRIMARY KEY (session_id, seq)) WITHOUT ROWID"
+            )
+            self._reader.commit()
+
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="ConversationStoreWriter", daemon=True)
+        self._writer.start()
+
+    def append(self, session_id: str, message: Dict[str, Any]) -> bool:
+        """
+        Enqueue one message, it is written by the background writer.
+
+        Args:
+            session_id (str): The session identifier.
+            message (Dict[str, Any]): The message.
+
+        Returns:
+            bool: False if the queue was full and the message was dropped.
+        """
+        return self.extend(session_id, [message])
+
+    def extend(self, session_id: str, messages: List[Dict[str, Any]]) -> bool:
+        """
+        Enqueue several messages of a session, in order. They are enqueued or dropped
+        together, so an assistant message is never stored without its tool messages.
+
+        Args:
+            session_id (str): The session identifier.
+            messages (List[Dict[str, Any]]): The messages.
+
+        Returns:
+            bool: False if the queue was full and the messages were dropped.
+        """
+        if self._closed:
+            raise RuntimeError("The conversation store is closed")
+        if not messages:
+            return True
+
+        with self._counter_lock:
+            if self._queued + len(messages) > self.max_queue:
+                self.dropped += len(messages)
+                logger.warning(f"Conversation store queue is full, dropping {len(messages)} messages of session '{session_id}'")
+                return False
+            self._queued += len(messages)
+        self._queue.put_nowait((session_id, list(messages), time.time()))
+        return True
+
+    def _write_loop(self) -> None:
+        # Transactions are explicit, `BEGIN IMMEDIATE` takes the write lock before `seq` is read
+        connection = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            size = len(item[1]) if isinstance(item, tuple) else 0
+            while size < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(item)
+                size += len(item[1]) if isinstance(item, tuple) else 0
+            with self._counter_lock:
+                self._queued -= size
+
+            stop = False
+            sessions: Dict[str, List[tuple]] = {}
+            try:
+                for entry in batch:
+                    if entry is None:
+                        stop = True
+                        continue
+                    if isinstance(entry, threading.Event):
+                        continue
+
+                    session_id, messages, created_at = entry
+                    for message in messages:
+                        try:
+                            payload = json.dumps(message, ensure_ascii=False, default=_to_jsonable)
+                        except (TypeError, ValueError) as e:
+                            logger.warning(f"Skipping a message of session '{session_id}' that cannot be serialized: {e}")
+                            continue
+                        sessions.setdefault(session_id, []).append((message.get("role"), payload, created_at))
+
+                if sessions:
+                    self._write_batch(connection, sessions)
+            except Exception as e:
+                count = sum(len(messages) for messages in sessions.values())
+                with self._counter_lock:
+                    self.dropped += count
+                logger.error(f"Failed to write {count} messages to the conversation store: {e}")
+            finally:
+                # Flush markers are released once everything queued before them is handled
+                for entry in batch:
+                    if isinstance(entry, threading.Event):
+                        entry.set()
+                    self._queue.task_done()
+
+            if stop:
+                break
+
+        connection.close()
+
+    def _write_batch(self, connection: sqlite3.Connection, sessions: Dict[str, List[tuple]]) -> None:
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            rows = []
+            for session_id, messages in sessions.items():
+                last = connection.execute("SELECT MAX(seq) FROM messages WHERE session_id = ?", (session_id,)).fetchone()[0]
+                seq = last or 0
+                for role, payload, created_at in messages:
+                    seq += 1
+                    rows.append((session_id, seq, role, payload, created_at))
+            connection.executemany(
+                "INSERT INTO messages (session_id, seq, role, payload, created_at) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        self.written += len(rows)
+        self.batches += 1
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until the messages queued so far are written.
+
+        Args:
+            timeout (Optional[float]): The maximum time to wait in seconds.
+
+        Returns:
+            bool: True if the queue was flushed in time.
+        """
+        if self._closed:
+            return True
+        if not self._writer.is_alive():
+            logger.error("The conversation store writer is not running, queued messages cannot be flushed")
+            return False
+        marker = threading.Event()
+        self._queue.put(marker)
+        return marker.wait(timeout)
+
+    def _flush_before_read(self) -> None:
+        if not self.flush(timeout=self.flush_timeout):
+            logger.warning(f"Conversation store not flushed within {self.flush_timeout}s, reading the committed messages")
+
+    def load_recent(self, session_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Load the most recent messages of a session, starting at a user message so
+        that tool results are never separated from their tool calls.
+
+        Args:
+            session_id (str): The session identifier.
+            limit (int): The maximum number of messages to load.
+
+        Returns:
+            List[Dict[str, Any]]: The messages, oldest first.
+        """
+        self._flush_before_read()
+        with self._read_lock:
+            rows = self._reader.execute(
+                "SELECT payload FROM messages WHERE session_id = ? ORDER BY seq DESC LIMIT ?",
+                (session_id, limit),
+            ).fetchall()
+
+        messages = [json.loads(payload) for (payload,) in reversed(rows)]
+        start = next((index for index, message in enumerate(messages) if message.get("role") == "user"), len(messages))
+        return messages[start:]
+
+    def attach(self, executor: 'BaseExecutor', session_id: str, resume: int = 50) -> 'BaseExecutor':
+        """
+        Resume the most recent messages of a session into an executor and persist
+        every message it adds from now on.
+
+        Args:
+            executor (BaseExecutor): The executor of the session.
+            session_id (str): The session identifier.
+            resume (int): The maximum number of messages to resume, 0 to start empty.
+
+        Returns:
+            BaseExecutor: The executor.
+        """
+        if resume:
+            messages = self.load_recent(session_id, limit=resume)
+            if messages:
+                # Extend before the listener is set, the resumed messages are already stored
+                executor.extend_context(messages)
+                logger.debug(f"Resumed {len(messages)} messages of session '{session_id}'")
+
+        executor.set_history_listener(lambda messages: self.extend(session_id, messages))
+        return executor
+
+    def count(self, session_id: str) -> int:
+        """
+        Get the number of stored messages of a session.
+
+        Args:
+            session_id (str): The session identifier.
+
+        Returns:
+            int: The number of messages.
+        """
+        self._flush_before_read()
+        with self._read_lock:
+            return self._reader.execute("SELECT COUNT(*) FROM messages WHERE session_id = ?", (session_id,)).fetchone()[0]
+
+    def delete_session(self, session_id: str) -> int:
+        """
+        Delete every message of a session.
+
+        Args:
+            session_id (str): The session identifier.
+
+        Returns:
+            int: The number of deleted messages.
+        """
+        self._flush_before_read()
+        with self._read_lock:
+            cursor = self._reader.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            self._reader.commit()
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the store counters.
+
+        Returns:
+            Dict[str, Any]: The written messages, write batches, queued and dropped messages.
+        """
+        return {
+            "written": self.written,
+            "batches": self.batches,
+            "queued": self._queued,
+            "dropped": self.dropped,
+        }
+
+    def close(self) -> None:
+        """
+        Write the queued messages and stop the writer thread.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join()
+        with self._read_lock:
+            self._reader.close()
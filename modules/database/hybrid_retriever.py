@@ -0,0 +1,142 @@
+from collections import OrderedDict
+from typing import Dict, List, Literal, Optional, Sequence, Union
+from loguru import logger
+import threading
+import numpy as np
+from .bm25_index import BM25Index, is_identifier, tokenize
+from .ivf_index import IVFIndex
+from .vector_store import VectorSearchResult, VectorStore
+
+RetrievalMode = Literal["auto", "hybrid", "semantic", "lexical"]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], k: int = 60) -> Dict[int, float]:
+    """
+    Fuse rankings with reciprocal-rank fusion: every item scores `1 / (k + rank)` in each
+    ranking it appears in, so items ranked well by several retrievers come first whatever
+    the scale of their scores.
+
+    Args:
+        rankings (Sequence[Sequence[int]]): The rankings, best first.
+        k (int): The rank offset, damping the weight of the first ranks.
+
+    Returns:
+        Dict[int, float]: The fused score of every item.
+    """
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, 1):
+            fused[item] = fused.get(item, 0.0) + 1.0 / (k + rank)
+    return fused
+
+
+class HybridRetriever:
+    """
+    A retriever over a `VectorStore` combining its BM25 index and its vector index.
+
+    - `lexical`: BM25 only, no embedding call.
+    - `semantic`: the vector index only.
+    - `hybrid`: both, fused with reciprocal-rank fusion.
+    - `auto`: lexical first, when the query holds identifiers (ticket numbers, product codes,
+      versions) and the best BM25 hit contains all of them its results are returned without
+      embedding the query, otherwise hybrid.
+
+    Query embeddings are kept in a small LRU cache, so repeated queries cost no API call.
+
+    ## Methods:
+        `search()`: A method to get the k most relevant stored texts of a query.
+
+        `stats()`: A method to get the search counters.
+    """
+    def __init__(self,
+                 store: VectorStore,
+                 vector_index: Optional[Union[IVFIndex, VectorStore]] = None,
+                 lexical_index: Optional[BM25Index] = None,
+                 rrf_k: int = 60,
+                 candidates: int = 50,
+                 query_cache_size: int = 1024):
+        self.store = store
+        self.vector_index = vector_index if vector_index is not None else store
+        self.lexical_index = lexical_index if lexical_index is not None else BM25Index(store)
+        self.rrf_k = rrf_k
+        self.candidates = candidates
+        self.query_cache_size = query_cache_size
+
+        self._lock = threading.Lock()
+        self._query_vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.searches: Dict[str, int] = {"lexical": 0, "semantic": 0, "hybrid": 0}
+        self.embedding_calls = 0
+
+    def _query_vector(self, query: str) -> np.ndarray:
+        with self._lock:
+            vector = self._query_vectors.get(query)
+            if vector is not None:
+                self._query_vectors.move_to_end(query)
+                return vector
+
+        vector = self.store.query_vector(query)
+        with self._lock:
+            self.embedding_calls += 1
+            self._query_vectors[query] = vector
+            while len(self._query_vectors) > self.query_cache_size:
+                self._query_vectors.popitem(last=False)
+        return vector
+
+    def _semantic(self, query: str, k: int) -> List[VectorSearchResult]:
+        return self.vector_index.search(self._query_vector(query), k=k)
+
+    def search(self, query: str, k: int = 5, mode: RetrievalMode = "auto") -> List[VectorSearchResult]:
+        """
+        Get the k stored texts most relevant to a query.
+
+        Args:
+            query (str): The query.
+            k (int): The number of results.
+            mode (RetrievalMode): The retrieval mode, see the class documentation.
+
+        Returns:
+            List[VectorSearchResult]: The results, best first. Their score is the BM25 score in
+            lexical mode, the cosine similarity in semantic mode and the fused score otherwise.
+        """
+        if k <= 0 or not len(self.store):
+            return []
+
+        if mode == "semantic":
+            self.searches["semantic"] += 1
+            return self._semantic(query, k)
+
+        lexical = self.lexical_index.search(query, k=max(k, self.candidates) if mode != "lexical" else k)
+        if mode == "lexical":
+            self.searches["lexical"] += 1
+            return lexical
+
+        if mode == "auto" and lexical:
+            identifiers = {term for term in tokenize(query) if is_identifier(term)}
+            if identifiers and identifiers <= set(tokenize(lexical[0].text)):
+                logger.debug(f"Lexical match for the identifiers {sorted(identifiers)}, skipping the embedding")
+                self.searches["lexical"] += 1
+                return lexical[:k]
+
+        self.searches["hybrid"] += 1
+        semantic = self._semantic(query, max(k, self.candidates))
+        candidates = {result.index: result for result in lexical}
+        candidates.update((result.index, result) for result in semantic)
+
+        fused = reciprocal_rank_fusion(
+            [[result.index for result in semantic], [result.index for result in lexical]],
+            k=self.rrf_k,
+        )
+        results = []
+        for index in sorted(fused, key=fused.get, reverse=True)[:k]:
+            result = candidates[index]
+            results.append(VectorSearchResult(index, fused[index], result.text, result.metadata))
+        return results
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the search counters.
+
+        Returns:
+            Dict[str, int]: The searches per mode actually used and the query embedding calls.
+        """
+        return {**self.searches, "embedding_calls": self.embedding_calls, "cached_queries": len(self._query_vectors)}
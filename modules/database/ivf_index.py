@@ -0,0 +1,315 @@
+from typing import Any, Dict, List, Optional, Union
+from loguru import logger
+import json
+import math
+import os
+import re
+import threading
+import time
+import numpy as np
+from core.models.io.embedding_unit import EmbeddingUnit
+from .vector_store import VectorSearchResult, VectorStore, top_k
+
+_FILES = {"centroids": "f32", "vectors": "f32", "ids": "i64", "offsets": "i64", "pending": "i32"}
+_VERSIONED_FILE = re.compile(r"ivf_[a-z]+\.(\d+)\.(?:f32|i64|i32)$")
+
+
+class _IVFState:
+    # Swapped as a whole, so a search never mixes two versions of the index
+    __slots__ = ("centroids", "offsets", "vectors", "ids", "rows", "pending")
+
+    def __init__(self, centroids: np.ndarray, offsets: np.ndarray, vectors: np.ndarray, ids: np.ndarray, rows: int, pending: np.ndarray):
+        self.centroids = centroids
+        self.offsets = offsets
+        self.vectors = vectors
+        self.ids = ids
+        self.rows = rows
+        self.pending = pending
+
+
+class IVFIndex:
+    """
+    An inverted-file (IVF) approximate nearest-neighbour index over a `VectorStore`.
+
+    The normalized embeddings are clustered with spherical k-means into `nlist` coarse
+    centroids, and the vectors of every cluster are copied next to each other in a
+    memory-mapped file. A query scores the centroids, then scans only the `nprobe` closest
+    clusters, so its cost is about `nlist + nprobe * rows / nlist` dot products instead of
+    `rows`. Raising `nprobe` trades latency for recall, `nprobe = nlist` is an exact search.
+
+    Rows appended to the store after the build are assigned to their closest centroid
+    (`sync()`, run on every search) and scanned from the store until `build()` lays them
+    out again, so inserts are incremental and do not require retraining. Until the index
+    is built, searches fall back to the exact scan of the store.
+
+    Every build writes a new set of files, whose version is recorded in `ivf.json`. The
+    metadata is written last, so after a crash it still names the complete previous set.
+
+    ## Methods:
+        `build()`: A method to train the centroids (optionally) and lay out the clusters.
+
+        `sync()`: A method to assign the rows added to the store since the last call.
+
+        `search()`: A method to get the approximate k nearest stored texts of a query.
+
+        `stats()`: A method to get the size and layout of the index.
+
+    ## Properties:
+        `is_built`: Whether the index has been built.
+
+        `nprobe`: The default number of clusters scanned per query.
+    """
+    def __init__(self,
+                 store: VectorStore,
+                 nprobe: int = 16,
+                 block_rows: int = 65536):
+        self.store = store
+        self.nprobe = nprobe
+        self.block_rows = block_rows
+
+        self._meta_path = os.path.join(store.path, "ivf.json")
+        self._version = 0
+
+        self._lock = threading.Lock()
+        self._state: Optional[_IVFState] = self._load()
+
+    @property
+    def is_built(self) -> bool:
+        return self._state is not None
+
+    def _paths(self, version: int) -> Dict[str, str]:
+        return {name: os.path.join(self.store.path, f"ivf_{name}.{version}.{extension}") for name, extension in _FILES.items()}
+
+    def _load(self) -> Optional[_IVFState]:
+        if not os.path.exists(self._meta_path):
+            return None
+        with open(self._meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self._version = meta.get("version", 0)
+        paths = self._paths(self._version)
+        if (
+            meta["dimensions"] != self.store.dimensions
+            or meta["rows"] > len(self.store)
+            or not all(os.path.exists(paths[name]) for name in ("centroids", "vectors", "ids", "offsets"))
+        ):
+            logger.warning(f"The IVF index at '{self.store.path}' does not match its store, it needs to be rebuilt")
+            return None
+
+        nlist, rows, dimensions = meta["nlist"], meta["rows"], meta["dimensions"]
+        pending = np.empty(0, dtype=np.int32)
+        if os.path.exists(paths["pending"]):
+            # Assignments past the store rows (an interrupted append) are dropped
+            assigned = np.fromfile(paths["pending"], dtype=np.int32)
+            pending = assigned[:len(self.store) - rows]
+            if len(assigned) > len(pending):
+                with open(paths["pending"], "r+b") as f:
+                    f.truncate(len(pending) * 4)
+
+        return _IVFState(
+            centroids=np.fromfile(paths["centroids"], dtype=np.float32).reshape(nlist, dimensions),
+            offsets=np.fromfile(paths["offsets"], dtype=np.int64),
+            vectors=np.memmap(paths["vectors"], dtype=np.float32, mode="r", shape=(rows, dimensions)),
+            ids=np.memmap(paths["ids"], dtype=np.int64, mode="r", shape=(rows,)),
+            rows=rows,
+            pending=pending,
+        )
+
+    def _remove_stale_files(self) -> None:
+        for name in os.listdir(self.store.path):
+            match = _VERSIONED_FILE.match(name)
+            if match is None or int(match.group(1)) == self._version:
+                continue
+            try:
+                os.remove(os.path.join(self.store.path, name))
+            except OSError as e:
+                # e.g. still memory-mapped on Windows, removed after a later build
+                logger.debug(f"Could not remove the stale IVF file '{name}': {e}")
+
+    def _assign(self, centroids: np.ndarray, start: int, stop: int) -> np.ndarray:
+        matrix = self.store.matrix
+        assignments = np.empty(stop - start, dtype=np.int32)
+        for block in range(start, stop, self.block_rows):
+            end = min(block + self.block_rows, stop)
+            assignments[block - start:end - start] = np.argmax(matrix[block:end] @ centroids.T, axis=1)
+        return assignments
+
+    def _train(self, nlist: int, sample_size: int, iterations: int, seed: int) -> np.ndarray:
+        matrix = self.store.matrix
+        rng = np.random.default_rng(seed)
+        # Sorted sample rows, so the memory map is read front to back
+        sample_rows = np.sort(rng.choice(len(matrix), size=min(len(matrix), max(sample_size, nlist)), replace=False))
+        sample = np.asarray(matrix[sample_rows])
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignments = np.empty(len(sample), dtype=np.int64)
+            for block in range(0, len(sample), self.block_rows):
+                assignments[block:block + self.block_rows] = np.argmax(sample[block:block + self.block_rows] @ centroids.T, axis=1)
+
+            # Per-cluster sums of the sample sorted by cluster
+            order = np.argsort(assignments, kind="stable")
+            counts = np.bincount(assignments, minlength=nlist)
+            filled = counts > 0
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            sums = np.zeros_like(centroids)
+            sums[filled] = np.add.reduceat(sample[order], starts[filled], axis=0)
+            empty = ~filled
+            if empty.any():
+                # Empty clusters are reseeded with random sample vectors
+                sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()), replace=False)]
+            centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+        return centroids.astype(np.float32)
+
+    def build(self,
+              nlist: Optional[int] = None,
+              retrain: bool = True,
+              sample_size: Optional[int] = None,
+              iterations: int = 10,
+              seed: int = 0) -> Dict[str, Any]:
+        """
+        Build the index from every row of the store. The files are written as a new version,
+        so the previous index keeps serving until the new one is complete.
+
+        Args:
+            nlist (Optional[int]): The number of clusters, `4 * sqrt(rows)` by default.
+            retrain (bool): Whether to train new centroids, or only lay out the rows with the current ones (to absorb incremental inserts).
+            sample_size (Optional[int]): The number of rows k-means is trained on, `64 * nlist` by default.
+            iterations (int): The number of k-means iterations.
+            seed (int): The random seed of the sampling.
+
+        Returns:
+            Dict[str, Any]: The index statistics.
+        """
+        start_time = time.perf_counter()
+        with self._lock:
+            rows = len(self.store)
+            if not rows:
+                raise ValueError("Cannot build an index over an empty store")
+
+            centroids = self._state.centroids if self._state is not None else None
+            if retrain or centroids is None:
+                nlist = max(1, min(nlist or int(4 * math.sqrt(rows)), rows))
+                centroids = self._train(nlist, sample_size or 64 * nlist, iterations, seed)
+            nlist = len(centroids)
+
+            assignments = self._assign(centroids, 0, rows)
+            order = np.argsort(assignments, kind="stable")
+            offsets = np.zeros(nlist + 1, dtype=np.int64)
+            np.cumsum(np.bincount(assignments, minlength=nlist), out=offsets[1:])
+
+            version = self._version + 1
+            paths = self._paths(version)
+            matrix = self.store.matrix
+            with open(paths["vectors"], "wb") as f:
+                for block in range(0, rows, self.block_rows):
+                    f.write(np.ascontiguousarray(matrix[order[block:block + self.block_rows]]).tobytes())
+            order.astype(np.int64).tofile(paths["ids"])
+            offsets.tofile(paths["offsets"])
+            centroids.tofile(paths["centroids"])
+            open(paths["pending"], "wb").close()
+
+            # The metadata is the commit point, written last
+            with open(f"{self._meta_path}.tmp", "w", encoding="utf-8") as f:
+                json.dump({"version": version, "nlist": nlist, "rows": rows, "dimensions": self.store.dimensions}, f)
+            os.replace(f"{self._meta_path}.tmp", self._meta_path)
+            self._state = self._load()
+            self._remove_stale_files()
+        logger.info(f"Built IVF index over {rows} rows with {nlist} clusters in {time.perf_counter() - start_time:.1f}s")
+        return self.stats()
+
+    def sync(self) -> int:
+        """
+        Assign the rows added to the store since the last call to their closest centroid.
+
+        Returns:
+            int: The number of rows waiting for the next `build()`.
+        """
+        state = self._state
+        if state is None:
+            return 0
+        if state.rows + len(state.pending) >= len(self.store):
+            return len(state.pending)
+
+        with self._lock:
+            state = self._state
+            assigned = state.rows + len(state.pending)
+            rows = len(self.store)
+            if assigned < rows:
+                assignments = self._assign(state.centroids, assigned, rows)
+                with open(self._paths(self._version)["pending"], "ab") as f:
+                    f.write(assignments.tobytes())
+                pending = np.concatenate([state.pending, assignments])
+                self._state = state = _IVFState(state.centroids, state.offsets, state.vectors, state.ids, state.rows, pending)
+                if len(pending) > max(state.rows, 1) * 0.2:
+                    logger.warning(f"{len(pending)} rows of '{self.store.path}' are not laid out in the IVF index, run build(retrain=False)")
+        return len(state.pending)
+
+    def search(self,
+               query: Union[str, np.ndarray, EmbeddingUnit, List[float]],
+               k: int = 5,
+               nprobe: Optional[int] = None,
+               min_score: Optional[float] = None) -> List[VectorSearchResult]:
+        """
+        Get the approximate k stored texts closest to a query.
+
+        Args:
+            query (Union[str, np.ndarray, EmbeddingUnit, List[float]]): The query text (embedded with the embedding model of the store) or its embedding.
+            k (int): The number of results.
+            nprobe (Optional[int]): The number of clusters to scan, `self.nprobe` by default.
+            min_score (Optional[float]): The minimum cosine similarity of a result.
+
+        Returns:
+            List[VectorSearchResult]: The results, best first.
+        """
+        if self._state is None:
+            return self.store.search(query, k=k, min_score=min_score)
+        if k <= 0:
+            return []
+        self.sync()
+
+        vector = self.store.query_vector(query)
+        state = self._state
+        offsets, vectors, ids = state.offsets, state.vectors, state.ids
+        probes, _ = top_k(state.centroids @ vector, min(nprobe or self.nprobe, len(state.centroids)))
+
+        best_rows = []
+        best_scores = []
+        for probe in probes:
+            start, stop = offsets[probe], offsets[probe + 1]
+            if start == stop:
+                continue
+            rows, scores = top_k(vectors[start:stop] @ vector, k)
+            best_rows.append(ids[start:stop][rows])
+            best_scores.append(scores)
+
+        if len(state.pending):
+            rows = np.flatnonzero(np.isin(state.pending, probes)) + state.rows
+            if len(rows):
+                positions, scores = top_k(self.store.matrix[rows] @ vector, k)
+                best_rows.append(rows[positions])
+                best_scores.append(scores)
+
+        if not best_rows:
+            return []
+        return self.store.results(np.concatenate(best_rows), np.concatenate(best_scores), k, min_score)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the index statistics.
+
+        Returns:
+            Dict[str, Any]: Whether it is built, the clusters, the laid out and pending rows and the cluster sizes.
+        """
+        state = self._state
+        if state is None:
+            return {"built": False, "nlist": 0, "rows": 0, "pending": 0}
+        sizes = np.diff(state.offsets)
+        return {
+            "built": True,
+            "nlist": len(state.centroids),
+            "nprobe": self.nprobe,
+            "rows": state.rows,
+            "pending": len(state.pending),
+            "mean_cluster_rows": float(sizes.mean()),
+            "max_cluster_rows": int(sizes.max()),
+        }
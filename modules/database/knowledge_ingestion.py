@@ -0,0 +1,341 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, TypeVar, Union
+from loguru import logger
+import argparse
+import itertools
+import json
+import os
+import re
+from core.interfaces.base_embedding_model import BaseEmbeddingModel
+from core.models.io.embedding_unit import EmbeddingSplits
+from .bm25_index import BM25Index
+from .ivf_index import IVFIndex
+from .vector_store import VectorStore
+
+T = TypeVar("T")
+
+TEXT_EXTENSIONS = (".txt", ".md", ".markdown", ".rst", ".csv", ".json", ".jsonl", ".html", ".xml", ".yaml", ".yml", ".py")
+
+_LAST_WHITESPACE = re.compile(r"\s(?=\S*$)")
+
+
+def iter_files(paths: Union[str, Sequence[str]], extensions: Sequence[str] = TEXT_EXTENSIONS) -> Iterator[str]:
+    """
+    List the files to ingest, walking directories in a stable order.
+
+    Args:
+        paths (Union[str, Sequence[str]]): The files and directories.
+        extensions (Sequence[str]): The extensions of the files taken from directories.
+
+    Yields:
+        str: The path of every file.
+    """
+    for path in [paths] if isinstance(paths, str) else paths:
+        if os.path.isfile(path):
+            yield path
+            continue
+        for root, directories, files in os.walk(path):
+            directories.sort()
+            for name in sorted(files):
+                if name.lower().endswith(tuple(extensions)):
+                    yield os.path.join(root, name)
+
+
+def read_blocks(path: str, block_size: int = 1 << 16) -> Iterator[str]:
+    """
+    Read a text file lazily, one block at a time.
+
+    Args:
+        path (str): The path of the file.
+        block_size (int): The number of characters per block.
+
+    Yields:
+        str: The blocks of the file.
+    """
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                return
+            yield block
+
+
+def _encode_blocks(blocks: Iterable[str], encoding: Any, max_carry: int = 1 << 20) -> Iterator[List[int]]:
+    # Blocks are cut at their last whitespace, so no word is split into tokens across two blocks
+    carry = ""
+    for block in blocks:
+        text = carry + block
+        match = _LAST_WHITESPACE.search(text)
+        if match is None and len(text) < max_carry:
+            carry = text
+            continue
+        cut = match.start() if match is not None else len(text)
+        carry = text[cut:]
+        if cut:
+            yield encoding.encode(text[:cut], disallowed_special=())
+    if carry:
+        yield encoding.encode(carry, disallowed_special=())
+
+
+def split_text(blocks: Iterable[str],
+               encoding: Any,
+               chunk_tokens: int = 512,
+               overlap_tokens: int = 64,
+               context_tokens: int = 128) -> Iterator[EmbeddingSplits]:
+    """
+    Split a stream of text into token-bounded chunks with overlap. Only the tokens of the
+    current chunk and its context are held, so memory does not grow with the text.
+
+    Args:
+        blocks (Iterable[str]): The text, in blocks (e.g. `read_blocks()`).
+        encoding (tiktoken.Encoding): The tokenizer.
+        chunk_tokens (int): The maximum number of tokens per chunk.
+        overlap_tokens (int): The number of tokens shared by consecutive chunks.
+        context_tokens (int): The number of tokens around a chunk in its `combined_splits`, 0 to leave it empty.
+
+    Yields:
+        EmbeddingSplits: The chunks, with the chunk and its surrounding tokens in `combined_splits`.
+    """
+    if not 0 <= overlap_tokens < chunk_tokens:
+        raise ValueError("The overlap must be smaller than the chunk size")
+    step = chunk_tokens - overlap_tokens
+
+    tokens: List[int] = []
+    base = 0  # Position of tokens[0] in the text
+    start = 0  # Position of the next chunk
+    covered = 0  # End of the last chunk
+    index = 0
+
+    def make_split(stop: int, end: int) -> EmbeddingSplits:
+        combined = None
+        if context_tokens:
+            combined = encoding.decode(tokens[max(start - context_tokens, base) - base:min(stop + context_tokens, end) - base])
+        return EmbeddingSplits(content=encoding.decode(tokens[start - base:stop - base]), index=index, combined_splits=combined)
+
+    for block_tokens in _encode_blocks(blocks, encoding):
+        tokens.extend(block_tokens)
+        end = base + len(tokens)
+        # A chunk is emitted once the tokens of its right context have been read
+        while end >= start + chunk_tokens + context_tokens:
+            yield make_split(start + chunk_tokens, end)
+            covered = start + chunk_tokens
+            index += 1
+            start += step
+            drop = start - context_tokens - base
+            if drop > 0:
+                del tokens[:drop]
+                base += drop
+
+    end = base + len(tokens)
+    while start < end:
+        stop = min(start + chunk_tokens, end)
+        if stop > covered:
+            yield make_split(stop, end)
+            covered = stop
+            index += 1
+        start += step
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """
+    Group items into lists of at most `size` items.
+    """
+    iterator = iter(items)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+class KnowledgeIngestor:
+    """
+    A streaming ingestion pipeline into a `VectorStore`: files are read lazily, split into
+    token-bounded chunks with overlap, embedded in bounded batches and appended to the store,
+    so memory stays constant whatever the size of the corpus.
+
+    Ingestion is resumable: after every batch, `ingestion.json` in the store directory records
+    the chunks of each file already stored. An unchanged, fully ingested file is skipped, and a
+    file interrupted by a crash is resumed after its last stored chunk (rows the store committed
+    after the last checkpoint are counted too, so no chunk is stored twice).
+
+    The store is append-only: a file modified since it was ingested is skipped with a warning,
+    since ingesting it again would leave its old chunks in the store next to the new ones. To
+    take the changes into account, rebuild the store (ingest into an empty directory).
+
+    After an ingestion that stored new chunks, the IVF index is built and the BM25 postings
+    are saved (`build_indexes()`, unless `build_indexes_after_ingest` is False), so a new
+    process serves searches without scanning the store or tokenizing every stored text on
+    its first query. From the command line:
+
+        python -m modules.database.knowledge_ingestion docs/ --store knowledge_store
+
+    ## Methods:
+        `ingest()`: A method to ingest files and directories.
+
+        `build_indexes()`: A method to build the IVF index and save the BM25 postings of the store.
+
+        `split()`: A method to split a file into chunks.
+    """
+    def __init__(self,
+                 store: VectorStore,
+                 embedding_model: Optional[BaseEmbeddingModel] = None,
+                 encoding: Any = None,
+                 chunk_tokens: int = 512,
+                 overlap_tokens: int = 64,
+                 context_tokens: int = 128,
+                 batch_size: int = 512,
+                 build_indexes_after_ingest: bool = True):
+        self.store = store
+        self.embedding_model = embedding_model or store.embedding_model
+        if self.embedding_model is None:
+            raise ValueError("An embedding model is required to ingest documents")
+        self._encoding = encoding
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        self.context_tokens = context_tokens
+        self.batch_size = batch_size
+        self.build_indexes_after_ingest = build_indexes_after_ingest
+        self._checkpoint_path = os.path.join(store.path, "ingestion.json")
+
+    @property
+    def encoding(self) -> Any:
+        """
+        The tiktoken encoding of the embedding model, loaded lazily on first use.
+        """
+        if self._encoding is None:
+            import tiktoken
+            self._encoding = tiktoken.get_encoding(getattr(self.embedding_model, "embedding_encoding", "cl100k_base"))
+        return self._encoding
+
+    def split(self, path: str) -> Iterator[EmbeddingSplits]:
+        """
+        Split a file into chunks.
+
+        Args:
+            path (str): The path of the file.
+
+        Yields:
+            EmbeddingSplits: The chunks of the file.
+        """
+        return split_text(read_blocks(path), self.encoding, self.chunk_tokens, self.overlap_tokens, self.context_tokens)
+
+    def _load_checkpoint(self) -> Dict[str, Any]:
+        if not os.path.exists(self._checkpoint_path):
+            return {"rows": len(self.store), "current": None, "sources": {}}
+        with open(self._checkpoint_path, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+
+        # Rows stored after the last checkpoint belong to the file in progress
+        extra = len(self.store) - checkpoint["rows"]
+        if extra > 0 and checkpoint["current"] in checkpoint["sources"]:
+            checkpoint["sources"][checkpoint["current"]]["splits"] += extra
+        checkpoint["rows"] = len(self.store)
+        return checkpoint
+
+    def _save_checkpoint(self, checkpoint: Dict[str, Any]) -> None:
+        checkpoint["rows"] = len(self.store)
+        temp_path = f"{self._checkpoint_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f, ensure_ascii=False)
+        os.replace(temp_path, self._checkpoint_path)
+
+    def ingest(self,
+               paths: Union[str, Sequence[str]],
+               extensions: Sequence[str] = TEXT_EXTENSIONS,
+               metadata: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
+        """
+        Ingest files and directories into the store, resuming a previous run.
+
+        Args:
+            paths (Union[str, Sequence[str]]): The files and directories.
+            extensions (Sequence[str]): The extensions of the files taken from directories.
+            metadata (Optional[Dict[str, Any]]): Extra metadata stored with every chunk.
+
+        Returns:
+            Dict[str, int]: The files ingested, skipped and changed since their ingestion, and the chunks stored.
+        """
+        checkpoint = self._load_checkpoint()
+        counters = {"files": 0, "skipped": 0, "changed": 0, "splits": 0}
+
+        for path in iter_files(paths, extensions):
+            source = os.path.abspath(path)
+            stat = os.stat(path)
+            signature = {"size": stat.st_size, "mtime": stat.st_mtime}
+            state = checkpoint["sources"].get(source)
+            if state is not None and (state["size"], state["mtime"]) != (signature["size"], signature["mtime"]):
+                logger.warning(f"'{source}' changed since it was ingested and is skipped, its stored chunks are stale: rebuild the store to ingest it again")
+                counters["changed"] += 1
+                continue
+            if state is not None and state["complete"]:
+                counters["skipped"] += 1
+                continue
+            if state is None:
+                state = checkpoint["sources"][source] = {**signature, "splits": 0, "complete": False}
+            checkpoint["current"] = source
+
+            splits = itertools.islice(self.split(path), state["splits"], None)
+            for batch in batched(splits, self.batch_size):
+                embeddings = self.embedding_model.encode_texts([split.content for split in batch])
+                self.store.add_embeddings(
+                    embeddings,
+                    [split.content for split in batch],
+                    [
+                        {**(metadata or {}), "source": source, "split": split.index, "combined_splits": split.combined_splits}
+                        for split in batch
+                    ],
+                )
+                state["splits"] += len(batch)
+                counters["splits"] += len(batch)
+                self._save_checkpoint(checkpoint)
+
+            state["complete"] = True
+            checkpoint["current"] = None
+            self._save_checkpoint(checkpoint)
+            counters["files"] += 1
+            logger.info(f"Ingested '{source}' ({state['splits']} chunks)")
+
+        if self.build_indexes_after_ingest and counters["splits"]:
+            self.build_indexes()
+        return counters
+
+    def build_indexes(self, nlist: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Build the IVF index of the store and save its BM25 postings. The IVF centroids are
+        retrained on the first build and when the store grew by more than a fifth since the
+        last one, otherwise the new rows are only laid out with the current centroids.
+
+        Args:
+            nlist (Optional[int]): The number of IVF clusters when they are trained, see `IVFIndex.build()`.
+
+        Returns:
+            Dict[str, Any]: The statistics of both indexes.
+        """
+        ivf = IVFIndex(self.store)
+        indexed_rows = ivf.stats()["rows"]
+        retrain = not ivf.is_built or len(self.store) - indexed_rows > 0.2 * indexed_rows
+        ivf_stats = ivf.build(nlist=nlist, retrain=retrain)
+
+        bm25 = BM25Index(self.store)
+        bm25.save()
+        return {"ivf": ivf_stats, "bm25": bm25.stats()}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Ingest files into the knowledge store and build its search indexes.")
+    parser.add_argument("paths", nargs="+", help="The files and directories to ingest.")
+    parser.add_argument("--store", default=None, help="The store directory, KNOWLEDGE_STORE_PATH by default.")
+    parser.add_argument("--nlist", type=int, default=None, help="The number of IVF clusters, 4 * sqrt(rows) by default.")
+    parser.add_argument("--no-index", action="store_true", help="Only ingest, leave the indexes as they are.")
+    args = parser.parse_args(argv)
+
+    if args.store:
+        os.environ["KNOWLEDGE_STORE_PATH"] = args.store
+    # The knowledge store of the retrieval tool, with its embedding model
+    from modules.tools.retrieve_knowledge import get_knowledge_store
+
+    ingestor = KnowledgeIngestor(get_knowledge_store(), build_indexes_after_ingest=False)
+    counters = ingestor.ingest(args.paths)
+    logger.info(f"Ingestion done: {counters}")
+    if not args.no_index and len(ingestor.store):
+        logger.info(f"Indexes built: {ingestor.build_indexes(nlist=args.nlist)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,376 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+from loguru import logger
+import json
+import os
+import threading
+import numpy as np
+from core.cache import embedding_to_vector
+from core.interfaces.base_embedding_model import BaseEmbeddingModel
+from core.models.io.embedding_unit import EmbeddingUnit
+
+
+def top_k(scores: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Get the k highest scores, unordered, with `argpartition`.
+
+    Args:
+        scores (np.ndarray): The scores.
+        k (int): The number of scores to keep.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The positions of the k highest scores and the scores.
+    """
+    if len(scores) <= k:
+        rows = np.arange(len(scores))
+    else:
+        rows = np.argpartition(scores, -k)[-k:]
+    return rows, scores[rows]
+
+
+class VectorSearchResult:
+    """
+    A search hit of the vector store.
+
+    ## Properties:
+        `index`: The row of the hit in the store.
+
+        `score`: The cosine similarity with the query.
+
+        `text`: The stored text.
+
+        `metadata`: The stored metadata.
+    """
+    __slots__ = ("index", "score", "text", "metadata")
+
+    def __init__(self, index: int, score: float, text: str, metadata: Dict[str, Any]):
+        self.index = index
+        self.score = score
+        self.text = text
+        self.metadata = metadata
+
+    def __repr__(self) -> str:
+        return f"VectorSearchResult(index={self.index}, score={self.score:.4f}, text={self.text[:40]!r})"
+
+
+class VectorStore:
+    """
+    A local, append-only vector store kept in a directory:
+
+    - `vectors.f32`: the normalized embeddings as one contiguous float32 matrix, memory-mapped.
+    - `records.jsonl` and `offsets.i64`: the texts and metadata, one JSON line per row, and the
+      byte offset of every line, so a hit is read with one seek instead of loading every text.
+    - `meta.json`: the dimensions and the committed row count, written last on every append.
+
+    Opening the store only maps the files, so startup is instant and memory stays flat whatever
+    the size of the corpus: the OS pages the matrix in and out as it is scanned. A query is one
+    matrix-vector product per block of rows and `argpartition` for the top k.
+
+    ## Methods:
+        `add_texts()`: A method to embed and store texts with their metadata.
+
+        `add_embeddings()`: A method to store precomputed embeddings with their texts and metadata.
+
+        `search()`: A method to get the k stored texts closest to a query or a query vector.
+
+        `get()`: A method to get the text and metadata of a row.
+
+        `records()`: A method to read the texts and metadata of a range of rows.
+
+        `query_vector()`: A method to get the normalized vector of a query.
+
+        `results()`: A method to turn candidate rows and scores into the best results.
+
+        `stats()`: A method to get the size of the store.
+
+    ## Properties:
+        `matrix`: The memory-mapped matrix of the normalized embeddings.
+    """
+    def __init__(self,
+                 path: str = "knowledge_store",
+                 embedding_model: Optional[BaseEmbeddingModel] = None,
+                 dimensions: Optional[int] = None,
+                 block_rows: int = 262144):
+        self.path = path
+        self.embedding_model = embedding_model
+        self.block_rows = block_rows
+        os.makedirs(path, exist_ok=True)
+
+        self._vectors_path = os.path.join(path, "vectors.f32")
+        self._records_path = os.path.join(path, "records.jsonl")
+        self._offsets_path = os.path.join(path, "offsets.i64")
+        self._meta_path = os.path.join(path, "meta.json")
+
+        meta = {}
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        self.dimensions: Optional[int] = meta.get("dimensions") or dimensions or getattr(embedding_model, "dimensions", None)
+        if dimensions is not None and meta.get("dimensions") not in (None, dimensions):
+            raise ValueError(f"The store at '{path}' holds {meta['dimensions']}-dimensional vectors, not {dimensions}")
+        self._count: int = meta.get("count", 0)
+
+        self._write_lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None
+        self._offsets: Optional[np.ndarray] = None
+        self._truncate_uncommitted()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _truncate_uncommitted(self) -> None:
+        # Rows written after the last committed count (e.g. an interrupted append) are dropped
+        if self.dimensions is None:
+            return
+        row_bytes = self.dimensions * 4
+        for file_path, size in ((self._vectors_path, self._count * row_bytes), (self._offsets_path, self._count * 8)):
+            if os.path.exists(file_path) and os.path.getsize(file_path) > size:
+                with open(file_path, "r+b") as f:
+                    f.truncate(size)
+        if self._count and os.path.exists(self._records_path):
+            end = int(self._get_offsets()[self._count - 1])
+            with open(self._records_path, "r+b") as f:
+                f.seek(end)
+                f.readline()
+                f.truncate(f.tell())
+        elif os.path.exists(self._records_path):
+            open(self._records_path, "wb").close()
+
+    def _get_matrix(self) -> Optional[np.ndarray]:
+        matrix = self._matrix
+        if matrix is None and self._count:
+            matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(self._count, self.dimensions))
+            self._matrix = matrix
+        return matrix
+
+    def _get_offsets(self) -> np.ndarray:
+        offsets = self._offsets
+        if offsets is None:
+            offsets = np.memmap(self._offsets_path, dtype=np.int64, mode="r", shape=(self._count,))
+            self._offsets = offsets
+        return offsets
+
+    def add_texts(self,
+                  texts: Sequence[str],
+                  metadatas: Optional[Sequence[Dict[str, Any]]] = None,
+                  batch_size: int = 2048) -> int:
+        """
+        Embed texts with the embedding model and store them.
+
+        Args:
+            texts (Sequence[str]): The texts.
+            metadatas (Optional[Sequence[Dict[str, Any]]]): The metadata of every text (e.g. its source).
+            batch_size (int): The number of texts per `encode_texts()` call, split into requests by the embedding model.
+
+        Returns:
+            int: The number of rows in the store.
+        """
+        if self.embedding_model is None:
+            raise ValueError("An embedding model is required to add texts")
+        for start in range(0, len(texts), batch_size):
+            batch = list(texts[start:start + batch_size])
+            embeddings = self.embedding_model.encode_texts(batch)
+            self.add_embeddings(
+                embeddings,
+                batch,
+                metadatas[start:start + batch_size] if metadatas is not None else None,
+            )
+        return self._count
+
+    def add_embeddings(self,
+                       embeddings: Union[np.ndarray, Iterable[Union[EmbeddingUnit, List[float], str]]],
+                       texts: Sequence[str],
+                       metadatas: Optional[Sequence[Dict[str, Any]]] = None) -> int:
+        """
+        Store precomputed embeddings with their texts. The vectors are normalized, so scores are cosine similarities.
+
+        Args:
+            embeddings (Union[np.ndarray, Iterable[Union[EmbeddingUnit, List[float], str]]]): A matrix or the embeddings, one per text.
+            texts (Sequence[str]): The texts.
+            metadatas (Optional[Sequence[Dict[str, Any]]]): The metadata of every text.
+
+        Returns:
+            int: The number of rows in the store.
+        """
+        if isinstance(embeddings, np.ndarray):
+            vectors = np.asarray(embeddings, dtype=np.float32)
+        else:
+            vectors = np.stack([embedding_to_vector(embedding) for embedding in embeddings])
+        if vectors.ndim != 2 or len(vectors) != len(texts):
+            raise ValueError(f"Expected one embedding per text, got {len(vectors)} for {len(texts)} texts")
+        if metadatas is not None and len(metadatas) != len(texts):
+            raise ValueError(f"Expected one metadata per text, got {len(metadatas)} for {len(texts)} texts")
+        if not len(vectors):
+            return self._count
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = np.ascontiguousarray(vectors / np.maximum(norms, 1e-12), dtype=np.float32)
+
+        with self._write_lock:
+            if self.dimensions is None:
+                self.dimensions = vectors.shape[1]
+            if vectors.shape[1] != self.dimensions:
+                raise ValueError(f"Expected {self.dimensions}-dimensional embeddings, got {vectors.shape[1]}")
+
+            with open(self._records_path, "ab") as f:
+                position = f.tell()
+                offsets = np.empty(len(texts), dtype=np.int64)
+                lines = []
+                for row, text in enumerate(texts):
+                    line = json.dumps(
+                        {"text": text, "metadata": metadatas[row] if metadatas is not None else {}},
+                        ensure_ascii=False,
+                    ).encode("utf-8") + b"\n"
+                    offsets[row] = position
+                    position += len(line)
+                    lines.append(line)
+                f.write(b"".join(lines))
+            with open(self._vectors_path, "ab") as f:
+                f.write(vectors.tobytes())
+            with open(self._offsets_path, "ab") as f:
+                f.write(offsets.tobytes())
+
+            # The row count is the commit point, written atomically once the data is on disk
+            count = self._count + len(texts)
+            temp_path = f"{self._meta_path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"dimensions": self.dimensions, "count": count}, f)
+            os.replace(temp_path, self._meta_path)
+
+            self._count = count
+            self._matrix = None
+            self._offsets = None
+        logger.debug(f"Vector store '{self.path}' now holds {count} rows")
+        return count
+
+    def get(self, index: int) -> tuple[str, Dict[str, Any]]:
+        """
+        Get the text and metadata of a row.
+
+        Args:
+            index (int): The row.
+
+        Returns:
+            tuple[str, Dict[str, Any]]: The text and its metadata.
+        """
+        with open(self._records_path, "rb") as f:
+            f.seek(int(self._get_offsets()[index]))
+            record = json.loads(f.readline())
+        return record["text"], record.get("metadata") or {}
+
+    def records(self, start: int = 0, stop: Optional[int] = None) -> Iterator[tuple[str, Dict[str, Any]]]:
+        """
+        Read the texts and metadata of a range of rows sequentially.
+
+        Args:
+            start (int): The first row.
+            stop (Optional[int]): The row to stop at, the end of the store by default.
+
+        Yields:
+            tuple[str, Dict[str, Any]]: The text and metadata of every row, in order.
+        """
+        stop = self._count if stop is None else min(stop, self._count)
+        if start >= stop:
+            return
+        with open(self._records_path, "rb") as f:
+            f.seek(int(self._get_offsets()[start]))
+            for _ in range(start, stop):
+                record = json.loads(f.readline())
+                yield record["text"], record.get("metadata") or {}
+
+    def search(self,
+               query: Union[str, np.ndarray, EmbeddingUnit, List[float]],
+               k: int = 5,
+               min_score: Optional[float] = None) -> List[VectorSearchResult]:
+        """
+        Get the k stored texts closest to a query.
+
+        Args:
+            query (Union[str, np.ndarray, EmbeddingUnit, List[float]]): The query text (embedded with the embedding model) or its embedding.
+            k (int): The number of results.
+            min_score (Optional[float]): The minimum cosine similarity of a result.
+
+        Returns:
+            List[VectorSearchResult]: The results, best first.
+        """
+        matrix = self._get_matrix()
+        if matrix is None or k <= 0:
+            return []
+        vector = self.query_vector(query)
+
+        # One matmul per block (a single one unless the corpus is huge), keeping the k best of each
+        best_rows = []
+        best_scores = []
+        for start in range(0, len(matrix), self.block_rows):
+            rows, scores = top_k(matrix[start:start + self.block_rows] @ vector, k)
+            best_rows.append(rows + start)
+            best_scores.append(scores)
+        return self.results(np.concatenate(best_rows), np.concatenate(best_scores), k, min_score)
+
+    def query_vector(self, query: Union[str, np.ndarray, EmbeddingUnit, List[float]]) -> np.ndarray:
+        """
+        Get the normalized float32 vector of a query.
+
+        Args:
+            query (Union[str, np.ndarray, EmbeddingUnit, List[float]]): The query text (embedded with the embedding model) or its embedding.
+
+        Returns:
+            np.ndarray: The unit query vector.
+        """
+        if isinstance(query, str):
+            if self.embedding_model is None:
+                raise ValueError("An embedding model is required to search with a text query")
+            query = self.embedding_model.encode_query(query)
+        vector = embedding_to_vector(query) if not isinstance(query, np.ndarray) else query.astype(np.float32, copy=False)
+        if self.dimensions is not None and vector.shape != (self.dimensions,):
+            raise ValueError(f"Expected a {self.dimensions}-dimensional query, got shape {vector.shape}")
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def results(self,
+                rows: np.ndarray,
+                scores: np.ndarray,
+                k: int,
+                min_score: Optional[float] = None) -> List[VectorSearchResult]:
+        """
+        Turn candidate rows and their scores into the k best results, with their texts and metadata.
+
+        Args:
+            rows (np.ndarray): The candidate rows.
+            scores (np.ndarray): The scores of the candidates.
+            k (int): The number of results.
+            min_score (Optional[float]): The minimum score of a result.
+
+        Returns:
+            List[VectorSearchResult]: The results, best first.
+        """
+        results = []
+        for position in np.argsort(-scores)[:k]:
+            score = float(scores[position])
+            if min_score is not None and score < min_score:
+                break
+            index = int(rows[position])
+            text, metadata = self.get(index)
+            results.append(VectorSearchResult(index, score, text, metadata))
+        return results
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """
+        The memory-mapped (rows, dimensions) matrix of the normalized embeddings, empty when the store is.
+        """
+        matrix = self._get_matrix()
+        if matrix is None:
+            return np.empty((0, self.dimensions or 0), dtype=np.float32)
+        return matrix
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the store statistics.
+
+        Returns:
+            Dict[str, Any]: The rows, the dimensions and the size of the matrix in bytes.
+        """
+        return {
+            "rows": self._count,
+            "dimensions": self.dimensions,
+            "matrix_bytes": self._count * (self.dimensions or 0) * 4,
+        }
@@ -1,4 +1,6 @@
 from .openai_executor import OpenAIExecutor
 from .openai_llm_service import OpenAILLMService
+from .async_openai_executor import AsyncOpenAIExecutor
+from .async_openai_llm_service import AsyncOpenAILLMService
 from .openai_embedding_service import OpenAIEmbeddingModel
-from .openai_speech_model import OpenAISpeechModel
\ No newline at end of file
+from .openai_speech_model import OpenAISpeechModel
@@ -0,0 +1,376 @@
+import os
+from loguru import logger
+from typing import Any, Callable, Dict, List, Optional, AsyncGenerator, Literal
+from pydantic import BaseModel 
+from openai import AsyncOpenAI
+from openai._types import NOT_GIVEN
+from core.interfaces import AsyncBaseExecutor
+from modules.openai.async_openai_llm_service import AsyncOpenAILLMService
+from modules.openai.openai_executor_turn import OpenAIExecutorTurn
+from core.models.responses import OpenAgentResponse, OpenAgentStreamingResponse
+from core.handlers import ToolHandler, ContextWindowManager
+from core.cache import ResponseCache, VolatileMessage
+from core.utils.usage_tracker import UsageTracker, get_process_usage_tracker
+import datetime
+import re
+import sys
+
+# The clock stamped into the system prompt without a stable prefix
+_CLOCK_LINE = re.compile(r"\s*Current date and time: \d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\s*")
+
+class AsyncOpenAIExecutor(AsyncBaseExecutor):
+    def __init__(self,
+                 client: AsyncOpenAI = None,
+                 model: str = "gpt-4o-mini",
+                 system_message: Optional[str] = None,
+                 tools: Optional[List[Callable[..., Any]]] = NOT_GIVEN,
+                 api_key: Optional[str] = os.getenv("OPENAI_API_KEY"),
+                 temperature: Optional[float] = 0.3,
+                 max_tokens: Optional[int] = None,
+                 top_p: Optional[float] = None,
+                 concurrent_tool_calls: bool = False,
+                 tool_timeout: Optional[float] = None,
+                 tool_backend: Optional[Literal["inline", "thread", "process"]] = None,
+                 mcp_sessions: Optional[Dict[str, Any]] = None,
+                 mcp_tools: Optional[Dict[str, Optional[List[str]]]] = None,
+                 context_window: Optional[ContextWindowManager] = None,
+                 stable_prefix: bool = False,
+                 prompt_cache_key: Optional[str] = None,
+                 response_cache: Optional[ResponseCache] = None,
+                 usage_tracker: Optional[UsageTracker] = None,
+                 **kwargs):
+        # With a stable prefix the system prompt stays byte-identical across requests,
+        # volatile data (the clock) is sent in a late message instead.
+        self._stable_prefix = stable_prefix
+        self._base_system_message = system_message
+
+        context_history = kwargs.get("context_history", None)
+        super().__init__(system_message=self.define_system_message(system_message), context_history=context_history, context_window=context_window)
+
+        self._tool_functions = tools
+        self._llm_service = AsyncOpenAILLMService(
+            client=client,
+            model=model,
+            system_message=self._system_message,
+            tools=tools,
+            api_key=api_key,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            top_p=top_p,
+            prompt_cache_key=prompt_cache_key,
+            response_cache=response_cache,
+            mcp_sessions=mcp_sessions,
+            mcp_tools=mcp_tools,
+        )
+
+        self._usage_tracker = usage_tracker or UsageTracker(parent=get_process_usage_tracker())
+
+        self._tool_handler = ToolHandler(
+            tools=tools,
+            llm_provider="openai",
+            schema_type="OpenAI",
+            concurrent_tool_calls=concurrent_tool_calls,
+            tool_timeout=tool_timeout,
+            tool_backend=tool_backend,
+            mcp_sessions=mcp_sessions,
+            mcp_tools=mcp_tools,
+        )
+
+    @property
+    def model(self) -> str:
+        """
+        Get the model name.
+
+        Returns:
+            The model name.
+        """
+        return self._llm_service.model
+
+    @property
+    def temperature(self) -> float:
+        return self._llm_service.temperature
+
+    @property
+    def max_tokens(self) -> int:
+        return self._llm_service.max_tokens
+    
+    @property
+    def top_p(self) -> float:
+        return self._llm_service.top_p
+    
+    @property
+    def tools(self) -> List[Dict[str, Any]]:
+        return self._llm_service.tools
+    
+    def clone(self) -> 'AsyncOpenAIExecutor':
+        """
+        Clone the AsyncOpenAIExecutor object.
+
+        Returns:
+            A new AsyncOpenAIExecutor object with the same parameters and a fresh context history.
+        """
+        return AsyncOpenAIExecutor(
+            client=self._llm_service.client,
+            model=self.model,
+            system_message=self._base_system_message,
+            tools=self._tool_functions,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            top_p=self.top_p,
+            concurrent_tool_calls=self._tool_handler.concurrent_tool_calls,
+            tool_timeout=self._tool_handler.tool_timeout,
+            tool_backend=self._tool_handler.tool_backend,
+            mcp_sessions=self._tool_handler.sessions_map,
+            mcp_tools=self._tool_handler.mcp_tools_map,
+            context_window=self._context_window,
+            stable_prefix=self._stable_prefix,
+            prompt_cache_key=self._llm_service.prompt_cache_key,
+            response_cache=self._llm_service.response_cache,
+            usage_tracker=UsageTracker(parent=self._usage_tracker.parent),
+        )
+    
+    def get_history(self) -> List[Dict[str, Any]]:
+        return self.get_context()
+    
+    def clear_history(self) -> List[Dict[str, Any]]:
+        """
+        Clear the chat history leaving only the system message.
+        """
+        self.clear_context()
+        return self.get_context()
+    
+    def define_system_message(self, message: Optional[str] = None) -> str:
+        """
+        Define the system message for the OpenAI model.
+
+        Args:
+            message (Optional[str]): The system message to use. (default: None)
+
+        Returns:
+            str: The system message.
+        """
+        system_message = message if message is not None else """
+            System Message: You are an helpful assistant, try to assist the user in everything.\n
+            """
+        if self._stable_prefix:
+            return system_message
+
+        system_message += f"""
+        Current date and time: {datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}\n
+        
+        """
+        return system_message
+
+    def get_request_context(self) -> List[Dict[str, Any]]:
+        """
+        Get the messages to send to the model.
+        With a stable prefix the current date and time is appended as a late system message,
+        so everything before it can be served from the prompt cache.
+
+        The clock is marked volatile, so it is left out of the response cache key and a replay
+        of the same conversation hits the cache in any later run.
+
+        Returns:
+            List[Dict[str, Any]]: The messages to send to the model.
+        """
+        context = super().get_request_context()
+        if not self._stable_prefix:
+            system = context[0] if context else None
+            if self._llm_service.response_cache is None or system is None or system.get("role") != "system" or not isinstance(system.get("content"), str):
+                return context
+            unstamped = {**system, "content": _CLOCK_LINE.sub("\n", system["content"])}
+            return [VolatileMessage(system, key=unstamped), *context[1:]]
+
+        return [
+            *context,
+            VolatileMessage({
+                "role": "system",
+                "content": f"Current date and time: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}",
+            }),
+        ]
+
+    @property
+    def prompt_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get the prompt caching statistics of the requests sent by this executor.
+
+        Returns:
+            Dict[str, Any]: The request count, prompt and cached token totals and the cache-hit ratios.
+        """
+        return self._llm_service.prompt_cache_tracker.snapshot()
+
+    @property
+    def usage_tracker(self) -> UsageTracker:
+        """
+        Get the usage tracker of this executor (one session).
+
+        Returns:
+            The usage tracker.
+        """
+        return self._usage_tracker
+
+    @property
+    def usage_stats(self) -> Dict[str, Any]:
+        """
+        Get the token usage, call counts and latency percentiles of the turns run by this executor.
+
+        Returns:
+            Dict[str, Any]: The usage snapshot of the session.
+        """
+        return self._usage_tracker.snapshot()
+
+    async def execute(self, 
+                      messages: List[Dict[str, str]],
+                      tools: Optional[List[Dict[str, Any]]] = NOT_GIVEN,
+                      response_schema: Optional[BaseModel] = NOT_GIVEN,
+                      temperature: Optional[float] = None,
+                      max_tokens: Optional[int] = None,
+                      top_p: Optional[float] = None,
+                      **kwargs,
+                      ) -> AsyncGenerator[OpenAgentResponse, None]:
+        """
+        Execute the OpenAI model asynchronously and yield OpenAgentResponse objects.
+
+        Args:
+            messages (List[Dict[str, str]]): The messages to send to the model.
+            tools (Optional[List[Dict[str, Any]]]): The tools to use in the response.
+            response_schema (Optional[BaseModel]): The schema to use in the response.
+            temperature (Optional[float]): The temperature to use in the response.
+            max_tokens (Optional[int]): The maximum number of tokens to use in the response.
+            top_p (Optional[float]): The top p to use in the response.
+
+        Returns:
+            An OpenAgentResponse async generator.
+
+        Example:
+        ```python
+        executor = AsyncOpenAIExecutor(client=AsyncOpenAI(), tools=[get_weather_tool])
+        async for response in executor.execute(messages=[{"role": "user", "content": "Weather in Hanoi?"}]):
+            print(response.content)
+        ```
+        """
+        turn = OpenAIExecutorTurn(self, stream=False, tools=tools, temperature=temperature, max_tokens=max_tokens, top_p=top_p, **kwargs)
+        try:
+            context = self.extend_context(messages)
+
+            logger.opt(lazy=True).debug("Context: {}", lambda: context) if turn.debug else None
+
+            stop = False
+
+            while not stop:
+                with turn.iteration():
+                    # Take user initial request along with the chat history -> response
+                    response = await self._llm_service.model_generate(
+                        messages=self.get_request_context(),
+                        response_schema=response_schema,
+                        **turn.options,
+                    )
+                    turn.record_model_call(response.usage)
+
+                    logger.opt(lazy=True).info("Response Received: {}", lambda: response) if turn.debug else None
+
+                    context = turn.add_response(response)
+
+                    if response.tool_calls:
+                        # A copy, the response is yielded again below with its content and tool results
+                        yield response.model_copy()
+
+                        # Handle tool requests, awaiting async tools natively
+                        tool_response = await self._tool_handler.async_handle_tool_request(
+                            response=response,
+                        )
+
+                        yield OpenAgentResponse(
+                            role="tool",
+                            tool_results=tool_response.tool_results,
+                        )
+
+                        context = turn.add_tool_results(tool_response)
+
+                        logger.opt(lazy=True).debug("Context: {}", lambda: context) if turn.debug else None
+                    else:
+                        stop = True
+
+                    if response.content is not None or stop:
+                        # The final response is the model response itself (also yielded without content, e.g. a refusal)
+                        yield response
+        finally:
+            turn.end(sys.exc_info()[1])
+
+    async def stream_execute(self,
+                             messages: List[Dict[str, str]],
+                             tools: Optional[List[Dict[str, Any]]] = NOT_GIVEN,
+                             response_schema: Optional[BaseModel] = NOT_GIVEN,
+                             temperature: Optional[float] = None,
+                             max_tokens: Optional[int] = None,
+                             top_p: Optional[float] = None,
+                             **kwargs,
+                             ) -> AsyncGenerator[OpenAgentStreamingResponse, None]:
+        """
+        Stream execute the OpenAI model asynchronously and yield OpenAgentStreamingResponse objects.
+
+        Content deltas are yielded as soon as they arrive. Every model call ends with a
+        final chunk (with `finish_reason` set) holding the complete message, which is
+        also the one appended to the context history.
+
+        Args:
+            messages (List[Dict[str, str]]): The messages to send to the model.
+            tools (Optional[List[Dict[str, Any]]]): The tools to use in the response.
+            response_schema (Optional[BaseModel]): The schema to use in the response.
+            temperature (Optional[float]): The temperature to use in the response.
+            max_tokens (Optional[int]): The maximum number of tokens to use in the response.
+            top_p (Optional[float]): The top p to use in the response.
+
+        Returns:
+            An OpenAgentStreamingResponse async generator.
+        """
+        turn = OpenAIExecutorTurn(self, stream=True, tools=tools, temperature=temperature, max_tokens=max_tokens, top_p=top_p, **kwargs)
+        try:
+            context = self.extend_context(messages)
+
+            stop = False
+
+            while not stop:
+                with turn.iteration():
+                    async for chunk in self._llm_service.model_stream(
+                        messages=self.get_request_context(),
+                        response_schema=response_schema,
+                        **turn.options,
+                    ):
+                        turn.record_chunk(chunk)
+                        yield chunk
+                    final_chunk = turn.final_chunk
+                    turn.record_model_call(final_chunk.usage if final_chunk else None)
+
+                    logger.opt(lazy=True).info("Response Received: {}", lambda: final_chunk) if turn.debug else None
+
+                    if final_chunk is None:
+                        logger.error("No response from the model")
+                        yield OpenAgentStreamingResponse(
+                            role="assistant",
+                            refusal="No response from the model",
+                            finish_reason="error",
+                        )
+                        break
+
+                    # Add the complete response (and its tool call requests) to the context
+                    context = turn.add_response(final_chunk)
+
+                    if final_chunk.tool_calls:
+                        # Handle tool requests, awaiting async tools natively
+                        tool_response = await self._tool_handler.async_handle_tool_request(
+                            response=final_chunk,
+                        )
+
+                        yield OpenAgentStreamingResponse(
+                            role="tool",
+                            tool_results=tool_response.tool_results,
+                        )
+
+                        context = turn.add_tool_results(tool_response)
+
+                        logger.opt(lazy=True).debug("Context: {}", lambda: context) if turn.debug else None
+                    else:
+                        stop = True
+        finally:
+            turn.end(sys.exc_info()[1])
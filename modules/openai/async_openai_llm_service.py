@@ -0,0 +1,474 @@
+import os
+from typing import Any, Callable, Dict, List, Optional, Literal, AsyncGenerator
+from openai import AsyncOpenAI
+from openai._types import NOT_GIVEN, NotGiven
+from pydantic import BaseModel
+from core.handlers import ToolHandler
+from core.interfaces import AsyncBaseLLMModel
+from core.models.responses import OpenAgentResponse, OpenAgentStreamingResponse
+from core.utils.prompt_cache_tracker import PromptCacheTracker
+from core.cache import ResponseCache
+from core.utils.tracing import get_tracer, usage_attributes
+from core.utils.http_client_provider import get_http_client_provider
+from modules.openai.openai_stream_accumulator import OpenAIStreamAccumulator, build_usage_response
+
+class AsyncOpenAILLMService(AsyncBaseLLMModel):
+    def __init__(self, 
+                 client: AsyncOpenAI = None,
+                 model: str = "gpt-4o-mini",
+                 system_message: Optional[str] = None,
+                 tools: Optional[List[Callable[..., Any]]] = NOT_GIVEN,
+                 api_key: Optional[str] = os.getenv("OPENAI_API_KEY"),
+                 temperature: Optional[float] = 0.3,
+                 max_tokens: Optional[int] = None,
+                 top_p: Optional[float] = None,
+                 prompt_cache_key: Optional[str] = None,
+                 response_cache: Optional[ResponseCache] = None,
+                 mcp_sessions: Optional[Dict[str, Any]] = None,
+                 mcp_tools: Optional[Dict[str, Optional[List[str]]]] = None,
+                 *args,
+                 **kwargs
+                 ) -> None:
+        super().__init__(
+            temperature=temperature,
+            max_tokens=max_tokens,
+            top_p=top_p,
+            *args,
+            **kwargs,
+        )
+
+        self._tool_functions = tools
+        # MCP tools are listed with the local tools, the pooled sessions are shared with the executor
+        self._tool_handler = ToolHandler(
+            tools=tools, llm_provider="openai", schema_type="OpenAI", mcp_sessions=mcp_sessions, mcp_tools=mcp_tools
+        )
+        
+        self._client = client
+        if client is None:
+            if api_key is None:
+                raise ValueError("No API key provided. Please set the OPENAI_API_KEY environment variable or pass it as an argument.")
+            # Share the connection pool of the event loop instead of opening one per service
+            self._client = get_http_client_provider().async_openai_client(api_key=api_key)
+
+        self._model = model
+        self._api_key = api_key
+        self._system_message = system_message
+
+        # Prompt caching: an optional routing key and a per-request record of cached prompt tokens
+        self._prompt_cache_key = prompt_cache_key
+        self._prompt_cache_tracker = PromptCacheTracker()
+
+        # Opt-in cache of deterministic responses
+        self._response_cache = response_cache
+
+    @property
+    def model(self) -> str:
+        """
+        Get the model name.
+
+        Returns:
+            The model name.
+        """
+        return self._model
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        """
+        Get the AsyncOpenAI client.
+
+        Returns:
+            The AsyncOpenAI client.
+        """
+        return self._client
+    
+    @property
+    def api_key(self) -> Optional[str]:
+        """
+        Get the API key used to create the client.
+
+        Returns:
+            The API key.
+        """
+        return self._api_key
+
+    @property
+    def prompt_cache_key(self) -> Optional[str]:
+        """
+        Get the prompt cache key sent with every request.
+
+        Returns:
+            The prompt cache key or None.
+        """
+        return self._prompt_cache_key
+
+    @property
+    def response_cache(self) -> Optional[ResponseCache]:
+        """
+        Get the response cache.
+
+        Returns:
+            The response cache or None if caching is disabled.
+        """
+        return self._response_cache
+
+    @property
+    def prompt_cache_tracker(self) -> PromptCacheTracker:
+        """
+        Get the prompt cache tracker recording the cached prompt tokens of every request.
+
+        Returns:
+            The prompt cache tracker.
+        """
+        return self._prompt_cache_tracker
+
+    # Property to access tools from the tool handler
+    @property
+    def tools(self):
+        """
+        Get the tools from the tool handler.
+
+        Returns:
+            The tools from the tool handler.
+        """
+        return self._tool_handler.tools
+    
+    def clone(self) -> 'AsyncOpenAILLMService':
+        """
+        Clone the LLM model instance.
+
+        Returns:
+            A clone of the LLM model instance.
+        """
+        return AsyncOpenAILLMService(
+            client=self._client,
+            model=self._model,
+            system_message=self._system_message,
+            tools=self._tool_functions,
+            api_key=self._api_key,
+            temperature=self._temperature,
+            max_tokens=self._max_tokens,
+            top_p=self._top_p,
+            prompt_cache_key=self._prompt_cache_key,
+            response_cache=self._response_cache,
+            mcp_sessions=self._tool_handler.sessions_map,
+            mcp_tools=self._tool_handler.mcp_tools_map,
+        )
+    
+    async def _handle_client_request(self,
+                                     messages: List[Dict[str, str]],
+                                     tools: Optional[List[Dict[str, Any]]],
+                                     response_schema: Optional[BaseModel] = NOT_GIVEN,
+                                     temperature: Optional[float] = None,
+                                     max_tokens: Optional[int] = None,
+                                     top_p: Optional[float] = None,
+                                     audio: Optional[bool] = False,
+                                     audio_format: Optional[str] = "pcm16",
+                                     audio_voice: Optional[Literal["alloy", "ash", "coral", "echo", "fable", "onyx", "nova", "sage", "shimmer"]] = "alloy",
+                                     **kwargs) -> OpenAgentResponse:
+        """
+        Handle the client request asynchronously.
+
+        Args:
+            messages: The messages to send to the model.
+            tools: The tools to use in the response.
+            response_schema: The schema to use in the response.
+            temperature: The temperature to use in the response.
+            max_tokens: The max tokens to use in the response.
+            top_p: The top p to use in the response.
+
+        Returns:
+            An OpenAgentResponse object.
+        """
+        # Serve deterministic requests from the response cache when one is configured
+        cache_key = None
+        if self._response_cache is not None and self._response_cache.is_cacheable(temperature, audio):
+            cache_key = self._response_cache.make_key(
+                model=self._model,
+                messages=messages,
+                tools=tools,
+                response_schema=response_schema,
+                temperature=temperature,
+                top_p=top_p,
+                max_tokens=max_tokens,
+            )
+            cached_response = self._response_cache.get(cache_key, response_schema=response_schema)
+            if cached_response is not None:
+                get_tracer().current_span().set_attribute("response_cache_hit", True)
+                return cached_response
+
+        tracer = get_tracer()
+
+        if response_schema is NOT_GIVEN or isinstance(response_schema, NotGiven):
+            # Handle the client request without response schema
+            with tracer.span("llm.request"):
+                client_response = await self._client.chat.completions.create(
+                    model=self._model,
+                    messages=messages,
+                    tools=tools,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    top_p=top_p,
+                    prompt_cache_key=self._prompt_cache_key if self._prompt_cache_key else NOT_GIVEN,
+                    modalities=["text", "audio"] if audio else ["text"],
+                    audio={
+                        "format": audio_format,
+                        "voice": audio_voice,
+                    } if audio else None,
+                )
+            
+            response_message = client_response.choices[0].message
+
+            # Create the response object
+            with tracer.span("llm.build_response"):
+                response = OpenAgentResponse(
+                    role=response_message.role,
+                    content=response_message.content,
+                    tool_calls=response_message.tool_calls,
+                    refusal=response_message.refusal,
+                    audio=response_message.audio,
+                )
+        else:
+            # Handle the client request with response schema
+            with tracer.span("llm.request", response_schema=getattr(response_schema, "__name__", str(response_schema))):
+                client_response = await self._client.beta.chat.completions.parse(
+                    model=self._model,
+                    messages=messages,
+                    tools=tools,
+                    response_format=response_schema,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    top_p=top_p,
+                    prompt_cache_key=self._prompt_cache_key if self._prompt_cache_key else NOT_GIVEN,
+                )
+
+            response_message = client_response.choices[0].message
+
+            # Create the response object
+            with tracer.span("llm.build_response"):
+                response = OpenAgentResponse(
+                    role=response_message.role,
+                    content=response_message.parsed,
+                    tool_calls=response_message.tool_calls,
+                    refusal=response_message.refusal,
+                    audio=response_message.audio,
+                )
+        
+        response.usage = build_usage_response(client_response.usage)
+        self._prompt_cache_tracker.record(response.usage)
+
+        if cache_key is not None:
+            self._response_cache.set(cache_key, response, tool_calls=self._tool_handler.parse_tool_args(response))
+        
+        return response
+
+    async def _handle_client_stream(self,
+                                    messages: List[Dict[str, str]],
+                                    tools: Optional[List[Dict[str, Any]]],
+                                    response_schema: Optional[BaseModel] = NOT_GIVEN,
+                                    temperature: Optional[float] = None,
+                                    max_tokens: Optional[int] = None,
+                                    top_p: Optional[float] = None,
+                                    audio: Optional[bool] = False,
+                                    audio_format: Optional[str] = "pcm16",
+                                    audio_voice: Optional[Literal["alloy", "ash", "coral", "echo", "fable", "onyx", "nova", "sage", "shimmer"]] = "alloy",
+                                    **kwargs) -> AsyncGenerator[OpenAgentStreamingResponse, None]:
+        """
+        Handle the streaming client request asynchronously.
+
+        Args:
+            messages: The messages to send to the model.
+            tools: The tools to use in the response.
+            response_schema: The schema to use in the response.
+            temperature: The temperature to use in the response.
+            max_tokens: The max tokens to use in the response.
+            top_p: The top p to use in the response.
+
+        Returns:
+            An OpenAgentStreamingResponse async generator.
+        """
+        accumulator = OpenAIStreamAccumulator(response_schema=response_schema)
+
+        if response_schema is NOT_GIVEN or isinstance(response_schema, NotGiven):
+            # Handle the client request without response schema
+            stream = await self._client.chat.completions.create(
+                model=self._model,
+                messages=messages,
+                tools=tools,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                top_p=top_p,
+                prompt_cache_key=self._prompt_cache_key if self._prompt_cache_key else NOT_GIVEN,
+                modalities=["text", "audio"] if audio else ["text"],
+                audio={
+                    "format": audio_format,
+                    "voice": audio_voice,
+                } if audio else None,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+
+            async for chunk in stream:
+                delta_response = accumulator.add_chunk(chunk)
+                if delta_response is not None:
+                    yield delta_response
+        else:
+            # Handle the client request with response schema, the final content is parsed into the schema
+            async with self._client.beta.chat.completions.stream(
+                model=self._model,
+                messages=messages,
+                tools=tools,
+                response_format=response_schema,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                top_p=top_p,
+                prompt_cache_key=self._prompt_cache_key if self._prompt_cache_key else NOT_GIVEN,
+                stream_options={"include_usage": True},
+            ) as stream:
+                async for event in stream:
+                    if event.type != "chunk":
+                        continue
+                    delta_response = accumulator.add_chunk(event.chunk)
+                    if delta_response is not None:
+                        yield delta_response
+
+        final_response = accumulator.finalize()
+        self._prompt_cache_tracker.record(final_response.usage)
+        get_tracer().current_span().set_attributes(
+            tool_calls=len(final_response.tool_calls or []),
+            **usage_attributes(final_response.usage),
+        )
+        yield final_response
+          
+    async def model_generate(self, 
+                             messages: List[Dict[str, str]],
+                             tools: Optional[List[Dict[str, Any]]] = None,
+                             response_schema: Optional[BaseModel] = NOT_GIVEN,
+                             temperature: Optional[float] = None,
+                             max_tokens: Optional[int] = None,
+                             top_p: Optional[float] = None,
+                             audio: Optional[bool] = False,
+                             audio_format: Optional[str] = "pcm16",
+                             audio_voice: Optional[Literal["alloy", "ash", "coral", "echo", "fable", "onyx", "nova", "sage", "shimmer"]] = "alloy",
+                             **kwargs) -> OpenAgentResponse:
+        """
+        Generate a response from the model asynchronously.
+        
+        Args:
+            messages: The messages to send to the model.
+            tools: The tools to use in the response.
+            response_schema: The schema to use in the response.
+            temperature: The temperature to use in the response.
+            max_tokens: The maximum number of tokens to use in the response.
+            top_p: The top p to use in the response.
+            audio: Whether to include audio in the response.
+            audio_format: The format of the audio.
+            audio_voice: The voice to use for the audio.
+        
+        Returns:
+            An OpenAgentResponse object.
+
+        Example:
+        ```python
+        from openai import AsyncOpenAI
+        from modules.openai import AsyncOpenAILLMService
+
+        llm_service = AsyncOpenAILLMService(AsyncOpenAI())
+        response = await llm_service.model_generate(messages=[{"role": "user", "content": "What is TECHVIFY?"}])
+        ```
+        """
+        temperature = kwargs.get("temperature", temperature)
+        if temperature is None:
+            temperature = self._temperature
+
+        max_tokens = kwargs.get("max_tokens", max_tokens)
+        if max_tokens is None:
+            max_tokens = self._max_tokens
+
+        top_p = kwargs.get("top_p", top_p)
+        if top_p is None:
+            top_p = self._top_p
+
+        if tools is None:
+            tools = self.tools
+
+        with get_tracer().span("llm.generate", model=self._model, messages=len(messages)) as span:
+            # Handle the client request
+            response = await self._handle_client_request(
+                messages=messages, 
+                tools=tools,
+                response_schema=response_schema,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                top_p=top_p,
+                audio=audio,
+                audio_format=audio_format,
+                audio_voice=audio_voice,
+            )
+        
+            if response.tool_calls:
+                # Extract tool_calls arguments using the tool handler
+                response.tool_calls = self._tool_handler.parse_tool_args(response)
+
+            span.set_attributes(tool_calls=len(response.tool_calls or []), **usage_attributes(response.usage))
+        
+        return response
+
+    async def model_stream(self,
+                           messages: List[Dict[str, str]],
+                           tools: Optional[List[Dict[str, Any]]] = None,
+                           response_schema: Optional[BaseModel] = NOT_GIVEN,
+                           temperature: Optional[float] = None,
+                           max_tokens: Optional[int] = None,
+                           top_p: Optional[float] = None,
+                           audio: Optional[bool] = False,
+                           audio_format: Optional[str] = "pcm16",
+                           audio_voice: Optional[Literal["alloy", "ash", "coral", "echo", "fable", "onyx", "nova", "sage", "shimmer"]] = "alloy",
+                           **kwargs) -> AsyncGenerator[OpenAgentStreamingResponse, None]:
+        """
+        Stream a response from the model asynchronously.
+
+        Content deltas are yielded as they arrive. The last chunk of the stream
+        has `finish_reason` set and carries the complete content, the parsed tool calls and usage.
+        
+        Args:
+            messages: The messages to send to the model.
+            tools: The tools to use in the response.
+            response_schema: The schema to use in the response.
+            temperature: The temperature to use in the response.
+            max_tokens: The maximum number of tokens to use in the response.
+            top_p: The top p to use in the response.
+            audio: Whether to include audio in the response.
+            audio_format: The format of the audio.
+            audio_voice: The voice to use for the audio.
+        
+        Returns:
+            An OpenAgentStreamingResponse async generator.
+        """
+        temperature = kwargs.get("temperature", temperature)
+        if temperature is None:
+            temperature = self._temperature
+
+        max_tokens = kwargs.get("max_tokens", max_tokens)
+        if max_tokens is None:
+            max_tokens = self._max_tokens
+
+        top_p = kwargs.get("top_p", top_p)
+        if top_p is None:
+            top_p = self._top_p
+
+        if tools is None:
+            tools = self.tools
+
+        with get_tracer().span("llm.stream", model=self._model, messages=len(messages)):
+            async for chunk in self._handle_client_stream(
+                messages=messages,
+                tools=tools,
+                response_schema=response_schema,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                top_p=top_p,
+                audio=audio,
+                audio_format=audio_format,
+                audio_voice=audio_voice,
+            ):
+                yield chunk
@@ -1,9 +1,14 @@
 import tiktoken
-from openai import OpenAI
+from openai import OpenAI, APIConnectionError, APIStatusError, APITimeoutError
+from concurrent.futures import ThreadPoolExecutor
 from core.interfaces.base_embedding_model import BaseEmbeddingModel
 from core.models.io.embedding_unit import EmbeddingUnit
 from core.models.responses import EmbeddingResponse
-from typing import Union, Literal, Optional
+from typing import Any, Union, Literal, Optional
+from loguru import logger
+import random
+import threading
+import time
 
 class OpenAIEmbeddingModel(BaseEmbeddingModel):
     def __init__(
@@ -15,13 +20,27 @@ class OpenAIEmbeddingModel(BaseEmbeddingModel):
             "text-embedding-ada-002",
         ]] = "text-embedding-3-small",
         embedding_encoding: str = "cl100k_base",
-        encoding_format: Literal["base64", "float"] = "base64",):
+        encoding_format: Literal["base64", "float"] = "base64",
+        max_batch_size: int = 2048,
+        max_batch_tokens: int = 300000,
+        max_concurrency: int = 4,
+        max_retries: int = 3,
+        retry_delay: float = 0.5,):
         
         self.client = client
         self.embedding_model = embedding_model
         self.embedding_encoding = embedding_encoding
         self.encoding_format = encoding_format
 
+        # Requests are packed up to these limits of the API and sent `max_concurrency` at a time
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self._encoder: Optional[Any] = None
+        self._encoder_lock = threading.Lock()
+
 
         # The dimensions of the embedding vector are determined by the model used.
         match self.embedding_model: 
@@ -53,41 +72,102 @@ class OpenAIEmbeddingModel(BaseEmbeddingModel):
                      texts: list[str],
                      include_metadata: bool = False) -> Union[list[EmbeddingUnit], EmbeddingResponse]:
         
-        """Encodes a list of texts into embeddings using the OpenAI embedding model."""
-        
-        formatted_texts: list[str] = []
-        for text in texts: 
-            text = text.replace("\n", " ")
-            formatted_texts.append(text)
-            
-            
-        response = self.client.embeddings.create(
-            model = self.embedding_model,
-            input = formatted_texts,
-            encoding_format = self.embedding_encoding,
-        )
-        
-        embeddings: list[EmbeddingUnit] = []
+        """
+        Encodes a list of texts into embeddings using the OpenAI embedding model.
+
+        The texts are packed into requests of at most `max_batch_size` texts and `max_batch_tokens`
+        tokens, sent `max_concurrency` at a time with retries, and the embeddings are returned in
+        the order of the texts, `index` being the position of the text in `texts`.
+        """
         
-        for embedding in response.data:
-            embedding_unit = EmbeddingUnit(
-                index=embedding.index,
-                object=embedding.object,
-                content=formatted_texts[embedding.index],
-                embedding=embedding.embedding,
-                type=self.encoding_format
-            )
-            embeddings.append(embedding_unit)
+        formatted_texts: list[str] = [text.replace("\n", " ") for text in texts]
+        batches = self._pack_batches(formatted_texts)
+
+        if len(batches) <= 1 or self.max_concurrency <= 1:
+            responses = [self._embed_batch(formatted_texts, batch) for batch in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(batches)), thread_name_prefix="embeddings") as pool:
+                responses = list(pool.map(lambda batch: self._embed_batch(formatted_texts, batch), batches))
+
+        embeddings: list[Optional[EmbeddingUnit]] = [None] * len(formatted_texts)
+        total_tokens = 0
+        for batch, response in zip(batches, responses):
+            total_tokens += response.usage.total_tokens
+            for embedding in response.data:
+                # The index of an embedding is its position in its request
+                position = batch[embedding.index]
+                embeddings[position] = EmbeddingUnit(
+                    index=position,
+                    object=embedding.object,
+                    content=formatted_texts[position],
+                    embedding=embedding.embedding,
+                    type=self.encoding_format
+                )
             
             
         if include_metadata:
             return EmbeddingResponse(
                 embeddings=embeddings,
                 embedding_model=self.embedding_model,
-                total_tokens=response.usage.total_tokens,
+                total_tokens=total_tokens,
             )
         else:
             return embeddings
+
+    def _count_tokens(self, texts: list[str]) -> list[int]:
+        if self._encoder is None:
+            with self._encoder_lock:
+                if self._encoder is None:
+                    try:
+                        self._encoder = tiktoken.get_encoding(self.embedding_encoding)
+                    except Exception as e:
+                        # Without the encoding, the UTF-8 length is an upper bound of the token count
+                        logger.warning(f"Could not load the '{self.embedding_encoding}' encoding, batches are sized by bytes: {e}")
+                        self._encoder = False
+        if self._encoder is False:
+            return [len(text.encode("utf-8")) for text in texts]
+        return [len(tokens) for tokens in self._encoder.encode_ordinary_batch(texts)]
+
+    def _pack_batches(self, texts: list[str]) -> list[list[int]]:
+        """
+        Pack the positions of the texts into requests within the item and token limits, in order.
+        """
+        if len(texts) <= self.max_batch_size and sum(len(text.encode("utf-8")) for text in texts) <= self.max_batch_tokens:
+            # Small enough for one request whatever the tokenization, no need to count tokens
+            return [list(range(len(texts)))] if texts else []
+
+        batches: list[list[int]] = []
+        batch: list[int] = []
+        batch_tokens = 0
+        for position, tokens in enumerate(self._count_tokens(texts)):
+            if batch and (len(batch) >= self.max_batch_size or batch_tokens + tokens > self.max_batch_tokens):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(position)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _embed_batch(self, texts: list[str], batch: list[int]) -> Any:
+        """
+        Send one request, retrying rate limits, server errors and connection failures with backoff.
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.client.embeddings.create(
+                    model = self.embedding_model,
+                    input = [texts[position] for position in batch],
+                    encoding_format = self.encoding_format,
+                )
+            except (APIConnectionError, APITimeoutError, APIStatusError) as e:
+                status = getattr(e, "status_code", None)
+                retryable = status is None or status == 429 or status >= 500
+                if not retryable or attempt == self.max_retries:
+                    raise
+                delay = self.retry_delay * (2 ** attempt) * (1 + random.random())
+                logger.warning(f"Embedding request of {len(batch)} texts failed ({type(e).__name__}), retrying in {delay:.1f}s")
+                time.sleep(delay)
         
     def tokenize_texts(self, texts = list[str]) -> list[list[int]]:
         """
@@ -6,9 +6,17 @@ from openai import OpenAI
 from openai._types import NOT_GIVEN
 from core.interfaces.base_executor import BaseExecutor
 from modules.openai.openai_llm_service import OpenAILLMService
-from core.models.responses import OpenAgentResponse
-from core.handlers import ToolHandler
+from modules.openai.openai_executor_turn import OpenAIExecutorTurn
+from core.models.responses import OpenAgentResponse, OpenAgentStreamingResponse
+from core.handlers import ToolHandler, ContextWindowManager
+from core.cache import ResponseCache, SemanticCache, VolatileMessage
+from core.utils.usage_tracker import UsageTracker, get_process_usage_tracker
 import datetime
+import re
+import sys
+
+# The clock stamped into the system prompt without a stable prefix
+_CLOCK_LINE = re.compile(r"\s*Current date and time: \d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\s*")
 
 class OpenAIExecutor(BaseExecutor):
     def __init__(self,
@@ -20,23 +28,54 @@ class OpenAIExecutor(BaseExecutor):
                  temperature: Optional[float] = 0.3,
                  max_tokens: Optional[int] = None,
                  top_p: Optional[float] = None,
+                 concurrent_tool_calls: bool = False,
+                 tool_timeout: Optional[float] = None,
+                 tool_backend: Optional[Literal["inline", "thread", "process"]] = None,
+                 mcp_sessions: Optional[Dict[str, Any]] = None,
+                 mcp_tools: Optional[Dict[str, Optional[List[str]]]] = None,
+                 context_window: Optional[ContextWindowManager] = None,
+                 stable_prefix: bool = False,
+                 prompt_cache_key: Optional[str] = None,
+                 response_cache: Optional[ResponseCache] = None,
+                 semantic_cache: Optional[SemanticCache] = None,
+                 usage_tracker: Optional[UsageTracker] = None,
                  **kwargs):
+        # With a stable prefix the system prompt stays byte-identical across requests,
+        # volatile data (the clock) is sent in a late message instead.
+        self._stable_prefix = stable_prefix
+        self._base_system_message = system_message
+
         context_history = kwargs.get("context_history", None)
-        super().__init__(system_message=system_message, context_history=context_history)
+        super().__init__(system_message=self.define_system_message(system_message), context_history=context_history, context_window=context_window)
 
+        self._tool_functions = tools
         self._llm_service = OpenAILLMService(
             client=client,
             model=model,
-            system_message=self.define_system_message(system_message),
+            system_message=self._system_message,
             tools=tools,
             api_key=api_key,
             temperature=temperature,
             max_tokens=max_tokens,
             top_p=top_p,
+            prompt_cache_key=prompt_cache_key,
+            response_cache=response_cache,
+            mcp_sessions=mcp_sessions,
+            mcp_tools=mcp_tools,
         )
 
+        self._semantic_cache = semantic_cache
+        self._usage_tracker = usage_tracker or UsageTracker(parent=get_process_usage_tracker())
+
         self._tool_handler = ToolHandler(
-            tools=tools, llm_provider="openai", schema_type="OpenAI"
+            tools=tools,
+            llm_provider="openai",
+            schema_type="OpenAI",
+            concurrent_tool_calls=concurrent_tool_calls,
+            tool_timeout=tool_timeout,
+            tool_backend=tool_backend,
+            mcp_sessions=mcp_sessions,
+            mcp_tools=mcp_tools,
         )
 
     @property
@@ -75,22 +114,34 @@ class OpenAIExecutor(BaseExecutor):
         return OpenAIExecutor(
             client=self._llm_service.client,
             model=self._llm_service.model,
-            system_message=self._llm_service.system_message,
-            tools=self._llm_service.tools,
+            system_message=self._base_system_message,
+            tools=self._tool_functions,
             api_key=self._llm_service.api_key,
             temperature=self.temperature,
             max_tokens=self.max_tokens,
             top_p=self.top_p,
+            concurrent_tool_calls=self._tool_handler.concurrent_tool_calls,
+            tool_timeout=self._tool_handler.tool_timeout,
+            tool_backend=self._tool_handler.tool_backend,
+            mcp_sessions=self._tool_handler.sessions_map,
+            mcp_tools=self._tool_handler.mcp_tools_map,
+            context_window=self._context_window,
+            stable_prefix=self._stable_prefix,
+            prompt_cache_key=self._llm_service.prompt_cache_key,
+            response_cache=self._llm_service.response_cache,
+            semantic_cache=self._semantic_cache,
+            usage_tracker=UsageTracker(parent=self._usage_tracker.parent),
         )
     
     def get_history(self) -> List[Dict[str, Any]]:
-        return self._llm_service.history
+        return self.get_context()
     
     def clear_history(self) -> List[Dict[str, Any]]:
         """
         Clear the chat history leaving only the system message.
         """
-        return self._llm_service.clear_context()
+        self.clear_context()
+        return self.get_context()
     
     def define_system_message(self, message: Optional[str] = None) -> str:
         """
@@ -105,12 +156,145 @@ class OpenAIExecutor(BaseExecutor):
         system_message = message if message is not None else """
             System Message: You are an helpful assistant, try to assist the user in everything.\n
             """
+        if self._stable_prefix:
+            return system_message
+
         system_message += f"""
         Current date and time: {datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}\n
         
         """
         return system_message
 
+    def get_request_context(self) -> List[Dict[str, Any]]:
+        """
+        Get the messages to send to the model.
+        With a stable prefix the current date and time is appended as a late system message,
+        so everything before it can be served from the prompt cache.
+
+        The clock is marked volatile, so it is left out of the response cache key and a replay
+        of the same conversation hits the cache in any later run.
+
+        Returns:
+            List[Dict[str, Any]]: The messages to send to the model.
+        """
+        context = super().get_request_context()
+        if not self._stable_prefix:
+            system = context[0] if context else None
+            if self._llm_service.response_cache is None or system is None or system.get("role") != "system" or not isinstance(system.get("content"), str):
+                return context
+            unstamped = {**system, "content": _CLOCK_LINE.sub("\n", system["content"])}
+            return [VolatileMessage(system, key=unstamped), *context[1:]]
+
+        return [
+            *context,
+            VolatileMessage({
+                "role": "system",
+                "content": f"Current date and time: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}",
+            }),
+        ]
+
+    @property
+    def prompt_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get the prompt caching statistics of the requests sent by this executor.
+
+        Returns:
+            Dict[str, Any]: The request count, prompt and cached token totals and the cache-hit ratios.
+        """
+        return self._llm_service.prompt_cache_tracker.snapshot()
+
+    @property
+    def usage_tracker(self) -> UsageTracker:
+        """
+        Get the usage tracker of this executor (one session).
+
+        Returns:
+            The usage tracker.
+        """
+        return self._usage_tracker
+
+    @property
+    def usage_stats(self) -> Dict[str, Any]:
+        """
+        Get the token usage, call counts and latency percentiles of the turns run by this executor.
+
+        Returns:
+            Dict[str, Any]: The usage snapshot of the session.
+        """
+        return self._usage_tracker.snapshot()
+
+    def _semantic_cache_query(self, messages: List[Dict[str, str]]) -> Optional[str]:
+        """
+        Get the query to look up in the semantic cache.
+        Only a single user message with text content opening the conversation is answered from
+        (and stored in) the cache: the cache is shared by every clone, and a follow-up such as
+        "and tomorrow?" depends on a history that other sessions do not have.
+
+        Args:
+            messages (List[Dict[str, str]]): The incoming messages.
+
+        Returns:
+            Optional[str]: The query or None if the request must not use the semantic cache.
+        """
+        if self._semantic_cache is None or len(messages) != 1:
+            return None
+
+        message = messages[0]
+        if message.get("role") != "user" or not isinstance(message.get("content"), str):
+            return None
+        if any(record.role == "user" for record in self._history):
+            return None
+        return message["content"]
+
+    def _semantic_cache_namespace(self) -> str:
+        """
+        Get the semantic cache namespace of this executor: its model and its system prompt without the clock.
+        """
+        return SemanticCache.namespace_of(self.model, _CLOCK_LINE.sub("\n", self._system_message))
+
+    def _lookup_semantic_cache(self, query: Optional[str]) -> tuple[Optional[OpenAgentResponse], Optional[Any]]:
+        """
+        Look up a query in the semantic cache, embedding failures never fail the turn.
+
+        Args:
+            query (Optional[str]): The query to look up.
+
+        Returns:
+            tuple[Optional[OpenAgentResponse], Optional[Any]]: The cached answer without usage (None on a miss) and the query vector.
+        """
+        if query is None:
+            return None, None
+
+        try:
+            cached_response, vector = self._semantic_cache.lookup(query, namespace=self._semantic_cache_namespace())
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup failed: {e}")
+            return None, None
+
+        if cached_response is not None:
+            # A cache hit costs no model tokens
+            cached_response = cached_response.model_copy(update={"usage": None})
+        return cached_response, vector
+
+    def _store_semantic_cache(self,
+                              vector: Optional[Any],
+                              query: Optional[str],
+                              response: OpenAgentResponse,
+                              tools_used: List[str]) -> None:
+        """
+        Store the final text answer of a turn in the semantic cache.
+
+        Args:
+            vector (Optional[Any]): The query vector returned by the lookup.
+            query (Optional[str]): The query.
+            response (OpenAgentResponse): The final response of the turn.
+            tools_used (List[str]): The names of the tools called during the turn.
+        """
+        if vector is None or query is None or not isinstance(response.content, str):
+            return
+
+        self._semantic_cache.store(vector, query, response, tools_used=tools_used, namespace=self._semantic_cache_namespace())
+
     def execute(self, 
                 messages: List[Dict[str, str]],
                 tools: Optional[List[Dict[str, Any]]] = NOT_GIVEN,
@@ -134,108 +318,175 @@ class OpenAIExecutor(BaseExecutor):
         Returns:
             An OpenAgentResponse generator.
         """
-        temperature = kwargs.get("temperature", temperature)
-        if temperature is None:
-            temperature = self.temperature
+        turn = OpenAIExecutorTurn(self, stream=False, tools=tools, temperature=temperature, max_tokens=max_tokens, top_p=top_p, **kwargs)
+        try:
+            cache_query = self._semantic_cache_query(messages)
+            cached_response, cache_vector = self._lookup_semantic_cache(cache_query)
+            if cached_response is not None:
+                turn.set_attribute("semantic_cache_hit", True)
+                self.extend_context(messages)
+                turn.add_response(cached_response)
+                yield cached_response
+                return
+        
+            context = self.extend_context(messages)
+        
+            logger.opt(lazy=True).debug("Context: {}", lambda: context) if turn.debug else None
 
-        max_tokens = kwargs.get("max_tokens", max_tokens)
-        if max_tokens is None:
-            max_tokens = self.max_tokens
+            stop = False
 
-        top_p = kwargs.get("top_p", top_p)
-        if top_p is None:
-            top_p = self.top_p
+            while not stop:
+                with turn.iteration():
+                    # Take user initial request along with the chat history -> response
+                    response = self._llm_service.model_generate(
+                        messages=self.get_request_context(),
+                        response_schema=response_schema,
+                        **turn.options,
+                    )
+                    turn.record_model_call(response.usage)
 
-        debug = kwargs.get("debug", False)
-        
-        if tools == NOT_GIVEN:
-            tools = self._llm_service.tools
-        
-        context = self.extend_context(messages)
-        
-        logger.debug(f"Context: {context}") if debug else None
-
-        stop = False
-
-        while not stop:
-            # Take user initial request along with the chat history -> response
-            response = self._llm_service.model_generate(
-                messages=context, 
-                tools=tools, 
-                response_schema=response_schema,
-                temperature=temperature,
-                max_tokens=max_tokens,
-                top_p=top_p,
-            )
-
-            logger.info(f"Response Received: {response}") if debug else None
-            
-            if response.content is not None:
-                # Add the response to the context (chat history)
-                context = self.add_context(
-                    {
-                        "role": response.role,
-                        "content": str(response.content),
-                    }
-                )
-
-            tool_results = []
+                    logger.opt(lazy=True).info("Response Received: {}", lambda: response) if turn.debug else None
+
+                    context = turn.add_response(response)
+
+                    tool_results = []
             
-            if response.tool_calls:
-                # Add the tool call request to the context
-                context = self.add_context(
-                    {
-                        "role": response.role,
-                        "tool_calls": response.tool_calls,
-                        "content": str(response.content),
-                    }
-                )
-
-                yield OpenAgentResponse(
-                    role=response.role,
-                    content=str(response.content) if not isinstance(response.content, (BaseModel, type(None))) else response.content,
-                    tool_calls=response.tool_calls,
-                    refusal=response.refusal,
-                    usage=response.usage,
-                )
-
-                # Handle tool requests and get the final response with tool results
-                tool_response = self._tool_handler.handle_tool_request(
-                    response=response,
-                )
-
-                yield OpenAgentResponse(
-                    role="tool",
-                    tool_results=tool_response.tool_results,
-                )
-
-                logger.debug(f"Tool Messages in Execute: {tool_response.tool_messages}") if debug else None
-
-                context = self.extend_context([tool_message.model_dump() for tool_message in tool_response.tool_messages])
-
-                logger.debug(f"Context: {context}") if debug else None
-            else:
-                stop = True
-
-            if response.content is not None:
-                # If there is no response, return an error
-                if not response:
-                    logger.error("No response from the model")
-                    yield OpenAgentResponse(
-                        role="assistant",
-                        content="",
-                        tool_results=tool_results,
-                        refusal="No response from the model",
-                        audio=None,
-                    )
-                
-                yield OpenAgentResponse(
-                    role=response.role,
-                    content=str(response.content) if not isinstance(response.content, (BaseModel, type(None))) else response.content,
-                    tool_calls=response.tool_calls,
-                    tool_results=tool_results,
-                    refusal=response.refusal,
-                    audio=response.audio,
-                    usage=response.usage,
-                )
-                
+                    if response.tool_calls:
+                        # A copy, the response is yielded again below with its content and tool results
+                        yield response.model_copy()
+
+                        # Handle tool requests and get the final response with tool results
+                        tool_response = self._tool_handler.handle_tool_request(
+                            response=response,
+                        )
+
+                        yield OpenAgentResponse(
+                            role="tool",
+                            tool_results=tool_response.tool_results,
+                        )
+
+                        logger.opt(lazy=True).debug("Tool Messages in Execute: {}", lambda: tool_response.tool_messages) if turn.debug else None
+
+                        context = turn.add_tool_results(tool_response)
+
+                        logger.opt(lazy=True).debug("Context: {}", lambda: context) if turn.debug else None
+                    else:
+                        stop = True
+
+                    if response.content is not None:
+                        # If there is no response, return an error
+                        if not response:
+                            logger.error("No response from the model")
+                            yield OpenAgentResponse(
+                                role="assistant",
+                                content="",
+                                tool_results=tool_results,
+                                refusal="No response from the model",
+                                audio=None,
+                            )
+
+                        # The final response is the model response itself, with the tool results of this call
+                        response.tool_results = tool_results
+
+                        if stop:
+                            self._store_semantic_cache(cache_vector, cache_query, response, turn.tools_used)
+
+                        yield response
+        finally:
+            turn.end(sys.exc_info()[1])
+
+    def stream_execute(self,
+                       messages: List[Dict[str, str]],
+                       tools: Optional[List[Dict[str, Any]]] = NOT_GIVEN,
+                       response_schema: Optional[BaseModel] = NOT_GIVEN,
+                       temperature: Optional[float] = None,
+                       max_tokens: Optional[int] = None,
+                       top_p: Optional[float] = None,
+                       **kwargs,
+                       ) -> Generator[OpenAgentStreamingResponse, None, None]:
+        """
+        Stream execute the OpenAI model and yield OpenAgentStreamingResponse objects.
+
+        Content deltas are yielded as soon as they arrive. Every model call ends with a
+        final chunk (with `finish_reason` set) holding the complete message, which is
+        also the one appended to the context history. Tool results are yielded as a
+        chunk with the role `tool`.
+
+        Args:
+            messages (List[Dict[str, str]]): The messages to send to the model.
+            tools (Optional[List[Dict[str, Any]]]): The tools to use in the response.
+            response_schema (Optional[BaseModel]): The schema to use in the response.
+            temperature (Optional[float]): The temperature to use in the response.
+            max_tokens (Optional[int]): The maximum number of tokens to use in the response.
+            top_p (Optional[float]): The top p to use in the response.
+
+        Returns:
+            An OpenAgentStreamingResponse generator.
+        """
+        turn = OpenAIExecutorTurn(self, stream=True, tools=tools, temperature=temperature, max_tokens=max_tokens, top_p=top_p, **kwargs)
+        try:
+            cache_query = self._semantic_cache_query(messages)
+            cached_response, cache_vector = self._lookup_semantic_cache(cache_query)
+            if cached_response is not None:
+                turn.set_attribute("semantic_cache_hit", True)
+                self.extend_context(messages)
+                turn.add_response(cached_response)
+                yield OpenAgentStreamingResponse(role=cached_response.role, index=0, delta_content=str(cached_response.content))
+                yield OpenAgentStreamingResponse(role=cached_response.role, index=1, content=cached_response.content, finish_reason="stop")
+                return
+
+            context = self.extend_context(messages)
+
+            stop = False
+
+            while not stop:
+                with turn.iteration():
+                    for chunk in self._llm_service.model_stream(
+                        messages=self.get_request_context(),
+                        response_schema=response_schema,
+                        **turn.options,
+                    ):
+                        turn.record_chunk(chunk)
+                        yield chunk
+                    final_chunk = turn.final_chunk
+                    turn.record_model_call(final_chunk.usage if final_chunk else None)
+
+                    logger.opt(lazy=True).info("Response Received: {}", lambda: final_chunk) if turn.debug else None
+
+                    if final_chunk is None:
+                        logger.error("No response from the model")
+                        yield OpenAgentStreamingResponse(
+                            role="assistant",
+                            refusal="No response from the model",
+                            finish_reason="error",
+                        )
+                        break
+
+                    # Add the complete response (and its tool call requests) to the context
+                    context = turn.add_response(final_chunk)
+
+                    if final_chunk.tool_calls:
+                        # Handle tool requests and get the final response with tool results
+                        tool_response = self._tool_handler.handle_tool_request(
+                            response=final_chunk,
+                        )
+
+                        yield OpenAgentStreamingResponse(
+                            role="tool",
+                            tool_results=tool_response.tool_results,
+                        )
+
+                        context = turn.add_tool_results(tool_response)
+
+                        logger.opt(lazy=True).debug("Context: {}", lambda: context) if turn.debug else None
+                    else:
+                        if final_chunk.content is not None:
+                            self._store_semantic_cache(
+                                cache_vector,
+                                cache_query,
+                                OpenAgentResponse(role=final_chunk.role, content=final_chunk.content, usage=final_chunk.usage),
+                                turn.tools_used,
+                            )
+                        stop = True
+        finally:
+            turn.end(sys.exc_info()[1])
@@ -0,0 +1,153 @@
+from typing import Any, Dict, List, Optional, Union
+from openai._types import NOT_GIVEN
+from core.interfaces.base_executor import BaseExecutor
+from core.models.io.message_log import Message, MessageLog
+from core.models.responses import OpenAgentResponse, OpenAgentStreamingResponse, UsageResponse
+from core.utils.tracing import Span, get_tracer
+import time
+
+
+class OpenAIExecutorTurn:
+    """
+    A class holding the bookkeeping of one executor turn: the generation options, the usage
+    record and tracing spans, and the history updates. It is shared by the synchronous and
+    asynchronous executors, which only differ in how they call the model and the tools.
+
+    ## Methods:
+        `iteration()`: A method to open the span of one model call, to be used as a context manager.
+
+        `record_model_call()`: A method to record the usage and latency of the model call of the iteration.
+
+        `record_chunk()`: A method to record a streamed chunk and keep the final one.
+
+        `add_response()`: A method to add a model response to the history.
+
+        `add_tool_results()`: A method to add the tool messages to the history and record the tool calls.
+
+        `set_attribute()`: A method to set an attribute of the turn span.
+
+        `end()`: A method to close the turn.
+
+    ## Properties:
+        `options`: The generation arguments of the model calls (tools, temperature, max_tokens, top_p).
+
+        `debug`: Whether the turn logs its context and responses.
+
+        `tools_used`: The names of the tools called during the turn.
+
+        `final_chunk`: The final chunk of the current streamed model call.
+    """
+    def __init__(self,
+                 executor: BaseExecutor,
+                 stream: bool,
+                 tools: Optional[List[Dict[str, Any]]] = NOT_GIVEN,
+                 temperature: Optional[float] = None,
+                 max_tokens: Optional[int] = None,
+                 top_p: Optional[float] = None,
+                 **kwargs):
+        temperature = kwargs.get("temperature", temperature)
+        max_tokens = kwargs.get("max_tokens", max_tokens)
+        top_p = kwargs.get("top_p", top_p)
+
+        self.options: Dict[str, Any] = {
+            "tools": executor.tools if tools == NOT_GIVEN else tools,
+            "temperature": executor.temperature if temperature is None else temperature,
+            "max_tokens": executor.max_tokens if max_tokens is None else max_tokens,
+            "top_p": executor.top_p if top_p is None else top_p,
+        }
+        self.debug = kwargs.get("debug", False)
+        self.tools_used: List[str] = []
+        self.final_chunk: Optional[OpenAgentStreamingResponse] = None
+
+        self._executor = executor
+        self._tracer = get_tracer()
+        self._usage_tracker = executor.usage_tracker
+        self._turn = self._usage_tracker.start_turn()
+        self._span = self._tracer.start_span("executor.turn", model=executor.model, stream=stream)
+        self._iterations = 0
+        self._call_start = time.perf_counter()
+
+    def iteration(self) -> Span:
+        """
+        Open the span of the next model call and start timing it.
+
+        Returns:
+            Span: The iteration span, to be used as a context manager.
+        """
+        self._iterations += 1
+        self.final_chunk = None
+        self._call_start = time.perf_counter()
+        return self._tracer.span("executor.iteration", iteration=self._iterations)
+
+    def record_model_call(self, usage: Optional[UsageResponse]) -> None:
+        """
+        Record the usage and latency of the model call of the current iteration.
+
+        Args:
+            usage (Optional[UsageResponse]): The usage reported by the model.
+        """
+        self._turn.record_model_call(usage, time.perf_counter() - self._call_start)
+
+    def record_chunk(self, chunk: OpenAgentStreamingResponse) -> None:
+        """
+        Record a streamed chunk: the first content delta and the final chunk of the call.
+
+        Args:
+            chunk (OpenAgentStreamingResponse): The chunk.
+        """
+        if chunk.delta_content:
+            self._turn.record_first_token()
+        if chunk.finish_reason is not None:
+            self.final_chunk = chunk
+
+    def add_response(self, response: Union[OpenAgentResponse, OpenAgentStreamingResponse]) -> MessageLog:
+        """
+        Add a model response to the history, one record holding both its content and its tool calls.
+
+        Args:
+            response (Union[OpenAgentResponse, OpenAgentStreamingResponse]): The response or the final chunk.
+
+        Returns:
+            MessageLog: The context history.
+        """
+        if response.tool_calls or response.content is not None:
+            return self._executor.add_context(Message(response.role, response.content, tool_calls=response.tool_calls))
+        return self._executor.history
+
+    def add_tool_results(self, tool_response: Any) -> MessageLog:
+        """
+        Add the tool messages of a tool request to the history and record its tool calls.
+
+        Args:
+            tool_response: The tool handler response, with its `tool_results` and `tool_messages`.
+
+        Returns:
+            MessageLog: The context history.
+        """
+        self.tools_used.extend(tool_result.tool_name for tool_result in tool_response.tool_results)
+        self._turn.record_tool_calls(len(tool_response.tool_results))
+        return self._executor.extend_context([
+            Message("tool", tool_message.content, tool_call_id=tool_message.tool_call_id)
+            for tool_message in tool_response.tool_messages
+        ])
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """
+        Set an attribute of the turn span.
+
+        Args:
+            key (str): The attribute name.
+            value (Any): The attribute value.
+        """
+        self._span.set_attribute(key, value)
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        """
+        Close the turn: record its usage and end its span.
+
+        Args:
+            error (Optional[BaseException]): The exception that ended the turn, if any.
+        """
+        self._usage_tracker.end_turn(self._turn)
+        self._span.set_attributes(latency=self._turn.latency, **self._turn.counters.as_dict())
+        self._span.end(error)
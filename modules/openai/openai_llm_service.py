@@ -1,17 +1,18 @@
 import os
 from loguru import logger
-from typing import Any, Callable, Dict, List, Optional, Literal, Generator
+from typing import Any, Callable, Dict, List, Optional, Literal, Generator, Iterable
 from openai import OpenAI
+from openai.types.chat import ChatCompletionChunk
 from openai._types import NOT_GIVEN, NotGiven
 from pydantic import BaseModel
 from core.handlers import ToolHandler
 from core.interfaces import BaseLLMModel
-from core.models.responses import (
-    OpenAgentResponse,
-    UsageResponse,
-    PromptTokensDetails,
-    CompletionTokensDetails,
-)
+from core.models.responses import OpenAgentResponse, OpenAgentStreamingResponse
+from core.utils.prompt_cache_tracker import PromptCacheTracker
+from core.cache import ResponseCache
+from core.utils.tracing import get_tracer, usage_attributes
+from core.utils.http_client_provider import get_http_client_provider
+from modules.openai.openai_stream_accumulator import OpenAIStreamAccumulator, build_usage_response
 
 class OpenAILLMService(BaseLLMModel):
     def __init__(self, 
@@ -23,6 +24,10 @@ class OpenAILLMService(BaseLLMModel):
                  temperature: Optional[float] = 0.3,
                  max_tokens: Optional[int] = None,
                  top_p: Optional[float] = None,
+                 prompt_cache_key: Optional[str] = None,
+                 response_cache: Optional[ResponseCache] = None,
+                 mcp_sessions: Optional[Dict[str, Any]] = None,
+                 mcp_tools: Optional[Dict[str, Optional[List[str]]]] = None,
                 *args,
                 **kwargs
                  ) -> None:
@@ -34,27 +39,28 @@ class OpenAILLMService(BaseLLMModel):
             **kwargs,
         )
 
+        # MCP tools are listed with the local tools, the pooled sessions are shared with the executor
         self._tool_handler = ToolHandler(
-            tools=tools, llm_provider="openai", schema_type="OpenAI"
+            tools=tools, llm_provider="openai", schema_type="OpenAI", mcp_sessions=mcp_sessions, mcp_tools=mcp_tools
         )
         
         self._client = client
         if client is None:
             if api_key is None:
                 raise ValueError("No API key provided. Please set the OPENAI_API_KEY environment variable or pass it as an argument.")
-            self._client = OpenAI(
-                api_key=api_key,
-            )
+            # Share the process-wide connection pool instead of opening one per service
+            self._client = get_http_client_provider().openai_client(api_key=api_key)
 
         self._model = model
         self._api_key = api_key
         self._system_message = system_message
-        self._context_history = [
-            {
-                "role": "system",
-                "content": self._system_message,
-            }
-        ]
+
+        # Prompt caching: an optional routing key and a per-request record of cached prompt tokens
+        self._prompt_cache_key = prompt_cache_key
+        self._prompt_cache_tracker = PromptCacheTracker()
+
+        # Opt-in cache of deterministic responses
+        self._response_cache = response_cache
 
     @property
     def model(self) -> str:
@@ -67,16 +73,55 @@ class OpenAILLMService(BaseLLMModel):
         return self._model
     
     @property
-    def history(self) -> List[Dict[str, Any]]:
+    def client(self) -> OpenAI:
         """
-        Get the history of the conversation.
+        Get the OpenAI client.
 
         Returns:
-            The history of the conversation.
+            The OpenAI client.
         """
-        
-        return self._context_history
-    
+        return self._client
+
+    @property
+    def api_key(self) -> Optional[str]:
+        """
+        Get the API key used to create the client.
+
+        Returns:
+            The API key.
+        """
+        return self._api_key
+
+    @property
+    def prompt_cache_key(self) -> Optional[str]:
+        """
+        Get the prompt cache key sent with every request.
+
+        Returns:
+            The prompt cache key or None.
+        """
+        return self._prompt_cache_key
+
+    @property
+    def response_cache(self) -> Optional[ResponseCache]:
+        """
+        Get the response cache.
+
+        Returns:
+            The response cache or None if caching is disabled.
+        """
+        return self._response_cache
+
+    @property
+    def prompt_cache_tracker(self) -> PromptCacheTracker:
+        """
+        Get the prompt cache tracker recording the cached prompt tokens of every request.
+
+        Returns:
+            The prompt cache tracker.
+        """
+        return self._prompt_cache_tracker
+
     # Property to access tools from the tool handler
     @property
     def tools(self):
@@ -98,11 +143,15 @@ class OpenAILLMService(BaseLLMModel):
         return OpenAILLMService(
             client=self._client,
             model=self._model,
-            tools=self.tools,
+            tools=self._tool_handler.tool_set or NOT_GIVEN,
             api_key=self._api_key,
             temperature=self._temperature,
             max_tokens=self._max_tokens,
             top_p=self._top_p,
+            prompt_cache_key=self._prompt_cache_key,
+            response_cache=self._response_cache,
+            mcp_sessions=self._tool_handler.sessions_map,
+            mcp_tools=self._tool_handler.mcp_tools_map,
         )
     
     def _handle_client_request(self,
@@ -146,70 +195,85 @@ class OpenAILLMService(BaseLLMModel):
         if tools is None:
             tools = self.tools
 
+        # Serve deterministic requests from the response cache when one is configured
+        cache_key = None
+        if self._response_cache is not None and self._response_cache.is_cacheable(temperature, audio):
+            cache_key = self._response_cache.make_key(
+                model=self._model,
+                messages=messages,
+                tools=tools,
+                response_schema=response_schema,
+                temperature=temperature,
+                top_p=top_p,
+                max_tokens=max_tokens,
+            )
+            cached_response = self._response_cache.get(cache_key, response_schema=response_schema)
+            if cached_response is not None:
+                get_tracer().current_span().set_attribute("response_cache_hit", True)
+                return cached_response
+
+        tracer = get_tracer()
+
         if response_schema is NOT_GIVEN or isinstance(response_schema, NotGiven):
             # Handle the client request without response schema
-            client_response = self._client.chat.completions.create(
-                    model=self._model,
-                    messages=messages,
-                    tools=tools,
-                    temperature=self._temperature,
-                    max_tokens=self._max_tokens,
-                    top_p=self._top_p,
-                    modalities=["text", "audio"] if audio else ["text"],
-                    audio={
-                        "format": audio_format,
-                        "voice": audio_voice,
-                    } if audio else None,
-            )
+            with tracer.span("llm.request"):
+                client_response = self._client.chat.completions.create(
+                        model=self._model,
+                        messages=messages,
+                        tools=tools,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        top_p=top_p,
+                        prompt_cache_key=self._prompt_cache_key if self._prompt_cache_key else NOT_GIVEN,
+                        modalities=["text", "audio"] if audio else ["text"],
+                        audio={
+                            "format": audio_format,
+                            "voice": audio_voice,
+                        } if audio else None,
+                )
             
             response_message = client_response.choices[0].message
 
             # Create the response object
-            response = OpenAgentResponse(
-                role=response_message.role,
-                content=response_message.content,
-                tool_calls=response_message.tool_calls,
-                refusal=response_message.refusal,
-                audio=response_message.audio,
-            )
+            with tracer.span("llm.build_response"):
+                response = OpenAgentResponse(
+                    role=response_message.role,
+                    content=response_message.content,
+                    tool_calls=response_message.tool_calls,
+                    refusal=response_message.refusal,
+                    audio=response_message.audio,
+                )
         else:
             # Handle the client request with response schema
-            client_response = self._client.beta.chat.completions.parse(
-                model=self._model,
-                messages=messages,
-                tools=tools,
-                response_format=response_schema,
-                temperature=self._temperature,
-                max_tokens=self._max_tokens,
-                top_p=self._top_p,
-            )
+            with tracer.span("llm.request", response_schema=getattr(response_schema, "__name__", str(response_schema))):
+                client_response = self._client.beta.chat.completions.parse(
+                    model=self._model,
+                    messages=messages,
+                    tools=tools,
+                    response_format=response_schema,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    top_p=top_p,
+                    prompt_cache_key=self._prompt_cache_key if self._prompt_cache_key else NOT_GIVEN,
+                )
 
             response_message = client_response.choices[0].message
 
             # Create the response object
-            response = OpenAgentResponse(
-                role=response_message.role,
-                content=response_message.parsed,
-                tool_calls=response_message.tool_calls,
-                refusal=response_message.refusal,
-                audio=response_message.audio,
-            )
+            with tracer.span("llm.build_response"):
+                response = OpenAgentResponse(
+                    role=response_message.role,
+                    content=response_message.parsed,
+                    tool_calls=response_message.tool_calls,
+                    refusal=response_message.refusal,
+                    audio=response_message.audio,
+                )
         
-        response.usage = UsageResponse(
-            prompt_tokens=client_response.usage.prompt_tokens,
-            completion_tokens=client_response.usage.completion_tokens,
-            total_tokens=client_response.usage.total_tokens,
-            prompt_tokens_details=PromptTokensDetails(
-                cached_tokens=client_response.usage.prompt_tokens_details.cached_tokens,
-                audio_tokens=client_response.usage.prompt_tokens_details.audio_tokens,
-            ),
-            completion_tokens_details=CompletionTokensDetails(
-                reasoning_tokens=client_response.usage.completion_tokens_details.reasoning_tokens,
-                audio_tokens=client_response.usage.completion_tokens_details.audio_tokens,
-                accepted_prediction_tokens=client_response.usage.completion_tokens_details.accepted_prediction_tokens,
-                rejected_prediction_tokens=client_response.usage.completion_tokens_details.rejected_prediction_tokens,
-            ),
-        )
+        response.usage = build_usage_response(client_response.usage)
+        self._prompt_cache_tracker.record(response.usage)
+
+        if cache_key is not None:
+            self._response_cache.set(cache_key, response, tool_calls=self._tool_handler.parse_tool_args(response))
         
         return response
           
@@ -268,71 +332,190 @@ class OpenAILLMService(BaseLLMModel):
             
         #logger.info(f"Tools: {tools}")
 
-        # Handle the client request
-        response = self._handle_client_request(
-            messages=messages, 
-            tools=tools,
-            response_schema=response_schema,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            top_p=top_p,
-            audio=audio,
-            audio_format=audio_format,
-            audio_voice=audio_voice,
-        )
-        
-        if response.tool_calls:
-            # Extract tool_calls arguments using the tool handler
-            tool_calls = self._tool_handler.parse_tool_args(response)
+        with get_tracer().span("llm.generate", model=self._model, messages=len(messages)) as span:
+            # Handle the client request
+            response = self._handle_client_request(
+                messages=messages, 
+                tools=tools,
+                response_schema=response_schema,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                top_p=top_p,
+                audio=audio,
+                audio_format=audio_format,
+                audio_voice=audio_voice,
+            )
             
-            # Update the response with the parsed tool calls
-            response.tool_calls = tool_calls
+            if response.tool_calls:
+                # Extract tool_calls arguments using the tool handler
+                tool_calls = self._tool_handler.parse_tool_args(response)
+                
+                # Update the response with the parsed tool calls
+                response.tool_calls = tool_calls
+
+            span.set_attributes(tool_calls=len(response.tool_calls or []), **usage_attributes(response.usage))
         
         return response
     
-    def add_context(self, content: dict[str, str]):
+    def _assemble_stream(self,
+                         chunks: Iterable[ChatCompletionChunk],
+                         response_schema: Optional[BaseModel] = NOT_GIVEN,
+                         ) -> Generator[OpenAgentStreamingResponse, None, None]:
         """
-        Add context to the model.
+        Assemble the raw completion chunks into streaming responses.
+
+        Content deltas are yielded as soon as they arrive, while tool call
+        arguments are accumulated by their index. Once the stream is exhausted
+        a final chunk with the complete message, `finish_reason` and usage is yielded.
 
         Args:
-            content: The content to add to the context.
+            chunks: The raw completion chunks from the OpenAI client.
+            response_schema: The schema used to parse the final content.
 
         Returns:
-            The context history.
+            An OpenAgentStreamingResponse generator.
         """
-        if not content:
-            return self._context_history
-        
-        self._context_history.append(content)
-        return self._context_history
-        
-    def extend_context(self, content: List[dict[str, str]]):
+        accumulator = OpenAIStreamAccumulator(response_schema=response_schema)
+
+        for chunk in chunks:
+            delta_response = accumulator.add_chunk(chunk)
+            if delta_response is not None:
+                yield delta_response
+
+        final_response = accumulator.finalize()
+        self._prompt_cache_tracker.record(final_response.usage)
+        get_tracer().current_span().set_attributes(
+            tool_calls=len(final_response.tool_calls or []),
+            **usage_attributes(final_response.usage),
+        )
+        yield final_response
+
+    def _handle_client_stream(self,
+                              messages: List[Dict[str, str]],
+                              tools: Optional[List[Dict[str, Any]]],
+                              response_schema: Optional[BaseModel] = NOT_GIVEN,
+                              temperature: Optional[float] = None,
+                              max_tokens: Optional[int] = None,
+                              top_p: Optional[float] = None,
+                              audio: Optional[bool] = False,
+                              audio_format: Optional[str] = "pcm16",
+                              audio_voice: Optional[Literal["alloy", "ash", "coral", "echo", "fable", "onyx", "nova", "sage", "shimmer"]] = "alloy",
+                              **kwargs) -> Generator[OpenAgentStreamingResponse, None, None]:
         """
-        Extend the context of the model.
+        Handle the streaming client request.
 
         Args:
-            content: The content to extend the context with.
+            messages: The messages to send to the model.
+            tools: The tools to use in the response.
+            response_schema: The schema to use in the response.
+            temperature: The temperature to use in the response.
+            max_tokens: The max tokens to use in the response.
+            top_p: The top p to use in the response.
 
         Returns:
-            The context history.
+            An OpenAgentStreamingResponse generator.
         """
-        if not content:
-            return self._context_history
-        
-        self._context_history.extend(content)
-        return self._context_history
-    
-    def clear_context(self):
+        if response_schema is NOT_GIVEN or isinstance(response_schema, NotGiven):
+            # Handle the client request without response schema
+            stream = self._client.chat.completions.create(
+                model=self._model,
+                messages=messages,
+                tools=tools,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                top_p=top_p,
+                prompt_cache_key=self._prompt_cache_key if self._prompt_cache_key else NOT_GIVEN,
+                modalities=["text", "audio"] if audio else ["text"],
+                audio={
+                    "format": audio_format,
+                    "voice": audio_voice,
+                } if audio else None,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+
+            yield from self._assemble_stream(stream)
+        else:
+            # Handle the client request with response schema, the final content is parsed into the schema
+            with self._client.beta.chat.completions.stream(
+                model=self._model,
+                messages=messages,
+                tools=tools,
+                response_format=response_schema,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                top_p=top_p,
+                prompt_cache_key=self._prompt_cache_key if self._prompt_cache_key else NOT_GIVEN,
+                stream_options={"include_usage": True},
+            ) as stream:
+                chunks = (event.chunk for event in stream if event.type == "chunk")
+                yield from self._assemble_stream(chunks, response_schema=response_schema)
+
+    def model_stream(self,
+                     messages: List[Dict[str, str]],
+                     tools: Optional[List[Dict[str, Any]]] = None,
+                     response_schema: Optional[BaseModel] = NOT_GIVEN,
+                     temperature: Optional[float] = None,
+                     max_tokens: Optional[int] = None,
+                     top_p: Optional[float] = None,
+                     audio: Optional[bool] = False,
+                     audio_format: Optional[str] = "pcm16",
+                     audio_voice: Optional[Literal["alloy", "ash", "coral", "echo", "fable", "onyx", "nova", "sage", "shimmer"]] = "alloy",
+                     **kwargs) -> Generator[OpenAgentStreamingResponse, None, None]:
         """
-        Clear the context of the model leaving only the system message.
+        Stream a response from the model.
 
+        Content deltas are yielded as they arrive. The last chunk of the stream
+        has `finish_reason` set and carries the complete content, the parsed tool calls and usage.
+        
+        Args:
+            messages: The messages to send to the model.
+            tools: The tools to use in the response.
+            response_schema: The schema to use in the response.
+            temperature: The temperature to use in the response.
+            max_tokens: The maximum number of tokens to use in the response.
+            top_p: The top p to use in the response.
+            audio: Whether to include audio in the response.
+            audio_format: The format of the audio.
+            audio_voice: The voice to use for the audio.
+        
         Returns:
-            The cleared context history.
+            An OpenAgentStreamingResponse generator.
+
+        Example:
+        ```python
+        from modules.openai import OpenAILLMService
+
+        llm_service = OpenAILLMService(client)
+        for chunk in llm_service.model_stream(messages=[{"role": "user", "content": "Hi!"}]):
+            if chunk.delta_content:
+                print(chunk.delta_content, end="", flush=True)
+        ```
         """
-        self._context_history = [
-            {
-                "role": "system",
-                "content": self._system_message,
-            }
-        ]
-        return self._context_history
\ No newline at end of file
+        temperature = kwargs.get("temperature", temperature)
+        if temperature is None:
+            temperature = self._temperature
+
+        max_tokens = kwargs.get("max_tokens", max_tokens)
+        if max_tokens is None:
+            max_tokens = self._max_tokens
+
+        top_p = kwargs.get("top_p", top_p)
+        if top_p is None:
+            top_p = self._top_p
+
+        if tools is None:
+            tools = self.tools
+
+        with get_tracer().span("llm.stream", model=self._model, messages=len(messages)):
+            yield from self._handle_client_stream(
+                messages=messages,
+                tools=tools,
+                response_schema=response_schema,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                top_p=top_p,
+                audio=audio,
+                audio_format=audio_format,
+                audio_voice=audio_voice,
+            )
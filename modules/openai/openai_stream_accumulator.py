@@ -0,0 +1,159 @@
+from typing import Any, Dict, List, Optional
+from openai._types import NOT_GIVEN, NotGiven
+from openai.types.chat import ChatCompletionChunk
+from pydantic import BaseModel
+from core.models.responses import (
+    OpenAgentStreamingResponse,
+    UsageResponse,
+    PromptTokensDetails,
+    CompletionTokensDetails,
+)
+
+
+def build_usage_response(usage: Any) -> Optional[UsageResponse]:
+    """
+    Build the usage response from the OpenAI client usage object.
+
+    Args:
+        usage: The usage object returned by the OpenAI client.
+
+    Returns:
+        An UsageResponse object or None if no usage was reported.
+    """
+    if usage is None:
+        return None
+
+    prompt_details = usage.prompt_tokens_details
+    completion_details = usage.completion_tokens_details
+
+    return UsageResponse(
+        prompt_tokens=usage.prompt_tokens,
+        completion_tokens=usage.completion_tokens,
+        total_tokens=usage.total_tokens,
+        prompt_tokens_details=PromptTokensDetails(
+            cached_tokens=getattr(prompt_details, "cached_tokens", None) or 0,
+            audio_tokens=getattr(prompt_details, "audio_tokens", None) or 0,
+        ),
+        completion_tokens_details=CompletionTokensDetails(
+            reasoning_tokens=getattr(completion_details, "reasoning_tokens", None) or 0,
+            audio_tokens=getattr(completion_details, "audio_tokens", None) or 0,
+            accepted_prediction_tokens=getattr(completion_details, "accepted_prediction_tokens", None) or 0,
+            rejected_prediction_tokens=getattr(completion_details, "rejected_prediction_tokens", None) or 0,
+        ),
+    )
+
+
+class OpenAIStreamAccumulator:
+    """
+    A class to assemble raw completion chunks into streaming responses.
+    It is shared by the synchronous and asynchronous LLM services, which only
+    differ in how they iterate over the stream.
+
+    ## Methods:
+        `add_chunk()`: A method to consume a raw chunk and return a delta response if it carries content.
+
+        `finalize()`: A method to build the final response with the complete message.
+    """
+    def __init__(self, response_schema: Optional[BaseModel] = NOT_GIVEN):
+        self.response_schema = response_schema
+        self.role = "assistant"
+        self.index = 0
+        self.content_parts: List[str] = []
+        self.refusal_parts: List[str] = []
+        self.tool_calls: Dict[int, Dict[str, Any]] = {}
+        self.finish_reason: Optional[str] = None
+        self.usage: Optional[UsageResponse] = None
+
+    def add_chunk(self, chunk: ChatCompletionChunk) -> Optional[OpenAgentStreamingResponse]:
+        """
+        Consume a raw completion chunk.
+
+        Args:
+            chunk (ChatCompletionChunk): The raw chunk from the OpenAI client.
+
+        Returns:
+            Optional[OpenAgentStreamingResponse]: A delta response if the chunk carries content or audio, otherwise None.
+        """
+        if chunk.usage is not None:
+            self.usage = build_usage_response(chunk.usage)
+
+        if not chunk.choices:
+            return None
+
+        choice = chunk.choices[0]
+        delta = choice.delta
+
+        if delta.role:
+            self.role = delta.role
+
+        if choice.finish_reason:
+            self.finish_reason = choice.finish_reason
+
+        if delta.refusal:
+            self.refusal_parts.append(delta.refusal)
+
+        # Tool call arguments arrive in fragments, keyed by the tool call index
+        for tool_call in delta.tool_calls or []:
+            assembled = self.tool_calls.setdefault(
+                tool_call.index,
+                {
+                    "id": None,
+                    "type": "function",
+                    "function": {
+                        "arguments": "",
+                        "name": "",
+                    },
+                },
+            )
+            if tool_call.id:
+                assembled["id"] = tool_call.id
+            if tool_call.type:
+                assembled["type"] = tool_call.type
+            if tool_call.function is not None:
+                if tool_call.function.name:
+                    assembled["function"]["name"] += tool_call.function.name
+                if tool_call.function.arguments:
+                    assembled["function"]["arguments"] += tool_call.function.arguments
+
+        delta_audio = None
+        audio = getattr(delta, "audio", None)
+        if isinstance(audio, dict):
+            delta_audio = audio.get("data")
+            if audio.get("transcript"):
+                self.content_parts.append(audio["transcript"])
+
+        if delta.content:
+            self.content_parts.append(delta.content)
+
+        if not (delta.content or delta_audio):
+            return None
+
+        response = OpenAgentStreamingResponse(
+            role=self.role,
+            index=self.index,
+            delta_content=delta.content,
+            delta_audio=delta_audio,
+        )
+        self.index += 1
+        return response
+
+    def finalize(self) -> OpenAgentStreamingResponse:
+        """
+        Build the final response once the stream is exhausted.
+
+        Returns:
+            OpenAgentStreamingResponse: The final response with the complete content, tool calls, `finish_reason` and usage.
+        """
+        content = "".join(self.content_parts) if self.content_parts else None
+        if content is not None and self.response_schema is not NOT_GIVEN and not isinstance(self.response_schema, NotGiven):
+            content = self.response_schema.model_validate_json(content)
+
+        return OpenAgentStreamingResponse(
+            role=self.role,
+            index=self.index,
+            content=content,
+            tool_calls=[self.tool_calls[i] for i in sorted(self.tool_calls)] or None,
+            refusal="".join(self.refusal_parts) if self.refusal_parts else None,
+            finish_reason=self.finish_reason or "stop",
+            usage=self.usage,
+        )
@@ -0,0 +1,5 @@
+from core.handlers.tool_registry import get_tool_registry
+
+# Built-in tools are imported on first use, executors can refer to them by name
+get_tool_registry().register_lazy("get_weather_tool", "modules.tools.get_weather:get_weather_tool")
+get_tool_registry().register_lazy("retrieve_knowledge", "modules.tools.retrieve_knowledge:retrieve_knowledge")
@@ -1,10 +1,13 @@
-from typing import Annotated, Union, Literal, Optional
+from typing import Annotated, Any, Dict, Union, Literal, Optional
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from collections import OrderedDict
 from core.utils.tool_wrapper import tool
 import os
-import requests
+import httpx
 from core.models.tool_responses.weather_response import WeatherForecast, CurrentWeather, WeatherResponse
+from core.utils.http_client_provider import get_http_client_provider
 import logging
-from functools import lru_cache
+import threading
 import time
 from dotenv import load_dotenv
 load_dotenv()
@@ -12,58 +15,271 @@ load_dotenv()
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Always fetch the longest forecast (today + 3 days), so one entry per location serves every request
+MAX_FORECAST_DAYS = 3
 
-@lru_cache(maxsize=100)
-def get_weather_data(location: str, days: int, api_key: str) -> dict:
-    """
-    Fetch weather data with caching to avoid repeated API calls.
-    
-    Args:
-        location: Location to get weather for
-        days: Number of days for forecast
-        api_key: Weather API key
-        
-    Returns:
-        Weather data dictionary or None if request failed
-    """
-    try:
-        response = requests.get(
-            url=f"https://api.weatherapi.com/v1/forecast.json",
-            params={
-                "key": api_key,
-                "q": location,
-                "days": days,
-                "aqi": "yes",
-                "alerts": "yes"
-            },
-            timeout=10  # Add timeout to prevent hanging
-        )
-        
-        response.raise_for_status()  # Raise exception for HTTP errors
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Weather API request failed: {str(e)}")
-        return None
 
-def get_location_from_ip() -> str:
+class _WeatherEntry:
+    __slots__ = ("data", "fetched_at")
+
+    def __init__(self, data: dict, fetched_at: float):
+        self.data = data
+        self.fetched_at = fetched_at
+
+
+class WeatherProvider:
     """
-    Get user location from IP address.
-    
-    Returns:
-        City name or "Unknown" if detection fails
+    A weather data provider on the shared HTTP connection pool, with a cache keyed by the
+    normalized location and stale-while-revalidate: a fresh reading is served from memory,
+    a slightly old one is served instantly while a background refresh runs, and only a miss
+    waits for the API. Fetches, retries and their backoff run on a small worker pool under a
+    deadline, and concurrent requests for the same location share one fetch.
+
+    ## Methods:
+        `resolve_location()`: A method to resolve "Unknown" to the location of the IP address, cached.
+
+        `get()`: A method to get the weather data of a location.
+
+        `stats()`: A method to get the cache and fetch counters.
+
+        `close()`: A method to stop the worker pool.
     """
-    try:
-        response = requests.get('https://ipinfo.io', timeout=5)
-        response.raise_for_status()
-        data = response.json()
-        city = data.get('city')
+    def __init__(self,
+                 api_key: Optional[str] = None,
+                 base_url: Optional[str] = None,
+                 current_ttl: float = 10 * 60,
+                 forecast_ttl: float = 3 * 60 * 60,
+                 max_stale: float = 30 * 60,
+                 location_ttl: float = 6 * 60 * 60,
+                 deadline: float = 8.0,
+                 request_timeout: float = 5.0,
+                 retry_delay: float = 0.5,
+                 max_entries: int = 512,
+                 max_workers: int = 4):
+        self._api_key = api_key
+        self.base_url = (base_url or os.getenv("WEATHERAPI_BASE_URL", "https://api.weatherapi.com/v1")).rstrip("/")
+        self.current_ttl = current_ttl
+        self.forecast_ttl = forecast_ttl
+        self.max_stale = max_stale
+        self.location_ttl = location_ttl
+        self.deadline = deadline
+        self.request_timeout = request_timeout
+        self.retry_delay = retry_delay
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _WeatherEntry]" = OrderedDict()
+        self._flights: Dict[str, Future] = {}
+        self._ip_location: Optional[tuple[str, float]] = None
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="weather")
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.fetches = 0
+        self.failures = 0
+        self.timeouts = 0
+
+    @property
+    def api_key(self) -> Optional[str]:
+        return self._api_key or os.getenv("WEATHERAPI_API_KEY")
+
+    @staticmethod
+    def normalize_location(location: str) -> str:
+        return " ".join(location.split()).casefold()
+
+    def resolve_location(self, location: str) -> str:
+        """
+        Resolve "Unknown" to the city of the IP address. The lookup is cached for
+        `location_ttl` seconds instead of costing a round trip per request.
+
+        Args:
+            location (str): The requested location.
+
+        Returns:
+            str: The location, or "Unknown" if it cannot be detected.
+        """
+        if location != "Unknown":
+            return location
+
+        cached = self._ip_location
+        if cached is not None and time.monotonic() - cached[1] <= self.location_ttl:
+            return cached[0]
+
+        try:
+            response = get_http_client_provider().get_client().get("https://ipinfo.io", timeout=self.request_timeout)
+            response.raise_for_status()
+            city = response.json().get("city")
+        except (httpx.HTTPError, ValueError) as e:
+            logger.error(f"IP location detection failed: {str(e)}")
+            return "Unknown"
+
         if not city:
             logger.warning("City not found in IP info response")
             return "Unknown"
+        self._ip_location = (city, time.monotonic())
         return city
-    except requests.exceptions.RequestException as e:
-        logger.error(f"IP location detection failed: {str(e)}")
-        return "Unknown"
+
+    def _fresh_ttl(self, mode: str) -> float:
+        if mode == "current":
+            return self.current_ttl
+        if mode == "forecast":
+            return self.forecast_ttl
+        return min(self.current_ttl, self.forecast_ttl)
+
+    def get(self, location: str, mode: Literal["current", "forecast", "both"] = "both") -> Optional[dict]:
+        """
+        Get the weather data of a location (the current weather and a forecast of `MAX_FORECAST_DAYS` days).
+
+        Args:
+            location (str): The location.
+            mode (Literal["current", "forecast", "both"]): The data needed, which sets how old the cached reading may be.
+
+        Returns:
+            Optional[dict]: The WeatherAPI forecast response, or None if it could not be fetched before the deadline.
+        """
+        key = self.normalize_location(location)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is not None:
+            age = time.monotonic() - entry.fetched_at
+            fresh_ttl = self._fresh_ttl(mode)
+            if age <= fresh_ttl:
+                self.hits += 1
+                return entry.data
+            if age <= fresh_ttl + self.max_stale:
+                self.stale_hits += 1
+                self._refresh(key, location)
+                return entry.data
+
+        self.misses += 1
+        try:
+            return self._refresh(key, location).result(timeout=self.deadline)
+        except FutureTimeoutError:
+            # The fetch keeps running and fills the cache for the next request
+            self.timeouts += 1
+            logger.warning(f"Weather data for '{location}' not available within {self.deadline}s")
+            return None
+
+    def _refresh(self, key: str, location: str) -> Future:
+        with self._lock:
+            future = self._flights.get(key)
+            if future is None:
+                future = self._executor.submit(self._fetch, key, location)
+                self._flights[key] = future
+        return future
+
+    def _fetch(self, key: str, location: str) -> Optional[dict]:
+        try:
+            data = self._fetch_with_retries(location, time.monotonic() + self.deadline)
+            if data is not None:
+                with self._lock:
+                    self._entries[key] = _WeatherEntry(data, time.monotonic())
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            else:
+                # A failed refresh keeps serving the previous reading until it is too stale
+                self.failures += 1
+            return data
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+
+    def _fetch_with_retries(self, location: str, deadline_at: float) -> Optional[dict]:
+        delay = self.retry_delay
+        while True:
+            self.fetches += 1
+            remaining = deadline_at - time.monotonic()
+            try:
+                response = get_http_client_provider().get_client().get(
+                    url=f"{self.base_url}/forecast.json",
+                    params={
+                        "key": self.api_key,
+                        "q": location,
+                        "days": MAX_FORECAST_DAYS + 1,
+                        "aqi": "yes",
+                        "alerts": "yes"
+                    },
+                    timeout=max(min(self.request_timeout, remaining), 0.1),
+                )
+                response.raise_for_status()
+                return response.json()
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code < 500:
+                    # Unknown location or invalid key, retrying cannot help
+                    logger.error(f"Weather API request failed: {str(e)}")
+                    return None
+                error = e
+            except (httpx.HTTPError, ValueError) as e:
+                error = e
+
+            if time.monotonic() + delay >= deadline_at:
+                logger.error(f"Weather API request failed: {str(error)}")
+                return None
+            logger.warning(f"Weather API request failed, retrying in {delay}s: {str(error)}")
+            time.sleep(delay)
+            delay *= 2
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the provider counters.
+
+        Returns:
+            Dict[str, Any]: The fresh and stale hits, misses, API fetches, failed refreshes, deadline timeouts and cached locations.
+        """
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "fetches": self.fetches,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "locations": len(self._entries),
+        }
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_WEATHER_PROVIDER: Optional[WeatherProvider] = None
+_WEATHER_PROVIDER_LOCK = threading.Lock()
+
+
+def get_weather_provider() -> WeatherProvider:
+    """
+    Get the process-wide weather provider, created with the default settings on first use.
+
+    Returns:
+        WeatherProvider: The provider.
+    """
+    global _WEATHER_PROVIDER
+    if _WEATHER_PROVIDER is None:
+        with _WEATHER_PROVIDER_LOCK:
+            if _WEATHER_PROVIDER is None:
+                _WEATHER_PROVIDER = WeatherProvider()
+    return _WEATHER_PROVIDER
+
+
+def configure_weather_provider(**settings: Any) -> WeatherProvider:
+    """
+    Replace the process-wide weather provider, e.g. to change the TTLs or the deadline.
+
+    Args:
+        **settings: The `WeatherProvider` arguments.
+
+    Returns:
+        WeatherProvider: The new provider.
+    """
+    global _WEATHER_PROVIDER
+    with _WEATHER_PROVIDER_LOCK:
+        if _WEATHER_PROVIDER is not None:
+            _WEATHER_PROVIDER.close()
+        _WEATHER_PROVIDER = WeatherProvider(**settings)
+    return _WEATHER_PROVIDER
 
 def extract_current_weather(weather_data: dict) -> Optional[CurrentWeather]:
     """
@@ -179,12 +395,11 @@ def get_weather_tool(
     # Input validation
     if days < 0:
         days = 0
-    elif days > 3:
-        days = 3
+    elif days > MAX_FORECAST_DAYS:
+        days = MAX_FORECAST_DAYS
         
-    # Get API key with proper error handling
-    weather_api_key = os.getenv("WEATHERAPI_API_KEY")
-    if not weather_api_key:
+    provider = get_weather_provider()
+    if not provider.api_key:
         logger.error("Weather API key not found in environment variables")
         return WeatherResponse(
             location="Weather API key not configured. Service unavailable.",
@@ -193,65 +408,41 @@ def get_weather_tool(
             error="Weather API key not configured"
         )
     
-    # Add one more day because the first forecast is for the current day
-    api_days = days + 1
-    
     # Determine location if not provided
-    actual_location = location
-    if location == "Unknown":
-        actual_location = get_location_from_ip()
+    actual_location = provider.resolve_location(location)
         
-    # Retry mechanism for API calls
-    max_retries = 3
-    retry_delay = 1  # seconds
+    # Served from the provider cache when possible, retries happen on its worker pool
+    weather_data = provider.get(actual_location, mode)
+    if not weather_data:
+        return WeatherResponse(
+            location=actual_location,
+            current_weather=None,
+            forecast=None,
+            error="Failed to fetch weather data after multiple attempts"
+        )
     
-    for attempt in range(max_retries):
-        try:
-            # Get weather data
-            weather_data = get_weather_data(actual_location, api_days, weather_api_key)
-            
-            if not weather_data:
-                if attempt < max_retries - 1:
-                    logger.warning(f"Weather API request failed, retrying in {retry_delay}s (attempt {attempt+1}/{max_retries})")
-                    time.sleep(retry_delay)
-                    retry_delay *= 2  # Exponential backoff
-                    continue
-                else:
-                    return WeatherResponse(
-                        location=actual_location,
-                        current_weather=None,
-                        forecast=None,
-                        error="Failed to fetch weather data after multiple attempts"
-                    )
-            
-            # Process current weather if requested
-            current_weather = None
-            if mode in ["both", "current"]:
-                current_weather = extract_current_weather(weather_data)
-            
-            # Process forecast if requested
-            forecast = None
-            if mode in ["both", "forecast"]:
-                forecast = extract_forecast(weather_data)
-            
-            # Return the weather response
-            return WeatherResponse(
-                location=actual_location,
-                current_weather=current_weather,
-                forecast=forecast
-            )
-            
-        except Exception as e:
-            logger.error(f"Error in get_weather_tool: {str(e)}")
-            if attempt < max_retries - 1:
-                logger.warning(f"Retrying in {retry_delay}s (attempt {attempt+1}/{max_retries})")
-                time.sleep(retry_delay)
-                retry_delay *= 2  # Exponential backoff
-            else:
-                # Return a response with error information after all retries fail
-                return WeatherResponse(
-                    location=actual_location,
-                    current_weather=None,
-                    forecast=None,
-                    error=f"Weather service error: {str(e)}"
-                )
\ No newline at end of file
+    try:
+        # Process current weather if requested
+        current_weather = None
+        if mode in ["both", "current"]:
+            current_weather = extract_current_weather(weather_data)
+        
+        # Process forecast if requested, the cached data always holds the longest forecast
+        forecast = None
+        if mode in ["both", "forecast"]:
+            forecast = extract_forecast(weather_data)[:days]
+        
+        # Return the weather response
+        return WeatherResponse(
+            location=actual_location,
+            current_weather=current_weather,
+            forecast=forecast
+        )
+    except Exception as e:
+        logger.error(f"Error in get_weather_tool: {str(e)}")
+        return WeatherResponse(
+            location=actual_location,
+            current_weather=None,
+            forecast=None,
+            error=f"Weather service error: {str(e)}"
+        )
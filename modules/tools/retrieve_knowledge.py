@@ -0,0 +1,131 @@
+from typing import Annotated, Any, Optional
+from core.utils.tool_wrapper import tool
+from core.models.tool_responses.knowledge_response import KnowledgeResponse, KnowledgeResult
+from core.utils.http_client_provider import get_http_client_provider
+from modules.database.hybrid_retriever import HybridRetriever, RetrievalMode
+from modules.database.ivf_index import IVFIndex
+from modules.database.vector_store import VectorStore
+from modules.openai.openai_embedding_service import OpenAIEmbeddingModel
+from loguru import logger
+import os
+import threading
+from dotenv import load_dotenv
+load_dotenv()
+
+MAX_TOP_K = 10
+
+_KNOWLEDGE_STORE: Optional[VectorStore] = None
+_KNOWLEDGE_INDEX: Optional[IVFIndex] = None
+_KNOWLEDGE_RETRIEVER: Optional[HybridRetriever] = None
+_KNOWLEDGE_STORE_LOCK = threading.Lock()
+
+
+def get_knowledge_store() -> VectorStore:
+    """
+    Get the process-wide knowledge store, opened on first use from `KNOWLEDGE_STORE_PATH`
+    and embedding queries with `KNOWLEDGE_EMBEDDING_MODEL` on the shared connection pool.
+
+    Returns:
+        VectorStore: The knowledge store.
+    """
+    global _KNOWLEDGE_STORE
+    if _KNOWLEDGE_STORE is None:
+        with _KNOWLEDGE_STORE_LOCK:
+            if _KNOWLEDGE_STORE is None:
+                client = get_http_client_provider().openai_client(api_key=os.getenv("OPENAI_API_KEY"))
+                _KNOWLEDGE_STORE = VectorStore(
+                    path=os.getenv("KNOWLEDGE_STORE_PATH", "knowledge_store"),
+                    embedding_model=OpenAIEmbeddingModel(
+                        client=client,
+                        embedding_model=os.getenv("KNOWLEDGE_EMBEDDING_MODEL", "text-embedding-3-small"),
+                    ),
+                )
+    return _KNOWLEDGE_STORE
+
+
+def configure_knowledge_store(**settings: Any) -> VectorStore:
+    """
+    Replace the process-wide knowledge store, e.g. to use another directory or embedding model.
+
+    Args:
+        **settings: The `VectorStore` arguments.
+
+    Returns:
+        VectorStore: The new store.
+    """
+    global _KNOWLEDGE_STORE, _KNOWLEDGE_INDEX, _KNOWLEDGE_RETRIEVER
+    with _KNOWLEDGE_STORE_LOCK:
+        _KNOWLEDGE_STORE = VectorStore(**settings)
+        _KNOWLEDGE_INDEX = None
+        _KNOWLEDGE_RETRIEVER = None
+    return _KNOWLEDGE_STORE
+
+
+def get_knowledge_index() -> IVFIndex:
+    """
+    Get the IVF index of the knowledge store, loaded from the store directory on first use.
+    Until `build()` has been run on it once, searches scan the whole store.
+
+    Returns:
+        IVFIndex: The knowledge index.
+    """
+    global _KNOWLEDGE_INDEX
+    store = get_knowledge_store()
+    if _KNOWLEDGE_INDEX is None:
+        with _KNOWLEDGE_STORE_LOCK:
+            if _KNOWLEDGE_INDEX is None:
+                _KNOWLEDGE_INDEX = IVFIndex(store, nprobe=int(os.getenv("KNOWLEDGE_NPROBE", "16")))
+    return _KNOWLEDGE_INDEX
+
+
+def get_knowledge_retriever() -> HybridRetriever:
+    """
+    Get the hybrid retriever of the knowledge store: its BM25 index, saved in the store
+    directory, and its IVF index.
+
+    Returns:
+        HybridRetriever: The knowledge retriever.
+    """
+    global _KNOWLEDGE_RETRIEVER
+    index = get_knowledge_index()
+    if _KNOWLEDGE_RETRIEVER is None:
+        with _KNOWLEDGE_STORE_LOCK:
+            if _KNOWLEDGE_RETRIEVER is None:
+                _KNOWLEDGE_RETRIEVER = HybridRetriever(index.store, vector_index=index)
+    return _KNOWLEDGE_RETRIEVER
+
+
+@tool
+def retrieve_knowledge(
+    query: Annotated[str, "The search query, phrased as the information to find."],
+    top_k: Annotated[int, "The number of passages to return. Maximum of 10"],
+    mode: Annotated[RetrievalMode, "The search mode: 'auto' by default, 'lexical' for exact keywords or identifiers, 'semantic' for meaning, 'hybrid' for both."],
+    ) -> KnowledgeResponse:
+    """
+    Search the knowledge base for the passages most relevant to a query.
+
+    Args:
+        query: The search query
+        top_k: Number of passages to return (max 10)
+        mode: Search mode (auto, lexical, semantic or hybrid)
+
+    Returns:
+        KnowledgeResponse object with the passages, best first
+    """
+    top_k = max(1, min(top_k, MAX_TOP_K))
+
+    try:
+        retriever = get_knowledge_retriever()
+        if not len(retriever.store):
+            return KnowledgeResponse(query=query, results=[], error="The knowledge base is empty")
+
+        results = []
+        for result in retriever.search(query, k=top_k, mode=mode):
+            # Ingested chunks carry the chunk with its surrounding text, returned instead of the bare chunk
+            metadata = dict(result.metadata or {})
+            content = metadata.pop("combined_splits", None) or result.text
+            results.append(KnowledgeResult(content=content, score=round(result.score, 4), metadata=metadata))
+        return KnowledgeResponse(query=query, results=results)
+    except Exception as e:
+        logger.error(f"Error searching the knowledge base: {e}")
+        return KnowledgeResponse(query=query, results=[], error=f"Knowledge search failed: {e}")